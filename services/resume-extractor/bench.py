@@ -0,0 +1,399 @@
+"""
+Micro-benchmarks for the conversion pipeline.
+
+Run inside the service image (tesseract and the Python dependencies must be installed):
+
+    uv run python bench.py ocr-engines --iterations 20
+    uv run python bench.py image-preprocess
+    uv run python bench.py rtf
+"""
+
+import argparse
+import difflib
+import os
+import random
+import shutil
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+import ocr
+import rtf
+
+SAMPLE_LINES = [
+    "JANE DOE - Senior Software Engineer",
+    "jane.doe@example.com | +1 555 0100 | San Francisco, CA",
+    "EXPERIENCE",
+    "Acme Corp, Staff Engineer (2019 - Present)",
+    "Led migration of billing services to an event-driven architecture",
+    "Reduced p99 API latency by 40% through query and cache tuning",
+    "EDUCATION",
+    "B.S. Computer Science, State University, 2014",
+    "SKILLS",
+    "Python, Go, PostgreSQL, Kubernetes, Terraform, AWS",
+]
+
+
+# ============================================================================
+# Helpers
+# ============================================================================
+
+
+def render_text_image(width: int, height: int, lines: List[str] = SAMPLE_LINES) -> np.ndarray:
+    """Render resume-like text onto a white grayscale canvas of the given size."""
+    image = np.full((height, width), 255, dtype=np.uint8)
+    font_scale = width / 1600
+    thickness = max(1, int(round(font_scale * 2)))
+    line_height = int(60 * font_scale) + 10
+    y = line_height
+
+    for line in lines:
+        if y >= height - 10:
+            break
+        cv2.putText(
+            image,
+            line,
+            (int(width * 0.05), y),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            font_scale,
+            0,
+            thickness,
+            cv2.LINE_AA,
+        )
+        y += line_height
+
+    return image
+
+
+def render_photo(width: int, height: int, skew: float = 2.0) -> np.ndarray:
+    """
+    Render a page photo: slightly skewed text under uneven lighting with mild
+    sensor noise and lens softness, JPEG-encoded.
+    """
+    page = render_text_image(width, height)
+    M = cv2.getRotationMatrix2D((width // 2, height // 2), skew, 1.0)
+    page = cv2.warpAffine(page, M, (width, height), borderValue=255)
+
+    lighting = np.linspace(0.82, 0.96, width, dtype=np.float32)[np.newaxis, :]
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 2, page.shape).astype(np.float32)
+    photo = np.clip(page.astype(np.float32) * lighting + 10 + noise, 0, 255).astype(np.uint8)
+    photo = cv2.GaussianBlur(photo, (3, 3), 0)
+    photo = cv2.cvtColor(photo, cv2.COLOR_GRAY2BGR)
+
+    ok, encoded = cv2.imencode(".jpg", photo, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    if not ok:
+        raise RuntimeError("Failed to encode benchmark image")
+    return encoded
+
+
+def similarity(text: str, expected: List[str] = SAMPLE_LINES) -> float:
+    """Character-level similarity between OCR output and the rendered lines (0-1)."""
+    got = " ".join(text.split())
+    want = " ".join(" ".join(expected).split())
+    return difflib.SequenceMatcher(None, got, want).ratio()
+
+
+def measure(func: Callable[[], object]) -> Tuple[object, float, float]:
+    """Run func once, returning (result, wall ms, peak traced MB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def time_calls(func: Callable[[], object], iterations: int) -> List[float]:
+    """Return per-call wall times in milliseconds."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": statistics.median(ordered),
+        "p95": ordered[p95_index],
+    }
+
+
+def print_table(title: str, rows: List[Dict[str, object]]):
+    print(f"\n{title}")
+    if not rows:
+        print("  (no results)")
+        return
+    headers = list(rows[0].keys())
+    widths = {h: max(len(h), *(len(str(r[h])) for r in rows)) for h in headers}
+    print("  " + "  ".join(h.ljust(widths[h]) for h in headers))
+    for row in rows:
+        print("  " + "  ".join(str(row[h]).ljust(widths[h]) for h in headers))
+
+
+def _rtf_escape(text: str) -> str:
+    """Escape text for an RTF body, writing non-ASCII as \\uN with a '?' fallback."""
+    out = []
+    for ch in text:
+        if ch in "\\{}":
+            out.append("\\" + ch)
+        elif ord(ch) > 127:
+            code = ord(ch)
+            out.append(f"\\u{code - 0x10000 if code > 32767 else code}?")
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def render_rtf(text_repeats: int, style_entries: int, pict_bytes: int, objects: int) -> str:
+    """
+    Build an RTF resume shaped like real ATS/Word exports: a font table, a long
+    stylesheet, revision-save (rsid) tables and latent styles, the resume body
+    repeated text_repeats times, hex-encoded logo images and embedded OLE objects.
+    """
+    rng = random.Random(0)
+    parts = [
+        "{\\rtf1\\ansi\\ansicpg1252\\deff0\\uc1",
+        "{\\fonttbl{\\f0\\fswiss\\fcharset0 Arial;}{\\f1\\froman\\fcharset0 Times New Roman;}"
+        "{\\f2\\fnil\\fcharset2 Symbol;}}",
+        "{\\colortbl;\\red0\\green0\\blue0;\\red31\\green73\\blue125;}",
+        "{\\stylesheet"
+        + "".join(
+            f"{{\\s{i}\\ql\\li0\\ri0\\sa160\\sl259\\slmult1\\f0\\fs22 Style {i};}}"
+            for i in range(style_entries)
+        )
+        + "}",
+        "{\\*\\rsidtbl "
+        + "".join(f"\\rsid{rng.randrange(10**7)}" for _ in range(style_entries * 4))
+        + "}",
+        "{\\*\\latentstyles\\lsdstimax376"
+        + "".join(
+            f"{{\\lsdlockedexcept\\lsdpriority{i} Normal {i};}}" for i in range(style_entries)
+        )
+        + "}",
+        "{\\info{\\author Recruiter}{\\company Example ATS}}",
+    ]
+
+    for index in range(pict_bytes and max(1, objects) or 0):
+        data = "".join(f"{rng.randrange(256):02x}" for _ in range(pict_bytes // max(1, objects)))
+        lines = "\n".join(data[i : i + 128] for i in range(0, len(data), 128))
+        parts.append(f"{{\\*\\shppict{{\\pict\\pngblip\\picw200\\pich80 {lines}}}}}")
+        if index < objects:
+            parts.append(f"{{\\object\\objemb{{\\*\\objclass Package}}{{\\*\\objdata {lines}}}}}")
+
+    body = "\\par ".join(_rtf_escape(line) for line in SAMPLE_LINES + ["Café – “quoted” résumé"])
+    for _ in range(text_repeats):
+        parts.append(
+            f"{{\\pard\\s1\\f0\\fs22 {body}\\par}}"
+            f'{{\\field{{\\*\\fldinst{{HYPERLINK "https://example.com/jane"}}}}'
+            f"{{\\fldrslt{{\\ul portfolio}}}}}}\\par"
+            f"\\trowd\\cellx3000\\cellx6000 Python\\cell Go\\cell\\row "
+        )
+
+    parts.append("}")
+    return "".join(parts)
+
+
+# Named to match the archives they stand in for
+RTF_CORPUS = {
+    "plain-40k": dict(text_repeats=60, style_entries=10, pict_bytes=0, objects=0),
+    "word-export-300k": dict(text_repeats=120, style_entries=1200, pict_bytes=0, objects=0),
+    "ats-logo-1.5m": dict(text_repeats=120, style_entries=1200, pict_bytes=600_000, objects=0),
+    "binder-8m": dict(text_repeats=600, style_entries=1200, pict_bytes=1_900_000, objects=3),
+}
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+
+def _recognize_fresh_handle(pool: ocr.TesseractEnginePool, gray: np.ndarray) -> str:
+    gray = np.ascontiguousarray(gray)
+    api = pool._create_handle()
+    try:
+        api.SetImageBytes(gray.tobytes(), gray.shape[1], gray.shape[0], 1, gray.strides[0])
+        return api.GetUTF8Text()
+    finally:
+        api.End()
+
+
+def bench_ocr_engines(args: argparse.Namespace):
+    """Compare per-image latency of the pooled in-process engine against the tesseract CLI."""
+    image = ocr.preprocess(render_text_image(args.width, args.height))
+
+    backends = {}
+    if shutil.which(ocr.TESSERACT_CMD):
+        backends["cli"] = lambda: ocr.recognize_cli(image)
+    else:
+        print(f"{ocr.TESSERACT_CMD} not found; the CLI backend is not measured")
+    pool = ocr.get_engine_pool()
+    if pool is not None:
+        # A new handle per image: the CLI's engine start-up, without the process spawn
+        backends["tesserocr-per-image"] = lambda: _recognize_fresh_handle(pool, image)
+        # Warm up so handle creation (loading traineddata) is not counted per image
+        pool.recognize(image)
+        backends["tesserocr-pool"] = lambda: pool.recognize(image)
+    else:
+        print(
+            "tesserocr is not installed or OCR_ENGINE=cli; the in-process backends are not measured"
+        )
+
+    rows = []
+    for name, func in backends.items():
+        stats = summarize(time_calls(func, args.iterations))
+        rows.append(
+            {
+                "backend": name,
+                "images": args.iterations,
+                "mean_ms": f"{stats['mean']:.1f}",
+                "p50_ms": f"{stats['p50']:.1f}",
+                "p95_ms": f"{stats['p95']:.1f}",
+            }
+        )
+
+    print_table(f"OCR latency per image ({args.width}x{args.height})", rows)
+
+
+def _legacy_preprocess(encoded: np.ndarray) -> np.ndarray:
+    """The pre-optimization image pipeline: full decode, full-res deskew, fixed 150% upscale."""
+    image = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+    gray = cv2.bitwise_not(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+    coords = np.column_stack(np.where(gray > 0))
+    angle = cv2.minAreaRect(coords)[-1]
+    angle = -(90 + angle) if angle < -45 else -angle
+    h, w = image.shape[:2]
+    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    image = cv2.warpAffine(image, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    resized = cv2.resize(gray, (int(w * 1.5), int(h * 1.5)), interpolation=cv2.INTER_LINEAR)
+    blurred = cv2.GaussianBlur(resized, (5, 5), 0)
+    thresholded = cv2.adaptiveThreshold(
+        blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+    )
+    return cv2.morphologyEx(thresholded, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+
+
+def _current_preprocess(encoded: np.ndarray) -> np.ndarray:
+    """The current image pipeline up to (not including) recognition."""
+    gray = ocr.decode_image(encoded)
+    angle, text_height = ocr.estimate_layout(gray)
+    deskewed = ocr.deskew(gray, angle)
+    return ocr.preprocess(deskewed, scale=ocr.scale_for_text_height(text_height))
+
+
+def bench_image_preprocess(args: argparse.Namespace):
+    """Time, peak memory and OCR accuracy of image preprocessing across photo sizes."""
+    pipelines = {"legacy": _legacy_preprocess, "current": _current_preprocess}
+    rows = []
+
+    for size in args.sizes:
+        width, height = (int(v) for v in size.lower().split("x"))
+        encoded = render_photo(width, height)
+
+        for name, pipeline in pipelines.items():
+            timings, peaks = [], []
+            processed = None
+            for _ in range(args.iterations):
+                processed, elapsed, peak = measure(lambda: pipeline(encoded))
+                timings.append(elapsed)
+                peaks.append(peak)
+
+            row = {
+                "size": f"{width}x{height}",
+                "pipeline": name,
+                "ocr_input": f"{processed.shape[1]}x{processed.shape[0]}",
+                "prep_ms": f"{statistics.median(timings):.0f}",
+                "peak_mb": f"{max(peaks):.0f}",
+            }
+            if not args.skip_ocr:
+                text, ocr_ms, _ = measure(lambda: ocr.recognize(processed))
+                row["ocr_ms"] = f"{ocr_ms:.0f}"
+                row["accuracy"] = f"{similarity(text):.3f}"
+            rows.append(row)
+
+    print_table(
+        "Image preprocessing (median over iterations, peak = traced numpy/OpenCV buffers)", rows
+    )
+
+
+def bench_rtf(args: argparse.Namespace):
+    """Compare the single-pass RTF extractor against striprtf on a real-world-sized corpus."""
+    from striprtf.striprtf import rtf_to_text as striprtf_to_text
+
+    extractors = {"striprtf": striprtf_to_text, "rtf": rtf.rtf_to_text}
+    rows = []
+
+    for name, shape in RTF_CORPUS.items():
+        source = render_rtf(**shape)
+        if args.save_corpus:
+            os.makedirs(args.save_corpus, exist_ok=True)
+            with open(os.path.join(args.save_corpus, f"{name}.rtf"), "w", encoding="ascii") as f:
+                f.write(source)
+
+        outputs = {}
+        for extractor, func in extractors.items():
+            outputs[extractor] = func(source)
+            stats = summarize(time_calls(lambda: func(source), args.iterations))
+            rows.append(
+                {
+                    "file": name,
+                    "size": f"{len(source) / 1024:.0f}KB",
+                    "extractor": extractor,
+                    "p50_ms": f"{stats['p50']:.1f}",
+                    "chars": len(outputs[extractor].strip()),
+                }
+            )
+
+        agreement = difflib.SequenceMatcher(
+            None, " ".join(outputs["striprtf"].split()), " ".join(outputs["rtf"].split())
+        ).quick_ratio()
+        rows[-1]["agreement"] = rows[-2]["agreement"] = f"{agreement:.3f}"
+
+    # rtf keeps every hyperlink's URL, striprtf only the last one's (see rtf.py)
+    print_table("RTF extraction (agreement = character overlap of the two outputs)", rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    engines = subparsers.add_parser("ocr-engines", help=bench_ocr_engines.__doc__)
+    engines.add_argument("--iterations", type=int, default=20)
+    engines.add_argument("--width", type=int, default=1700)
+    engines.add_argument("--height", type=int, default=2200)
+    engines.set_defaults(func=bench_ocr_engines)
+
+    preprocess = subparsers.add_parser("image-preprocess", help=bench_image_preprocess.__doc__)
+    preprocess.add_argument("--iterations", type=int, default=3)
+    preprocess.add_argument(
+        "--sizes", nargs="+", default=["1000x1300", "2000x2600", "3024x4032", "6000x8000"]
+    )
+    preprocess.add_argument("--skip-ocr", action="store_true", help="Only measure preprocessing")
+    preprocess.set_defaults(func=bench_image_preprocess)
+
+    rtf_parser = subparsers.add_parser("rtf", help=bench_rtf.__doc__)
+    rtf_parser.add_argument("--iterations", type=int, default=5)
+    rtf_parser.add_argument(
+        "--save-corpus", metavar="DIR", help="Also write the generated RTFs to DIR"
+    )
+    rtf_parser.set_defaults(func=bench_rtf)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Per-file checkpoints so a crashed or redeployed task resumes where it stopped.
+
+As files finish, their conversion result (text and text hash) and LLM result
+are buffered and written to MinIO in small gzipped JSONL segments under
+processed-json-files/<task_id>/checkpoint/. When the task runs again, the
+segments are loaded first: files with an LLM result are skipped entirely, and
+files with only a conversion result skip straight to the LLM. Empty texts and
+empty LLM results (failed conversions or extractions) are not recorded, so a
+resumed run tries those files again.
+
+Records are keyed by the file's content hash, which is stable across
+re-downloads and re-extraction. A file without a hash falls back to its
+original name and size. The checkpoint is deleted when the task completes.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from config import MinioBuckets, ServiceConfig
+from reprocess import is_empty_result
+from utils import (
+    ExtractedFile,
+    delete_prefix,
+    ensure_bucket,
+    get_object_bytes,
+    list_object_names,
+    put_object_bytes,
+)
+
+logger = logging.getLogger("resume-extractor.checkpoint")
+
+
+def file_key(f: ExtractedFile) -> str:
+    """Checkpoint key for a file: its content hash, else name and size."""
+    return f.content_hash or f"{f.original_name}:{f.size}"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+@dataclass
+class FileCheckpoint:
+    """What is known about one file from earlier runs."""
+
+    text: Optional[str] = None
+    text_hash: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+
+class TaskCheckpoint:
+    """Buffered, append-only checkpoint of a task's finished files."""
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.prefix = f"{task_id}/checkpoint/"
+        self.files: Dict[str, FileCheckpoint] = {}
+        self._pending: List[Dict[str, Any]] = []
+        self._segment = 0
+        self._last_flush = time.monotonic()
+        self._bucket_ready = False
+        self._lock = asyncio.Lock()
+
+    async def load(self) -> int:
+        """Read the segments written by earlier runs. Returns the number of files with an LLM result."""
+        loop = asyncio.get_event_loop()
+        try:
+            names = sorted(
+                await loop.run_in_executor(
+                    None, list_object_names, MinioBuckets.PROCESSED_JSON_FILES, self.prefix
+                )
+            )
+            for name in names:
+                data = await loop.run_in_executor(
+                    None, get_object_bytes, MinioBuckets.PROCESSED_JSON_FILES, name
+                )
+                for line in gzip.decompress(data).splitlines():
+                    self._apply(orjson.loads(line))
+        except Exception as e:
+            # A missing bucket or unreadable segment only costs the work it recorded
+            logger.warning(f"Could not load checkpoint for task {self.task_id}: {e}")
+            names = []
+
+        # New segments continue the numbering so earlier ones are never overwritten
+        if names:
+            self._segment = 1 + max(int(name.rsplit("-", 1)[1].split(".", 1)[0]) for name in names)
+        completed = sum(1 for entry in self.files.values() if entry.data is not None)
+        if self.files:
+            logger.info(
+                f"Task {self.task_id} checkpoint: {completed} file(s) extracted, "
+                f"{len(self.files) - completed} converted only"
+            )
+        return completed
+
+    def _apply(self, record: Dict[str, Any]):
+        entry = self.files.setdefault(record["key"], FileCheckpoint())
+        if "text" in record:
+            entry.text = record["text"]
+            entry.text_hash = record["textHash"]
+        if "data" in record:
+            entry.data = record["data"]
+
+    def get(self, f: ExtractedFile) -> Optional[FileCheckpoint]:
+        return self.files.get(file_key(f))
+
+    async def record_text(self, f: ExtractedFile, text: str):
+        if text.strip():
+            await self._record({"key": file_key(f), "text": text, "textHash": text_hash(text)})
+
+    async def record_result(self, f: ExtractedFile, data: Dict[str, Any]):
+        if not is_empty_result(data):
+            await self._record({"key": file_key(f), "data": data})
+
+    async def _record(self, record: Dict[str, Any]):
+        self._apply(record)
+        self._pending.append(record)
+        if (
+            len(self._pending) >= ServiceConfig.CHECKPOINT_FLUSH_FILES
+            or time.monotonic() - self._last_flush >= ServiceConfig.CHECKPOINT_FLUSH_SECONDS
+        ):
+            await self.flush()
+
+    async def flush(self):
+        """Write buffered records as a new segment."""
+        async with self._lock:
+            if not self._pending:
+                return
+            records, self._pending = self._pending, []
+            name = f"{self.prefix}segment-{self._segment:06d}.jsonl.gz"
+            self._segment += 1
+            self._last_flush = time.monotonic()
+
+            loop = asyncio.get_event_loop()
+            try:
+                data = gzip.compress(b"\n".join(orjson.dumps(r) for r in records), compresslevel=1)
+                if not self._bucket_ready:
+                    await loop.run_in_executor(
+                        None, ensure_bucket, MinioBuckets.PROCESSED_JSON_FILES
+                    )
+                    self._bucket_ready = True
+                await loop.run_in_executor(
+                    None,
+                    put_object_bytes,
+                    MinioBuckets.PROCESSED_JSON_FILES,
+                    name,
+                    data,
+                    "application/gzip",
+                )
+            except Exception as e:
+                # Losing a segment only means redoing those files after a restart
+                logger.warning(f"Failed to write checkpoint segment {name}: {e}")
+
+    async def delete(self):
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(
+                None, delete_prefix, MinioBuckets.PROCESSED_JSON_FILES, self.prefix
+            )
+        except Exception as e:
+            logger.error(f"Failed to delete checkpoint for task {self.task_id}: {e}")
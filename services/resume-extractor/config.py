@@ -4,11 +4,43 @@ Consolidates all environment variables from the original microservices.
 """
 
 import os
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def available_cpus() -> int:
+    """
+    CPUs this process may actually use: the scheduler affinity mask, further
+    capped by a cgroup CPU quota (v2 cpu.max or v1 cfs quota/period) when the
+    container has one. os.cpu_count() reports the host's CPUs instead.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+
+    quota = period = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            raw_quota, raw_period = f.read().split()
+        if raw_quota != "max":
+            quota, period = int(raw_quota), int(raw_period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+        except (OSError, ValueError):
+            pass
+
+    if quota and period and quota > 0:
+        cpus = min(cpus, max(1, -(-quota // period)))
+    return max(1, cpus)
+
+
 class ServiceConfig:
     """Main service configuration."""
 
@@ -30,6 +62,27 @@ class ServiceConfig:
     QUEUE_SIZE = int(os.getenv("QUEUE_SIZE", 10))
     CONCURRENCY = int(os.getenv("CONCURRENCY", 10))
 
+    # Task priority: x-max-priority of the task queue (0 declares it without
+    # priorities), size class thresholds, and extra workers reserved for small tasks
+    QUEUE_MAX_PRIORITY = int(os.getenv("QUEUE_MAX_PRIORITY", 10))
+    EXPRESS_MAX_FILES = int(os.getenv("EXPRESS_MAX_FILES", 50))
+    LARGE_TASK_MIN_FILES = int(os.getenv("LARGE_TASK_MIN_FILES", 1000))
+    EXPRESS_WORKER_COUNT = int(os.getenv("EXPRESS_WORKER_COUNT", 1))
+
+    # Supervisor mode (supervisor.py): consumer processes, and how long they may
+    # take to drain on shutdown before being killed
+    SUPERVISOR_PROCESSES = int(os.getenv("SUPERVISOR_PROCESSES", available_cpus()))
+    SUPERVISOR_SHUTDOWN_TIMEOUT = float(os.getenv("SUPERVISOR_SHUTDOWN_TIMEOUT", 120))
+
+    # On SIGTERM, how long in-flight tasks may run before being interrupted,
+    # checkpointed and requeued for another replica
+    DRAIN_GRACE_SECONDS = float(os.getenv("DRAIN_GRACE_SECONDS", 90))
+
+    # Health, readiness and load status endpoint (0 disables it)
+    HEALTH_PORT = int(os.getenv("HEALTH_PORT", 8080))
+    # Where supervisor mode collects the consumer processes' Prometheus metrics
+    METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", os.path.join(WORK_DIR, "metrics"))
+
     # Processing concurrency
     FILE_PROCESSING_CONCURRENCY = int(os.getenv("FILE_PROCESSING_CONCURRENCY", 50))
     LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 10))
@@ -47,6 +100,69 @@ class ServiceConfig:
     # Batch processing
     PROGRESS_UPDATE_BATCH_SIZE = int(os.getenv("PROGRESS_UPDATE_BATCH_SIZE", 50))
 
+    # PDF routing and OCR
+    PDF_MIN_PAGE_CHARS = int(os.getenv("PDF_MIN_PAGE_CHARS", 50))
+    PDF_CLASSIFY_SAMPLE_PAGES = int(os.getenv("PDF_CLASSIFY_SAMPLE_PAGES", 5))
+    PDF_SCANNED_IMAGE_COVERAGE = float(os.getenv("PDF_SCANNED_IMAGE_COVERAGE", 0.5))
+    # Page budget per PDF: the first PDF_HEAD_PAGES plus the last PDF_TAIL_PAGES (0 = no limit)
+    PDF_HEAD_PAGES = int(os.getenv("PDF_HEAD_PAGES", 15))
+    PDF_TAIL_PAGES = int(os.getenv("PDF_TAIL_PAGES", 3))
+    OCR_TARGET_PAGE_PIXELS = int(os.getenv("OCR_TARGET_PAGE_PIXELS", 3300))
+    OCR_MIN_DPI = int(os.getenv("OCR_MIN_DPI", 150))
+    OCR_MAX_DPI = int(os.getenv("OCR_MAX_DPI", 400))
+    PDF_OCR_PAGE_CONCURRENCY = int(os.getenv("PDF_OCR_PAGE_CONCURRENCY", 4))
+    OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", 60))
+    OCR_DECODE_TARGET_SIDE = int(os.getenv("OCR_DECODE_TARGET_SIDE", 2000))
+    OCR_ANALYSIS_MAX_SIDE = int(os.getenv("OCR_ANALYSIS_MAX_SIDE", 1200))
+    OCR_MIN_DESKEW_ANGLE = float(os.getenv("OCR_MIN_DESKEW_ANGLE", 0.2))
+    OCR_TARGET_TEXT_HEIGHT = int(os.getenv("OCR_TARGET_TEXT_HEIGHT", 30))
+    OCR_MIN_SCALE = float(os.getenv("OCR_MIN_SCALE", 0.35))
+    OCR_MAX_SCALE = float(os.getenv("OCR_MAX_SCALE", 3.0))
+    # "auto" uses pooled in-process tesseract (tesserocr) if installed, "cli" forces the subprocess
+    OCR_ENGINE = os.getenv("OCR_ENGINE", "auto").lower()
+    OCR_ENGINE_POOL_SIZE = int(os.getenv("OCR_ENGINE_POOL_SIZE", available_cpus()))
+
+    # Converter fallback chains: per-strategy time budgets and learned ordering
+    PDF_STRATEGY_BUDGET_SECONDS = float(os.getenv("PDF_STRATEGY_BUDGET_SECONDS", 20))
+    DOCX_STRATEGY_BUDGET_SECONDS = float(os.getenv("DOCX_STRATEGY_BUDGET_SECONDS", 10))
+    STRATEGY_STATS_PATH = os.getenv(
+        "STRATEGY_STATS_PATH", os.path.join(WORK_DIR, "strategy-stats.json")
+    )
+    STRATEGY_MIN_SAMPLES = int(os.getenv("STRATEGY_MIN_SAMPLES", 20))
+    STRATEGY_STATS_SAVE_INTERVAL = float(os.getenv("STRATEGY_STATS_SAVE_INTERVAL", 60))
+
+    # Conversion workers: isolated processes with hard per-file deadlines (0 = in-process threads)
+    CONVERTER_WORKERS = int(os.getenv("CONVERTER_WORKERS", available_cpus()))
+    CONVERSION_TIMEOUT_SECONDS = float(os.getenv("CONVERSION_TIMEOUT_SECONDS", 120))
+    # Address-space cap per worker process (0 = none); workers whose RSS grows past
+    # CONVERTER_RECYCLE_RSS_MB after a job are replaced
+    CONVERTER_MEMORY_LIMIT_MB = int(os.getenv("CONVERTER_MEMORY_LIMIT_MB", 3072))
+    CONVERTER_RECYCLE_RSS_MB = int(os.getenv("CONVERTER_RECYCLE_RSS_MB", 1024))
+    # Weight of each observed conversion time in the scheduler's per-type cost rates
+    SCHEDULER_EWMA_ALPHA = float(os.getenv("SCHEDULER_EWMA_ALPHA", 0.2))
+
+    # Per-file checkpoints in MinIO so an interrupted task resumes where it stopped
+    CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+    CHECKPOINT_FLUSH_FILES = int(os.getenv("CHECKPOINT_FLUSH_FILES", 50))
+    CHECKPOINT_FLUSH_SECONDS = float(os.getenv("CHECKPOINT_FLUSH_SECONDS", 30))
+
+    # Partial JSONL/Excel snapshots uploaded while a task runs, every N new
+    # results or T seconds, whichever comes first
+    PARTIAL_RESULTS_ENABLED = os.getenv("PARTIAL_RESULTS_ENABLED", "true").lower() == "true"
+    PARTIAL_RESULTS_EVERY_FILES = int(os.getenv("PARTIAL_RESULTS_EVERY_FILES", 200))
+    PARTIAL_RESULTS_INTERVAL_SECONDS = float(os.getenv("PARTIAL_RESULTS_INTERVAL_SECONDS", 300))
+
+    # Per-task performance report uploaded next to the results, listing the
+    # REPORT_SLOWEST_FILES slowest files
+    TASK_REPORT_ENABLED = os.getenv("TASK_REPORT_ENABLED", "true").lower() == "true"
+    REPORT_SLOWEST_FILES = int(os.getenv("REPORT_SLOWEST_FILES", 10))
+
+    # Shard mode: tasks with at least SHARD_MIN_FILES unique files are split into
+    # chunks of SHARD_SIZE files that any replica can process
+    SHARD_MODE = os.getenv("SHARD_MODE", "false").lower() == "true"
+    SHARD_MIN_FILES = int(os.getenv("SHARD_MIN_FILES", 500))
+    SHARD_SIZE = int(os.getenv("SHARD_SIZE", 100))
+
     # Unoserver for .doc conversion
     UNOSERVER_HOST = os.getenv("UNOSERVER_HOST", "unoserver")
     UNOSERVER_PORT = os.getenv("UNOSERVER_PORT", "2003")
@@ -77,6 +193,9 @@ class QueueNames:
     # Input queue for this consolidated service
     RESUME_EXTRACTOR = "resume_extractor_queue"
 
+    # File chunks of sharded tasks, consumed by every replica in shard mode
+    RESUME_EXTRACTOR_SHARDS = "resume_extractor_shard_queue"
+
     # Legacy queues (kept for backward compatibility if needed)
     EXTRACT_ARCHIVE = "extract_archive_queue"
     CONVERSION_DIRECTOR = "conversion_director_queue"
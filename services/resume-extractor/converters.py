@@ -3,37 +3,57 @@ File converters for extracting text from different file formats.
 Consolidates: pdf-to-txt, word-to-txt, img-to-txt, rtf-to-txt, txt-passthrough
 
 Uses multi-library fallback chains for maximum reliability:
-- PDF: pymupdf (fitz) → pdfplumber → PyPDF2
+- PDF: scanned → OCR; otherwise pymupdf (fitz) → pdfplumber → PyPDF2
 - DOCX: python-docx → mammoth → XML extraction → docx2txt
 - DOC: LibreOffice → antiword
+- RTF: single-pass extractor → striprtf
+
+Files are routed by content signature first and by extension second.
 """
 
 import asyncio
 import logging
+import math
 import os
+import re
 import shutil
 import subprocess
+import time
 import uuid
 import zipfile
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from xml.etree import ElementTree as ET
 
-import cv2
-import numpy as np
-import pytesseract
 from striprtf.striprtf import rtf_to_text
 
+import decoding
+import ocr
+import rtf
 from config import ServiceConfig, SupportedExtensions
+from metrics import CONVERSION_SECONDS
+from scheduling import FileJob, get_cost_model, lpt_interleaved
+from strategy_stats import (
+    StrategyTimeout,
+    check_deadline,
+    feature_key,
+    get_strategy_stats,
+    page_bucket,
+    producer_family,
+    size_bucket,
+)
+from workers import (
+    ConversionTimeout,
+    FileDeadline,
+    file_deadline,
+    note_ocr_pages,
+    note_strategy,
+    run_blocking,
+)
 
 logger = logging.getLogger("resume-extractor.converters")
 
-# Configure tesseract path
-pytesseract.pytesseract.tesseract_cmd = "/usr/bin/tesseract"
-
-# Thread pool for CPU-bound operations
-_thread_pool = ThreadPoolExecutor(max_workers=ServiceConfig.FILE_PROCESSING_CONCURRENCY)
-
 
 class TextConverter:
     """Base class for text converters."""
@@ -44,55 +64,256 @@ class TextConverter:
         raise NotImplementedError
 
 
+def _run_strategy(
+    fn: Callable[..., str], file_path: str, budget_seconds: float, pass_deadline: bool
+) -> Tuple[str, float, Optional[str]]:
+    """
+    Run one fallback chain strategy (blocking operation).
+
+    Page-by-page strategies get a monotonic deadline `budget_seconds` away so
+    they can stop on their own. Returns (text, seconds, error).
+    """
+    start = time.monotonic()
+    try:
+        text = fn(file_path, start + budget_seconds) if pass_deadline else fn(file_path)
+    except Exception as e:
+        return "", time.monotonic() - start, f"{type(e).__name__}: {e}"
+    return text, time.monotonic() - start, None
+
+
+async def run_fallback_chain(
+    chain: str,
+    file_path: str,
+    features: str,
+    strategies: Dict[str, Callable[..., str]],
+    budget_seconds: float,
+    min_chars: int = 1,
+    pass_deadline: bool = False,
+) -> Tuple[str, Optional[str]]:
+    """
+    Run a fallback chain of extraction strategies.
+
+    Strategies are tried in the order learned from past attempts on files with
+    the same features. Each runs as its own converter job limited to
+    `budget_seconds`: a worker still busy at the end of the budget is killed
+    and the next strategy starts. Strategies must be module-level functions or
+    staticmethods; with pass_deadline they are called as fn(path, deadline).
+    Every attempt is recorded in the strategy stats.
+
+    Returns tuple of (text, winning_strategy), or ("", None) if all failed.
+    """
+    stats = get_strategy_stats()
+    name = os.path.basename(file_path)
+    last_error = None
+
+    for strategy in stats.order(chain, features, list(strategies)):
+        start = time.monotonic()
+        text, success = "", False
+        try:
+            text, seconds, error = await run_blocking(
+                _run_strategy,
+                strategies[strategy],
+                file_path,
+                budget_seconds,
+                pass_deadline,
+                budget=budget_seconds,
+            )
+            if error:
+                last_error = error
+            elif text and len(text.strip()) >= min_chars:
+                success = True
+            else:
+                logger.debug(
+                    f"{strategy} extracted minimal text ({len(text or '')} chars) for {file_path}, trying next method"
+                )
+        except StrategyTimeout as e:
+            last_error, seconds = e, budget_seconds
+            logger.warning(f"{strategy} timed out after {budget_seconds:.0f}s on {name}")
+        except ConversionTimeout:
+            # The file's own deadline has passed; no strategy gets to run
+            raise
+        except Exception as e:
+            last_error, seconds = e, time.monotonic() - start
+        if stats.record(chain, features, strategy, success, seconds):
+            await asyncio.get_running_loop().run_in_executor(None, stats.save)
+
+        if success:
+            logger.info(
+                f"{chain.upper()} extraction success: {name} using {strategy} ({len(text)} chars)"
+            )
+            note_strategy(strategy)
+            return text, strategy
+
+    logger.error(
+        f"All {chain.upper()} extraction methods failed for {file_path}. Last error: {last_error}"
+    )
+    return "", None
+
+
+@dataclass
+class PDFProfile:
+    """Cheap per-document signals used to route a PDF before extraction."""
+
+    page_count: int
+    sampled_pages: int
+    text_pages: int
+    image_coverage: float
+    font_count: int
+    producer: Optional[str] = None
+
+    @property
+    def is_scanned(self) -> bool:
+        """
+        A document is treated as scanned when no sampled page has a usable text
+        layer and the pages are either image-dominated or carry no fonts at all.
+        """
+        if self.sampled_pages == 0 or self.text_pages > 0:
+            return False
+        return (
+            self.font_count == 0 or self.image_coverage >= ServiceConfig.PDF_SCANNED_IMAGE_COVERAGE
+        )
+
+
 class PDFConverter(TextConverter):
     """
     Convert PDF files to text using multi-library fallback chain.
 
-    Priority order:
-    1. pymupdf (fitz) - Fastest, has OCR support for scanned PDFs
+    Scanned documents are detected up front and sent straight to OCR.
+    Everything else goes through the text chain:
+    1. pymupdf (fitz) - Fastest, OCRs individual pages with no text layer
     2. pdfplumber - Best for tables and complex layouts
     3. PyPDF2 - Fallback for edge cases
     """
 
     @staticmethod
-    def _extract_with_pymupdf(file_path: str) -> Tuple[str, str]:
+    def _ocr_dpi(page) -> int:
+        """Pick a render DPI so the page's long side lands near the OCR target size."""
+        long_side_inches = max(page.rect.width, page.rect.height) / 72
+        if long_side_inches <= 0:
+            return ServiceConfig.OCR_MAX_DPI
+
+        dpi = ServiceConfig.OCR_TARGET_PAGE_PIXELS / long_side_inches
+        return int(min(max(dpi, ServiceConfig.OCR_MIN_DPI), ServiceConfig.OCR_MAX_DPI))
+
+    @staticmethod
+    def _sample_page_numbers(page_count: int, sample_size: int) -> list[int]:
+        """Spread up to sample_size page numbers evenly across the document."""
+        if page_count <= sample_size:
+            return list(range(page_count))
+        step = page_count / sample_size
+        return sorted({int(i * step) for i in range(sample_size)})
+
+    @staticmethod
+    def _budget_page_numbers(page_count: int) -> list[int]:
+        """
+        Pages worth extracting from a resume: the first PDF_HEAD_PAGES plus the
+        last PDF_TAIL_PAGES. Bounds time and memory on 200-page portfolios and
+        scanned binders while keeping a closing page (references, signature).
+        """
+        head, tail = ServiceConfig.PDF_HEAD_PAGES, ServiceConfig.PDF_TAIL_PAGES
+        if head <= 0 or page_count <= head + tail:
+            return list(range(page_count))
+        return list(range(head)) + list(range(page_count - tail, page_count))
+
+    @staticmethod
+    def _log_page_budget(file_path: str, page_count: int):
+        extracted = len(PDFConverter._budget_page_numbers(page_count))
+        if extracted < page_count:
+            logger.info(
+                f"{os.path.basename(file_path)} has {page_count} pages, extracting "
+                f"{extracted} (first {ServiceConfig.PDF_HEAD_PAGES}, "
+                f"last {ServiceConfig.PDF_TAIL_PAGES})"
+            )
+
+    @staticmethod
+    def _classify(doc) -> PDFProfile:
+        """
+        Classify an open pymupdf document from a handful of sampled pages.
+        Only reads the text layer, font resources and image placements - nothing is rendered.
+        """
+        page_numbers = PDFConverter._sample_page_numbers(
+            len(doc), ServiceConfig.PDF_CLASSIFY_SAMPLE_PAGES
+        )
+
+        text_pages = 0
+        coverage_total = 0.0
+        fonts = set()
+
+        for page_num in page_numbers:
+            page = doc[page_num]
+
+            if len(page.get_text("text").strip()) >= ServiceConfig.PDF_MIN_PAGE_CHARS:
+                text_pages += 1
+
+            fonts.update(font[0] for font in page.get_fonts())
+
+            page_area = abs(page.rect)
+            if page_area > 0:
+                image_area = 0.0
+                for info in page.get_image_info():
+                    bbox = page.rect & info["bbox"]
+                    if not bbox.is_empty:
+                        image_area += abs(bbox)
+                coverage_total += min(image_area / page_area, 1.0)
+
+        sampled = len(page_numbers)
+        return PDFProfile(
+            page_count=len(doc),
+            sampled_pages=sampled,
+            text_pages=text_pages,
+            image_coverage=coverage_total / sampled if sampled else 0.0,
+            font_count=len(fonts),
+            producer=(doc.metadata or {}).get("producer"),
+        )
+
+    @staticmethod
+    def _ocr_page(page) -> str:
+        """Render a page to grayscale at an adaptive DPI and OCR it through the shared pipeline."""
+        import fitz  # pymupdf
+
+        pix = page.get_pixmap(dpi=PDFConverter._ocr_dpi(page), colorspace=fitz.csGRAY, alpha=False)
+        return ocr.ocr_pixmap(pix)
+
+    @staticmethod
+    def _extract_with_pymupdf(file_path: str, deadline: Optional[float] = None) -> str:
         """
         Extract text using PyMuPDF (fastest, best for general use).
-        Returns tuple of (extracted_text, method_used).
+        Stops between pages once the monotonic deadline passes.
         """
         try:
             import fitz  # pymupdf
 
             text_content = []
-            doc = fitz.open(file_path)
 
-            for page_num in range(len(doc)):
-                page = doc[page_num]
+            with fitz.open(file_path) as doc:
+                for page_num in PDFConverter._budget_page_numbers(len(doc)):
+                    check_deadline(deadline, "pymupdf")
+                    page = doc[page_num]
 
-                # Try standard text extraction first
-                text = page.get_text("text")
+                    # Try standard text extraction first
+                    text = page.get_text("text")
 
-                # If page has minimal text, might be scanned - try OCR
-                if len(text.strip()) < 50:
-                    logger.debug(
-                        f"Page {page_num} has minimal text ({len(text.strip())} chars), attempting OCR"
-                    )
-                    try:
-                        # Get OCR text using pymupdf's built-in OCR
-                        tp = page.get_textpage_ocr(language="eng", dpi=300)
-                        text = page.get_text(textpage=tp)
-                    except Exception as ocr_error:
-                        logger.debug(f"OCR failed on page {page_num}: {ocr_error}")
+                    # If page has minimal text, might be a scanned page in a mixed document - try OCR
+                    if len(text.strip()) < ServiceConfig.PDF_MIN_PAGE_CHARS:
+                        logger.debug(
+                            f"Page {page_num} has minimal text ({len(text.strip())} chars), attempting OCR"
+                        )
+                        try:
+                            text = PDFConverter._ocr_page(page)
+                        except Exception as ocr_error:
+                            logger.debug(f"OCR failed on page {page_num}: {ocr_error}")
 
-                if text:
-                    text_content.append(text)
+                    if text:
+                        text_content.append(text)
 
-            doc.close()
+            # Drop MuPDF's cached fonts/images for this document instead of letting
+            # the store grow to its cap inside a long-lived worker
+            fitz.TOOLS.store_shrink(100)
 
             final_text = "\n".join(text_content).strip()
 
             if final_text:
-                return final_text, "pymupdf"
+                return final_text
             else:
                 raise ValueError("No text extracted with pymupdf")
 
@@ -101,10 +322,70 @@ class PDFConverter(TextConverter):
             raise
 
     @staticmethod
-    def _extract_with_pdfplumber(file_path: str) -> Tuple[str, str]:
+    def _has_ruling_lines(page) -> bool:
+        """
+        Cheap table pre-check from the page's vector edges.
+
+        pdfplumber's default table strategy builds cells from ruling lines, so a
+        page without at least two horizontal and two vertical edges cannot yield
+        a table and the expensive find_tables pass is skipped.
+        """
+        horizontal = vertical = 0
+        for edge in page.edges:
+            if edge["orientation"] == "h" and edge["width"] >= 10:
+                horizontal += 1
+            elif edge["orientation"] == "v" and edge["height"] >= 5:
+                vertical += 1
+            if horizontal >= 2 and vertical >= 2:
+                return True
+        return False
+
+    @staticmethod
+    def _format_table(rows: list) -> str:
+        """Render extracted table rows as pipe-separated lines."""
+        return "\n".join(
+            " | ".join(filter(None, [str(cell) if cell else "" for cell in row]))
+            for row in rows
+            if row
+        )
+
+    @staticmethod
+    def _page_text_with_tables(page, tables: list) -> str:
+        """
+        Merge table output with the surrounding text in reading order.
+
+        Characters inside a table's bounding box are dropped from the text
+        stream (the table already carries them), and each table is placed at
+        its vertical position among the remaining text lines.
+        """
+        bboxes = [table.bbox for table in tables]
+
+        def outside_tables(obj) -> bool:
+            if obj.get("object_type") != "char":
+                return True
+            cx = (obj["x0"] + obj["x1"]) / 2
+            cy = (obj["top"] + obj["bottom"]) / 2
+            return not any(x0 <= cx <= x1 and top <= cy <= bottom for x0, top, x1, bottom in bboxes)
+
+        segments = [
+            (line["top"], line["text"])
+            for line in page.filter(outside_tables).extract_text_lines(x_tolerance=3, y_tolerance=3)
+            if line["text"].strip()
+        ]
+        for table in tables:
+            table_text = PDFConverter._format_table(table.extract())
+            if table_text.strip():
+                segments.append((table.bbox[1], table_text))
+
+        segments.sort(key=lambda segment: segment[0])
+        return "\n".join(text for _, text in segments)
+
+    @staticmethod
+    def _extract_with_pdfplumber(file_path: str, deadline: Optional[float] = None) -> str:
         """
         Extract text using pdfplumber (best for tables and structured layouts).
-        Returns tuple of (extracted_text, method_used).
+        Table extraction only runs on pages that have ruling lines.
+        Stops between pages once the monotonic deadline passes.
         """
         try:
             import pdfplumber
@@ -112,26 +393,22 @@ class PDFConverter(TextConverter):
             text_content = []
 
             with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    # Try table extraction first (resumes often have skill tables)
-                    tables = page.extract_tables()
-
-                    if tables:
-                        for table in tables:
-                            table_text = "\n".join(
-                                [
-                                    " | ".join(
-                                        filter(None, [str(cell) if cell else "" for cell in row])
-                                    )
-                                    for row in table
-                                    if row
-                                ]
-                            )
-                            if table_text.strip():
-                                text_content.append(table_text)
-
-                    # Extract regular text with layout preservation
-                    text = page.extract_text(x_tolerance=3, y_tolerance=3, layout=True)
+                for page_num in PDFConverter._budget_page_numbers(len(pdf.pages)):
+                    check_deadline(deadline, "pdfplumber")
+                    page = pdf.pages[page_num]
+
+                    try:
+                        # Resumes often have skill tables, but most pages have none
+                        tables = page.find_tables() if PDFConverter._has_ruling_lines(page) else []
+
+                        if tables:
+                            text = PDFConverter._page_text_with_tables(page, tables)
+                        else:
+                            # Extract regular text with layout preservation
+                            text = page.extract_text(x_tolerance=3, y_tolerance=3, layout=True)
+                    finally:
+                        # Release the page's cached chars/edges/layout before the next page
+                        page.close()
 
                     if text:
                         text_content.append(text)
@@ -139,7 +416,7 @@ class PDFConverter(TextConverter):
             final_text = "\n\n".join(text_content).strip()
 
             if final_text:
-                return final_text, "pdfplumber"
+                return final_text
             else:
                 raise ValueError("No text extracted with pdfplumber")
 
@@ -148,10 +425,10 @@ class PDFConverter(TextConverter):
             raise
 
     @staticmethod
-    def _extract_with_pypdf2(file_path: str) -> Tuple[str, str]:
+    def _extract_with_pypdf2(file_path: str, deadline: Optional[float] = None) -> str:
         """
         Extract text using PyPDF2 (fallback for edge cases).
-        Returns tuple of (extracted_text, method_used).
+        Stops between pages once the monotonic deadline passes.
         """
         try:
             import PyPDF2
@@ -161,15 +438,16 @@ class PDFConverter(TextConverter):
             with open(file_path, "rb") as file:
                 reader = PyPDF2.PdfReader(file)
 
-                for page in reader.pages:
-                    page_text = page.extract_text()
+                for page_num in PDFConverter._budget_page_numbers(len(reader.pages)):
+                    check_deadline(deadline, "pypdf2")
+                    page_text = reader.pages[page_num].extract_text()
                     if page_text:
                         text_content.append(page_text)
 
             final_text = "\n".join(text_content).strip()
 
             if final_text:
-                return final_text, "pypdf2"
+                return final_text
             else:
                 raise ValueError("No text extracted with PyPDF2")
 
@@ -178,45 +456,109 @@ class PDFConverter(TextConverter):
             raise
 
     @staticmethod
-    def _extract_text(file_path: str) -> str:
-        """Extract text from PDF using fallback chain (blocking operation)."""
-        methods = [
-            ("pymupdf", PDFConverter._extract_with_pymupdf),
-            ("pdfplumber", PDFConverter._extract_with_pdfplumber),
-            ("pypdf2", PDFConverter._extract_with_pypdf2),
-        ]
+    def _profile(file_path: str) -> Optional[PDFProfile]:
+        """Classify a PDF, returning None if pymupdf cannot open it."""
+        try:
+            import fitz  # pymupdf
 
-        last_error = None
+            with fitz.open(file_path) as doc:
+                return PDFConverter._classify(doc)
+        except Exception as e:
+            logger.debug(f"PDF classification failed for {file_path}: {e}")
+            return None
 
-        for method_name, method_func in methods:
-            try:
-                text, actual_method = method_func(file_path)
+    @staticmethod
+    def _features(file_path: str, profile: Optional[PDFProfile]) -> str:
+        """Feature key for strategy stats: producer family, page count bucket, size bucket."""
+        size = os.path.getsize(file_path)
+        if profile is None:
+            return feature_key("unknown", "unknown", size_bucket(size))
+        return feature_key(
+            producer_family(profile.producer), page_bucket(profile.page_count), size_bucket(size)
+        )
 
-                # Validate extracted text quality - if too short, try next method
-                if len(text.strip()) < 20:
-                    logger.debug(
-                        f"{method_name} extracted minimal text ({len(text)} chars) for {file_path}, trying next method"
-                    )
-                    continue
+    @staticmethod
+    async def _extract_with_fallbacks(file_path: str, profile: Optional[PDFProfile] = None) -> str:
+        """Extract text from a text-layer PDF using the fallback chain."""
+        strategies = {
+            "pymupdf": PDFConverter._extract_with_pymupdf,
+            "pdfplumber": PDFConverter._extract_with_pdfplumber,
+            "pypdf2": PDFConverter._extract_with_pypdf2,
+        }
+
+        text, _ = await run_fallback_chain(
+            "pdf",
+            file_path,
+            PDFConverter._features(file_path, profile),
+            strategies,
+            budget_seconds=ServiceConfig.PDF_STRATEGY_BUDGET_SECONDS,
+            # Text shorter than this is treated as a failed extraction
+            min_chars=20,
+            pass_deadline=True,
+        )
+        return text
 
-                logger.info(
-                    f"PDF extraction success: {os.path.basename(file_path)} using {actual_method} ({len(text)} chars)"
-                )
-                return text
+    @staticmethod
+    def _log_scanned(file_path: str, profile: PDFProfile):
+        """Log why a PDF was routed to OCR."""
+        logger.debug(
+            f"{os.path.basename(file_path)} classified as scanned "
+            f"({profile.page_count} pages, {profile.image_coverage:.0%} image coverage, "
+            f"{profile.font_count} fonts), routing to OCR"
+        )
 
-            except Exception as e:
-                last_error = e
-                continue
+    @staticmethod
+    def _ocr_page_number(file_path: str, page_num: int) -> str:
+        """OCR one page of a PDF in isolation so pages can run on separate workers."""
+        import fitz  # pymupdf
 
-        # All methods failed
-        logger.error(f"All PDF extraction methods failed for {file_path}. Last error: {last_error}")
-        return ""
+        with fitz.open(file_path) as doc:
+            return PDFConverter._ocr_page(doc[page_num])
 
     @staticmethod
-    async def convert(file_path: str) -> str:
-        """Convert PDF to text asynchronously."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(_thread_pool, PDFConverter._extract_text, file_path)
+    async def _ocr_pages_parallel(file_path: str, page_count: int) -> str:
+        """
+        OCR a scanned PDF with one job per page on the converter pool.
+        Pages are reassembled in order, and at most PDF_OCR_PAGE_CONCURRENCY
+        pages of a single document run at once so a large scan cannot take over the pool.
+        """
+        semaphore = asyncio.Semaphore(ServiceConfig.PDF_OCR_PAGE_CONCURRENCY)
+
+        async def ocr_page(page_num: int) -> str:
+            async with semaphore:
+                try:
+                    return await run_blocking(PDFConverter._ocr_page_number, file_path, page_num)
+                except Exception as ocr_error:
+                    logger.debug(f"OCR failed on page {page_num} of {file_path}: {ocr_error}")
+                    return ""
+
+        page_numbers = PDFConverter._budget_page_numbers(page_count)
+        note_ocr_pages(len(page_numbers))
+        pages = await asyncio.gather(*(ocr_page(n) for n in page_numbers))
+        result = "\n".join(text for text in pages if text.strip()).strip()
+
+        if result:
+            logger.info(
+                f"PDF extraction success: {os.path.basename(file_path)} using ocr "
+                f"({len(page_numbers)} pages, {len(result)} chars)"
+            )
+        else:
+            logger.error(f"OCR extraction failed for scanned PDF {file_path}")
+        return result
+
+    @staticmethod
+    async def convert(file_path: str, profile: Optional[PDFProfile] = None) -> str:
+        """Convert PDF to text asynchronously, reusing a profile from the scheduler's probe if given."""
+        if profile is None:
+            profile = await run_blocking(PDFConverter._profile, file_path)
+        if profile:
+            PDFConverter._log_page_budget(file_path, profile.page_count)
+
+        if profile and profile.is_scanned:
+            PDFConverter._log_scanned(file_path, profile)
+            return await PDFConverter._ocr_pages_parallel(file_path, profile.page_count)
+
+        return await PDFConverter._extract_with_fallbacks(file_path, profile)
 
 
 class WordConverter(TextConverter):
@@ -336,30 +678,40 @@ class WordConverter(TextConverter):
             raise
 
     @staticmethod
-    def _extract_from_docx(file_path: str) -> str:
+    def _docx_features(file_path: str) -> str:
+        """Feature key for strategy stats: authoring application family and size bucket."""
+        application = None
+        try:
+            with zipfile.ZipFile(file_path) as z:
+                app_xml = z.read("docProps/app.xml")
+            node = ET.fromstring(app_xml).find(
+                "{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}Application"
+            )
+            application = node.text if node is not None else None
+        except Exception:
+            pass
+        return feature_key(producer_family(application), size_bucket(os.path.getsize(file_path)))
+
+    @staticmethod
+    async def _extract_from_docx(file_path: str) -> str:
         """
-        Extract text from .docx with intelligent fallback chain (blocking operation).
+        Extract text from .docx with intelligent fallback chain.
         """
-        strategies = [
-            ("python-docx", WordConverter._extract_with_python_docx),
-            ("mammoth", WordConverter._extract_with_mammoth),
-            ("xml-extraction", WordConverter._extract_from_corrupted_docx),
-            ("docx2txt", WordConverter._extract_with_docx2txt),
-        ]
-
-        for strategy_name, strategy_func in strategies:
-            try:
-                text = strategy_func(file_path)
-                if text and len(text.strip()) > 0:
-                    logger.info(
-                        f"DOCX extraction success: {os.path.basename(file_path)} using {strategy_name} ({len(text)} chars)"
-                    )
-                    return text
-            except Exception:
-                continue
-
-        logger.error(f"All DOCX extraction strategies failed for {file_path}")
-        return ""
+        strategies = {
+            "python-docx": WordConverter._extract_with_python_docx,
+            "mammoth": WordConverter._extract_with_mammoth,
+            "xml-extraction": WordConverter._extract_from_corrupted_docx,
+            "docx2txt": WordConverter._extract_with_docx2txt,
+        }
+
+        text, _ = await run_fallback_chain(
+            "docx",
+            file_path,
+            await run_blocking(WordConverter._docx_features, file_path),
+            strategies,
+            budget_seconds=ServiceConfig.DOCX_STRATEGY_BUDGET_SECONDS,
+        )
+        return text
 
     @staticmethod
     async def _convert_doc_to_docx(doc_path: str) -> Optional[str]:
@@ -367,7 +719,10 @@ class WordConverter(TextConverter):
         Convert .doc to .docx using LibreOffice with best practices.
         Includes timeout and proper isolation for parallel processing.
         """
-        output_dir = os.path.dirname(doc_path)
+        # Private output dir: a mislabeled "x.docx" holding a .doc would otherwise
+        # be overwritten by its own conversion output
+        output_dir = os.path.join(os.path.dirname(doc_path), f".lo-{uuid.uuid4().hex}")
+        os.makedirs(output_dir, exist_ok=True)
         base_name = os.path.splitext(os.path.basename(doc_path))[0]
         docx_path = os.path.join(output_dir, base_name + ".docx")
         user_profile = f"/tmp/lo_profile_{uuid.uuid4().hex}"
@@ -399,10 +754,17 @@ class WordConverter(TextConverter):
                     process.communicate(),
                     timeout=30.0,  # 30 second timeout
                 )
+            except asyncio.CancelledError:
+                process.kill()
+                shutil.rmtree(user_profile, ignore_errors=True)
+                shutil.rmtree(output_dir, ignore_errors=True)
+                raise
             except asyncio.TimeoutError:
                 process.kill()
                 await process.wait()
                 logger.error(f"LibreOffice conversion timeout for {doc_path}")
+                shutil.rmtree(user_profile, ignore_errors=True)
+                shutil.rmtree(output_dir, ignore_errors=True)
                 return None
 
             # Clean up profile immediately
@@ -415,11 +777,13 @@ class WordConverter(TextConverter):
                 logger.warning(
                     f"LibreOffice conversion failed (rc={process.returncode}): {stderr.decode()}"
                 )
+                shutil.rmtree(output_dir, ignore_errors=True)
                 return None
 
         except Exception as e:
             logger.error(f"Error converting .doc to .docx: {e}")
             shutil.rmtree(user_profile, ignore_errors=True)
+            shutil.rmtree(output_dir, ignore_errors=True)
             return None
 
     @staticmethod
@@ -450,33 +814,34 @@ class WordConverter(TextConverter):
             raise
 
     @staticmethod
-    async def convert(file_path: str) -> str:
-        """Convert Word document to text."""
-        loop = asyncio.get_event_loop()
+    async def convert(file_path: str, word_format: Optional[str] = None) -> str:
+        """
+        Convert Word document to text.
+
+        Args:
+            file_path: Path to the document.
+            word_format: "doc" or "docx" as sniffed from the content; defaults to
+                         the file extension.
+        """
+        if word_format is None:
+            word_format = os.path.splitext(file_path)[1].lower().lstrip(".")
 
         # Handle .doc files (legacy binary format)
-        if file_path.lower().endswith(".doc"):
+        if word_format == "doc":
             async with WordConverter._conversion_semaphore:
                 # Try LibreOffice conversion first
                 docx_path = await WordConverter._convert_doc_to_docx(file_path)
                 if docx_path and os.path.exists(docx_path):
                     try:
-                        text = await loop.run_in_executor(
-                            _thread_pool, WordConverter._extract_from_docx, docx_path
-                        )
+                        text = await WordConverter._extract_from_docx(docx_path)
                         return text
                     finally:
-                        # Clean up converted file
-                        try:
-                            os.remove(docx_path)
-                        except:
-                            pass
+                        # Clean up converted file and its private output dir
+                        shutil.rmtree(os.path.dirname(docx_path), ignore_errors=True)
 
                 # Fallback to antiword if LibreOffice failed
                 try:
-                    text = await loop.run_in_executor(
-                        _thread_pool, WordConverter._extract_doc_with_antiword, file_path
-                    )
+                    text = await run_blocking(WordConverter._extract_doc_with_antiword, file_path)
                     if text:
                         return text
                 except Exception as e:
@@ -486,87 +851,22 @@ class WordConverter(TextConverter):
                 return ""
         else:
             # Handle .docx files
-            return await loop.run_in_executor(
-                _thread_pool, WordConverter._extract_from_docx, file_path
-            )
+            return await WordConverter._extract_from_docx(file_path)
 
 
 class ImageConverter(TextConverter):
-    """Convert images to text using OCR (pytesseract + OpenCV)."""
-
-    @staticmethod
-    def _deskew_image(image: np.ndarray) -> np.ndarray:
-        """Deskew an image using Hough Transform to correct text alignment."""
-        try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            gray = cv2.bitwise_not(gray)
-            coords = np.column_stack(np.where(gray > 0))
-
-            if len(coords) == 0:
-                return image
-
-            angle = cv2.minAreaRect(coords)[-1]
-            angle = -(90 + angle) if angle < -45 else -angle
-
-            (h, w) = image.shape[:2]
-            center = (w // 2, h // 2)
-            M = cv2.getRotationMatrix2D(center, angle, 1.0)
-            rotated = cv2.warpAffine(
-                image, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE
-            )
-            return rotated
-        except Exception as e:
-            logger.warning(f"Deskew failed: {e}, returning original image")
-            return image
-
-    @staticmethod
-    def _preprocess_image(image: np.ndarray) -> np.ndarray:
-        """Preprocess the image to enhance it for OCR."""
-        try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-            # Resize the image for better OCR results
-            scale_percent = 150
-            width = int(gray.shape[1] * scale_percent / 100)
-            height = int(gray.shape[0] * scale_percent / 100)
-            resized = cv2.resize(gray, (width, height), interpolation=cv2.INTER_LINEAR)
-
-            # Apply Gaussian blur to reduce noise
-            blurred = cv2.GaussianBlur(resized, (5, 5), 0)
-
-            # Adaptive thresholding for binarization
-            thresholded = cv2.adaptiveThreshold(
-                blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-            )
-
-            # Morphological operations to clean up noise
-            kernel = np.ones((2, 2), np.uint8)
-            processed = cv2.morphologyEx(thresholded, cv2.MORPH_OPEN, kernel)
-
-            return processed
-        except Exception as e:
-            logger.warning(f"Image preprocessing failed: {e}")
-            return image
+    """Convert images to text using OCR (tesseract + OpenCV)."""
 
     @staticmethod
     def _extract_text(file_path: str) -> str:
         """Extract text from image using OCR (blocking operation)."""
         try:
-            image = cv2.imread(file_path)
-            if image is None:
+            gray = ocr.decode_image_file(file_path)
+            if gray is None:
                 logger.error(f"Failed to load image: {file_path}")
                 return ""
 
-            # Deskew and preprocess
-            deskewed = ImageConverter._deskew_image(image)
-            processed = ImageConverter._preprocess_image(deskewed)
-
-            # OCR with optimized config
-            custom_config = r"--psm 6 --oem 3"
-            extracted_text = pytesseract.image_to_string(processed, config=custom_config)
-
-            result = extracted_text.strip()
+            result = ocr.ocr_image(gray).strip()
             if result:
                 logger.info(
                     f"Image OCR success: {os.path.basename(file_path)} ({len(result)} chars)"
@@ -579,51 +879,53 @@ class ImageConverter(TextConverter):
     @staticmethod
     async def convert(file_path: str) -> str:
         """Convert image to text using OCR asynchronously."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(_thread_pool, ImageConverter._extract_text, file_path)
+        note_ocr_pages(1)
+        return await run_blocking(ImageConverter._extract_text, file_path)
 
 
 class RTFConverter(TextConverter):
-    """Convert RTF files to text using striprtf."""
+    """
+    Convert RTF files to text.
+
+    The single-pass extractor in rtf.py runs first; striprtf is the fallback
+    when it fails or finds no text.
+    """
 
     @staticmethod
     def _extract_text(file_path: str) -> str:
         """Extract text from RTF file (blocking operation)."""
         try:
-            # Try reading with different encodings
-            encodings = ["utf-8", "latin-1", "cp1252", "iso-8859-1"]
-            rtf_content = None
-
-            for encoding in encodings:
-                try:
-                    with open(file_path, "r", encoding=encoding) as rtf_file:
-                        rtf_content = rtf_file.read()
-                    break
-                except (UnicodeDecodeError, LookupError):
-                    continue
-
-            # If all encodings fail, use errors='ignore' as fallback
-            if rtf_content is None:
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as rtf_file:
-                    rtf_content = rtf_file.read()
-
-            # Use striprtf to extract text
-            text_content = rtf_to_text(rtf_content)
-            result = text_content.strip() if text_content else ""
-            if result:
-                logger.info(
-                    f"RTF extraction success: {os.path.basename(file_path)} ({len(result)} chars)"
-                )
-            return result
+            rtf_content, codepage = decoding.read_rtf(file_path)
         except Exception as e:
-            logger.error(f"Error extracting text from RTF {file_path}: {e}")
+            logger.error(f"Error reading RTF {file_path}: {e}")
             return ""
 
+        method = "rtf"
+        try:
+            result = rtf.rtf_to_text(rtf_content, encoding=codepage or "cp1252").strip()
+        except Exception as e:
+            logger.debug(f"Fast RTF extraction failed for {file_path}: {e}")
+            result = ""
+
+        if not result:
+            method = "striprtf"
+            try:
+                text_content = rtf_to_text(rtf_content, encoding=codepage or "cp1252")
+                result = text_content.strip() if text_content else ""
+            except Exception as e:
+                logger.error(f"Error extracting text from RTF {file_path}: {e}")
+                return ""
+
+        if result:
+            logger.info(
+                f"RTF extraction success: {os.path.basename(file_path)} using {method} ({len(result)} chars)"
+            )
+        return result
+
     @staticmethod
     async def convert(file_path: str) -> str:
         """Convert RTF to text asynchronously."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(_thread_pool, RTFConverter._extract_text, file_path)
+        return await run_blocking(RTFConverter._extract_text, file_path)
 
 
 class TextPassthrough(TextConverter):
@@ -631,34 +933,124 @@ class TextPassthrough(TextConverter):
 
     @staticmethod
     def _read_text(file_path: str) -> str:
-        """Read text file with encoding handling."""
-        encodings = ["utf-8", "utf-8-sig", "latin-1", "cp1252", "iso-8859-1"]
-
-        for encoding in encodings:
-            try:
-                with open(file_path, "r", encoding=encoding) as f:
-                    result = f.read().strip()
-                    if result:
-                        logger.info(
-                            f"Text read success: {os.path.basename(file_path)} ({len(result)} chars)"
-                        )
-                    return result
-            except (UnicodeDecodeError, LookupError):
-                continue
-
-        # Fallback: ignore errors
+        """Read text file, detecting its charset once (blocking operation)."""
         try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                return f.read().strip()
+            text, encoding = decoding.read_text(file_path)
         except Exception as e:
             logger.error(f"Failed to read text file {file_path}: {e}")
             return ""
 
+        result = text.strip()
+        if result:
+            logger.info(
+                f"Text read success: {os.path.basename(file_path)} ({len(result)} chars, {encoding})"
+            )
+        return result
+
     @staticmethod
     async def convert(file_path: str) -> str:
         """Read text file asynchronously."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(_thread_pool, TextPassthrough._read_text, file_path)
+        return await run_blocking(TextPassthrough._read_text, file_path)
+
+
+# Content formats recognized by sniff_format and the converter each routes to
+FORMAT_FILE_TYPES = {
+    "pdf": "pdf",
+    "doc": "word",
+    "docx": "word",
+    "rtf": "rtf",
+    "png": "image",
+    "jpeg": "image",
+    "webp": "image",
+}
+
+# Bytes read for sniffing; PDF readers accept a header anywhere in the first 1KB
+SNIFF_BYTES = 1024
+
+PDF_HEADER = re.compile(rb"(?:^|[\r\n])%PDF-\d")
+OLE2_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+ZIP_SIGNATURE = b"PK\x03\x04"
+
+
+def sniff_format(file_path: str) -> Optional[str]:
+    """
+    Identify a file's format from its leading bytes.
+
+    Returns one of the FORMAT_FILE_TYPES keys, or None when the content has no
+    recognized signature (plain text, or a ZIP that is not a Word document).
+    """
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+    except OSError as e:
+        logger.debug(f"Could not sniff {file_path}: {e}")
+        return None
+
+    if PDF_HEADER.search(head):
+        return "pdf"
+    if head.startswith(OLE2_SIGNATURE):
+        return "doc"
+    if head.startswith(ZIP_SIGNATURE):
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                if any(name.startswith("word/") for name in archive.namelist()):
+                    return "docx"
+        except (zipfile.BadZipFile, OSError):
+            pass
+        return None
+    if head.removeprefix(b"\xef\xbb\xbf").lstrip().startswith(b"{\\rtf"):
+        return "rtf"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+@dataclass
+class FileConversion:
+    """How one file was converted, for the task report."""
+
+    file_path: str
+    file_type: str
+    method: str
+    outcome: str
+    seconds: float
+    ocr_pages: int = 0
+
+
+@dataclass
+class ConversionStats:
+    """Per-batch routing counters and latencies, reported with the task result."""
+
+    files: int = 0
+    type_mismatches: int = 0
+    mismatch_kinds: Dict[str, int] = field(default_factory=dict)
+    timeouts: int = 0
+    timed_out_files: List[str] = field(default_factory=list)
+    durations: List[float] = field(default_factory=list)
+    conversions: List[FileConversion] = field(default_factory=list)
+
+    def record_mismatch(self, extension: str, content_format: str):
+        self.type_mismatches += 1
+        kind = f"{extension or '(none)'}->{content_format}"
+        self.mismatch_kinds[kind] = self.mismatch_kinds.get(kind, 0) + 1
+
+    def record_timeout(self, file_path: str):
+        self.timeouts += 1
+        self.timed_out_files.append(os.path.basename(file_path))
+
+    def latency_percentiles(self) -> Dict[str, float]:
+        """Nearest-rank p50/p95/p99 conversion latency in seconds."""
+        if not self.durations:
+            return {}
+        ordered = sorted(self.durations)
+        return {
+            f"p{p}": ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+            for p in (50, 95, 99)
+        }
 
 
 class FileConverter:
@@ -673,21 +1065,90 @@ class FileConverter:
     }
 
     @classmethod
-    async def convert_to_text(cls, file_path: str) -> str:
+    async def probe(cls, file_path: str, stats: Optional[ConversionStats] = None) -> FileJob:
+        """
+        Identify a file's type and estimate its conversion cost.
+
+        The type comes from the file's content signature when it has one,
+        falling back to the extension (e.g. for plain text), so a mislabeled
+        file goes straight to the right converter instead of through every
+        failing fallback of the wrong one. PDFs are also profiled (page count,
+        scanned or text layer); the profile is kept for the conversion.
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        extension_type = SupportedExtensions.get_file_type(extension)
+
+        loop = asyncio.get_event_loop()
+        content_format = await loop.run_in_executor(None, sniff_format, file_path)
+        file_type = FORMAT_FILE_TYPES.get(content_format, extension_type)
+
+        if stats is not None:
+            stats.files += 1
+        if content_format and not cls._extension_matches(extension, content_format):
+            logger.warning(
+                f"{os.path.basename(file_path)}: extension {extension or '(none)'} "
+                f"but content is {content_format}, converting as {content_format}"
+            )
+            if stats is not None:
+                stats.record_mismatch(extension, content_format)
+
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+
+        job = FileJob(file_path, file_type, content_format or extension.lstrip("."), size)
+        if file_type == "pdf":
+            with file_deadline(ServiceConfig.CONVERSION_TIMEOUT_SECONDS) as deadline:
+                try:
+                    job.profile = await run_blocking(PDFConverter._profile, file_path)
+                except ConversionTimeout:
+                    pass
+                except Exception as e:
+                    logger.debug(f"PDF probe failed for {file_path}: {e}")
+            job.timed_out = deadline.timed_out
+            if job.profile:
+                pages = len(PDFConverter._budget_page_numbers(job.profile.page_count))
+                job.page_count = pages or job.profile.page_count
+                job.scanned = job.profile.is_scanned
+
+        job.estimate = get_cost_model().estimate(job)
+        return job
+
+    @classmethod
+    async def convert_to_text(
+        cls,
+        file_path: str,
+        stats: Optional[ConversionStats] = None,
+        job: Optional[FileJob] = None,
+    ) -> str:
         """
         Convert any supported file to text.
 
         Args:
             file_path: Path to the file to convert.
+            stats: Optional counters updated with mismatches, timeouts and latencies.
+            job: The file's probe result, if the caller already probed it.
 
         Returns:
             Extracted text content.
         """
-        extension = os.path.splitext(file_path)[1].lower()
-        file_type = SupportedExtensions.get_file_type(extension)
+        if job is None:
+            job = await cls.probe(file_path, stats)
+        file_type = job.file_type
+
+        if job.timed_out:
+            logger.error(f"Probing {os.path.basename(file_path)} timed out, skipping conversion")
+            if stats is not None:
+                stats.record_timeout(file_path)
+                stats.conversions.append(
+                    FileConversion(file_path, file_type, "none", "timeout", 0.0)
+                )
+            CONVERSION_SECONDS.labels(file_type, "none", "timeout").observe(0.0)
+            return ""
 
         if file_type == "unknown":
-            logger.warning(f"Unsupported file type: {extension}")
+            logger.warning(f"Unsupported file type: {os.path.splitext(file_path)[1].lower()}")
             return ""
 
         converter = cls._converters.get(file_type)
@@ -695,41 +1156,133 @@ class FileConverter:
             logger.error(f"No converter found for file type: {file_type}")
             return ""
 
-        try:
-            text = await converter.convert(file_path)
-            return text
-        except Exception as e:
-            logger.error(f"Error converting file {file_path}: {e}")
+        start = time.monotonic()
+        text = ""
+        failed = False
+        with file_deadline(ServiceConfig.CONVERSION_TIMEOUT_SECONDS) as deadline:
+            try:
+                if converter is WordConverter:
+                    text = await WordConverter.convert(file_path, word_format=job.content_format)
+                elif converter is PDFConverter:
+                    text = await PDFConverter.convert(file_path, profile=job.profile)
+                else:
+                    text = await converter.convert(file_path)
+            except ConversionTimeout:
+                pass
+            except Exception as e:
+                failed = True
+                logger.error(f"Error converting file {file_path}: {e}")
+
+        seconds = time.monotonic() - start
+        if deadline.timed_out:
+            outcome = "timeout"
+        elif failed:
+            outcome = "error"
+        else:
+            outcome = "success" if text.strip() else "empty"
+        method = cls._method(job, deadline)
+        CONVERSION_SECONDS.labels(file_type, method, outcome).observe(seconds)
+
+        if stats is not None:
+            stats.durations.append(seconds)
+            stats.conversions.append(
+                FileConversion(file_path, file_type, method, outcome, seconds, deadline.ocr_pages)
+            )
+
+        # Converters may swallow the timeout inside their own fallbacks, so check the deadline
+        if deadline.timed_out:
+            logger.error(
+                f"Conversion of {os.path.basename(file_path)} timed out after "
+                f"{ServiceConfig.CONVERSION_TIMEOUT_SECONDS:.0f}s"
+            )
+            if stats is not None:
+                stats.record_timeout(file_path)
             return ""
 
+        if not failed:
+            # Time on a worker, not time spent queued for one, calibrates the estimates
+            elapsed = deadline.elapsed()
+            get_cost_model().observe(job, seconds if elapsed is None else elapsed)
+        return text
+
+    @staticmethod
+    def _method(job: FileJob, deadline: FileDeadline) -> str:
+        """Conversion method label: the winning chain strategy, or the type's only converter."""
+        if deadline.method:
+            return deadline.method
+        if job.scanned or job.file_type == "image":
+            return "ocr"
+        return job.file_type if job.file_type in ("rtf", "text") else "none"
+
+    @staticmethod
+    def _extension_matches(extension: str, content_format: str) -> bool:
+        """Whether the extension is an expected name for the sniffed format."""
+        if content_format == "jpeg":
+            return extension in (".jpg", ".jpeg")
+        return extension == f".{content_format}"
+
     @classmethod
-    async def convert_batch(cls, file_paths: list[str], concurrency: int = 50) -> dict[str, str]:
+    async def convert_batch(
+        cls,
+        file_paths: list[str],
+        concurrency: int = 50,
+        stats: Optional[ConversionStats] = None,
+        on_converted: Optional[Callable[[str, str], Awaitable[None]]] = None,
+    ) -> dict[str, str]:
         """
         Convert multiple files to text concurrently.
 
+        Every file is probed first and the batch is dispatched by estimated
+        cost, longest first with small files interleaved, so the long files do
+        not start last and hold up the whole batch.
+
         Args:
             file_paths: List of file paths to convert.
             concurrency: Maximum number of concurrent conversions.
+            stats: Optional counters shared by every conversion in the batch.
+            on_converted: Optional coroutine called with (path, text) as each file finishes.
 
         Returns:
             Dictionary mapping file paths to extracted text.
         """
         semaphore = asyncio.Semaphore(concurrency)
 
-        async def convert_with_semaphore(path: str) -> tuple[str, str]:
+        async def probe_with_semaphore(path: str) -> FileJob:
             async with semaphore:
-                text = await cls.convert_to_text(path)
-                return (path, text)
+                return await cls.probe(path, stats)
 
-        tasks = [convert_with_semaphore(path) for path in file_paths]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        probes = await asyncio.gather(
+            *(probe_with_semaphore(path) for path in file_paths), return_exceptions=True
+        )
 
-        output = {}
-        for result in results:
+        jobs = []
+        for result in probes:
             if isinstance(result, BaseException):
-                logger.error(f"Batch conversion error: {result}")
-            elif isinstance(result, tuple):
-                path, text = result
-                output[path] = text
+                logger.error(f"Batch probe error: {result}")
+            else:
+                jobs.append(result)
+
+        queue = deque(lpt_interleaved(jobs))
+        if jobs:
+            logger.debug(
+                f"Scheduled {len(jobs)} conversions, estimated {sum(j.estimate for j in jobs):.1f}s "
+                f"of work (largest {queue[0].estimate:.1f}s)"
+            )
+
+        output = {}
+
+        async def runner():
+            # Each runner takes the next file in dispatch order as soon as it is free
+            while queue:
+                job = queue.popleft()
+                try:
+                    text = await cls.convert_to_text(job.file_path, stats, job)
+                    output[job.file_path] = text
+                    if on_converted is not None:
+                        await on_converted(job.file_path, text)
+                except Exception as e:
+                    logger.error(f"Batch conversion error: {e}")
+
+        await asyncio.gather(*(runner() for _ in range(min(concurrency, len(jobs)))))
 
-        return output
+        return {path: output[path] for path in file_paths if path in output}
@@ -0,0 +1,172 @@
+"""
+Charset detection and single-pass decoding for text-based inputs (TXT, RTF).
+
+Files are memory-mapped once. The charset is picked from the BOM or a sample
+at the start of the file, and the mapping is decoded in fixed-size slices with
+an incremental decoder, so the raw bytes are never copied in full and the file
+is never re-read per guessed encoding. Only a UTF-8 guess that turns out wrong
+past the sample restarts the decode, with the single-byte fallback.
+"""
+
+import codecs
+import logging
+import mmap
+import re
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger("resume-extractor.decoding")
+
+# Bytes inspected for BOM/charset detection and RTF header parsing
+SAMPLE_BYTES = 64 * 1024
+
+# Slice size for incremental decoding of the mapped file
+CHUNK_BYTES = 1024 * 1024
+
+# Longest first, so UTF-32 LE is not mistaken for UTF-16 LE
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+# Bytes cp1252 leaves undefined; their presence means the text is not cp1252
+_CP1252_UNDEFINED = re.compile(rb"[\x81\x8d\x8f\x90\x9d]")
+
+_ANSICPG = re.compile(rb"\\ansicpg(\d+)")
+
+# RTF codepages that do not map to Python's "cpNNNN" codec names
+_RTF_CODEPAGES = {
+    437: "cp437",
+    10000: "mac_roman",
+    65001: "utf-8",
+}
+
+
+def detect_bom(sample: bytes) -> Tuple[Optional[str], int]:
+    """Return (encoding, BOM length) for a byte-order mark, or (None, 0)."""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    return None, 0
+
+
+def single_byte_fallback(sample: bytes) -> str:
+    """cp1252 (smart quotes, dashes) unless the sample uses bytes it leaves undefined."""
+    return "latin-1" if _CP1252_UNDEFINED.search(sample) else "cp1252"
+
+
+def detect_encoding(sample: bytes) -> Tuple[str, int]:
+    """
+    Pick an encoding for a file from its first bytes.
+
+    Returns (encoding, number of BOM bytes to skip). A sample that decodes as
+    UTF-8 (allowing a sequence cut off at the end) is UTF-8; anything else falls
+    back to a single-byte Windows/Latin codepage, which always decodes.
+    """
+    encoding, bom_length = detect_bom(sample)
+    if encoding:
+        return encoding, bom_length
+
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8", 0
+    except UnicodeDecodeError:
+        return single_byte_fallback(sample), 0
+
+
+def rtf_codepage(sample: bytes) -> Optional[str]:
+    """Python codec for an RTF header's \\ansicpgNNNN, if present and known."""
+    match = _ANSICPG.search(sample)
+    if not match:
+        return None
+
+    codepage = int(match.group(1))
+    encoding = _RTF_CODEPAGES.get(codepage, f"cp{codepage}")
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        logger.debug(f"Unknown RTF codepage {codepage}, ignoring")
+        return None
+    return encoding
+
+
+def _decode_view(view: memoryview, encoding: str, errors: str) -> str:
+    """Decode a buffer slice by slice with one incremental decoder."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    parts = []
+    for offset in range(0, len(view), CHUNK_BYTES):
+        parts.append(decoder.decode(view[offset : offset + CHUNK_BYTES]))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def _read_mapped(
+    file_path: str, choose_encoding: Callable[[bytes], Optional[str]]
+) -> Tuple[str, str]:
+    """
+    Decode a file in one pass over a memory map.
+
+    choose_encoding gets the sample and may name an encoding; when it returns
+    None the encoding is detected. A BOM always wins and is skipped.
+    """
+    with open(file_path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return "", "utf-8"
+
+    with mapped:
+        view = memoryview(mapped)
+        try:
+            sample = bytes(view[:SAMPLE_BYTES])
+            bom_encoding, bom_length = detect_bom(sample)
+            encoding = bom_encoding or choose_encoding(sample) or detect_encoding(sample)[0]
+
+            body = view[bom_length:]
+            try:
+                # A UTF-8 guess is only verified on the sample, so decode strictly
+                strict = encoding == "utf-8" and not bom_encoding
+                text = _decode_view(body, encoding, "strict" if strict else "replace")
+            except UnicodeDecodeError:
+                fallback = single_byte_fallback(sample)
+                logger.debug(f"{file_path} is not UTF-8 past the sample, decoding as {fallback}")
+                encoding = fallback
+                text = _decode_view(body, encoding, "replace")
+            finally:
+                body.release()
+        finally:
+            view.release()
+
+    return text, encoding
+
+
+def read_text(file_path: str, encoding: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Read and decode a text file, detecting the charset unless one is given.
+
+    Returns:
+        Tuple of (text, encoding used).
+    """
+    return _read_mapped(file_path, lambda sample: encoding)
+
+
+def read_rtf(file_path: str) -> Tuple[str, Optional[str]]:
+    """
+    Read an RTF file using the codepage from its \\ansicpg header.
+
+    Returns:
+        Tuple of (RTF source, header codepage or None). The codepage also
+        applies to \\'hh escapes, so it is passed on to the RTF parser.
+    """
+    codepage = None
+
+    def choose_encoding(sample: bytes) -> Optional[str]:
+        nonlocal codepage
+        codepage = rtf_codepage(sample)
+        return codepage
+
+    text, _ = _read_mapped(file_path, choose_encoding)
+    return text, codepage
@@ -1,16 +1,57 @@
 import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
 from google import genai
 from google.genai import types
 
 from config import ServiceConfig
+from fair_share import get_fair_scheduler
+from metrics import (
+    LLM_EXTRACTION_SECONDS,
+    LLM_RATE_LIMITED,
+    LLM_REQUEST_SECONDS,
+    LLM_RETRIES,
+    record_llm_usage,
+)
 
 logger = logging.getLogger("resume-extractor.extractor")
 
 
+@dataclass
+class LLMStats:
+    """Per-batch LLM request counters and latencies, reported with the task result."""
+
+    requests: int = 0
+    outcomes: Dict[str, int] = field(default_factory=dict)
+    retries: int = 0
+    rate_limited: int = 0
+    tokens: Dict[str, int] = field(default_factory=dict)
+    # Seconds per extraction once it has an LLM slot, retries and backoff included
+    durations: List[float] = field(default_factory=list)
+    seconds_by_file: Dict[str, float] = field(default_factory=dict)
+
+    def record_request(self, outcome: str, tokens: Dict[str, int]):
+        self.requests += 1
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        for kind, count in tokens.items():
+            self.tokens[kind] = self.tokens.get(kind, 0) + count
+
+    def latency_percentiles(self) -> Dict[str, float]:
+        """Nearest-rank p50/p95/p99 extraction latency in seconds."""
+        if not self.durations:
+            return {}
+        ordered = sorted(self.durations)
+        return {
+            f"p{p}": ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+            for p in (50, 95, 99)
+        }
+
+
 class ResumeDataExtractor:
     def __init__(
         self,
@@ -24,7 +65,8 @@ class ResumeDataExtractor:
         self.max_retries = max_retries or ServiceConfig.LLM_MAX_RETRIES
         self.concurrency = concurrency or ServiceConfig.LLM_CONCURRENCY
 
-        self._semaphore = asyncio.Semaphore(self.concurrency)
+        # LLM slots are shared fairly between the tasks running at once
+        self._slots = get_fair_scheduler("llm", self.concurrency)
         self._client = None
 
     @property
@@ -38,7 +80,12 @@ class ResumeDataExtractor:
         return {key: None for key in field_keys}
 
     async def extract_resume_data(
-        self, prompt: str, resume_text: str, field_keys: List[str]
+        self,
+        prompt: str,
+        resume_text: str,
+        field_keys: List[str],
+        stats: Optional[LLMStats] = None,
+        file_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         if not resume_text or not resume_text.strip():
             logger.warning("Empty resume text provided, returning empty response")
@@ -46,13 +93,36 @@ class ResumeDataExtractor:
 
         full_prompt = f"{prompt}\n\nResume Text:\n{resume_text}"
 
-        async with self._semaphore:
-            return await self._extract_with_retry(full_prompt, field_keys)
+        async with self._slots.slot():
+            return await self._extract_with_retry(full_prompt, field_keys, stats, file_id)
 
-    async def _extract_with_retry(self, prompt: str, field_keys: List[str]) -> Dict[str, Any]:
+    async def _extract_with_retry(
+        self,
+        prompt: str,
+        field_keys: List[str],
+        stats: Optional[LLMStats] = None,
+        file_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        data, outcome = await self._generate_with_retry(prompt, stats)
+        seconds = time.perf_counter() - started
+        LLM_EXTRACTION_SECONDS.labels(outcome).observe(seconds)
+        if stats is not None:
+            stats.durations.append(seconds)
+            if file_id is not None:
+                stats.seconds_by_file[file_id] = seconds
+        return data if data is not None else self.empty_response(field_keys)
+
+    async def _generate_with_retry(
+        self, prompt: str, stats: Optional[LLMStats] = None
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Returns (parsed response or None, outcome: "success", "empty" or "failed")."""
         last_error = None
 
+        stats = stats if stats is not None else LLMStats()
         for attempt in range(self.max_retries):
+            started = time.perf_counter()
+            tokens: Dict[str, int] = {}
             try:
                 response = await self.client.aio.models.generate_content(
                     model=self.model_name,
@@ -62,35 +132,61 @@ class ResumeDataExtractor:
                         response_mime_type="application/json",
                     ),
                 )
+                tokens = record_llm_usage(getattr(response, "usage_metadata", None))
 
                 if not response.text:
+                    LLM_REQUEST_SECONDS.labels("empty").observe(time.perf_counter() - started)
+                    stats.record_request("empty", tokens)
                     logger.warning("Empty response from Gemini")
-                    return self.empty_response(field_keys)
+                    return None, "empty"
 
                 try:
                     parsed = json.loads(response.text)
                     if isinstance(parsed, dict):
-                        return parsed
+                        LLM_REQUEST_SECONDS.labels("success").observe(time.perf_counter() - started)
+                        stats.record_request("success", tokens)
+                        return parsed, "success"
+                    LLM_REQUEST_SECONDS.labels("non_dict").observe(time.perf_counter() - started)
+                    stats.record_request("non_dict", tokens)
                     logger.warning(f"LLM returned non-dict type: {type(parsed).__name__}")
-                    return self.empty_response(field_keys)
+                    return None, "empty"
                 except json.JSONDecodeError as e:
+                    LLM_REQUEST_SECONDS.labels("invalid_json").observe(
+                        time.perf_counter() - started
+                    )
+                    stats.record_request("invalid_json", tokens)
                     logger.error(f"Invalid JSON response from Gemini: {e}")
                     last_error = e
+                    reason = "invalid_json"
 
             except Exception as e:
                 last_error = e
                 error_str = str(e)
 
                 if "429" in error_str or "quota" in error_str.lower():
+                    LLM_REQUEST_SECONDS.labels("rate_limited").observe(
+                        time.perf_counter() - started
+                    )
+                    LLM_RATE_LIMITED.inc()
+                    stats.record_request("rate_limited", tokens)
+                    stats.rate_limited += 1
+                    reason = "rate_limited"
                     wait_time = ServiceConfig.LLM_RETRY_DELAY * (2**attempt)
                     logger.warning(f"Rate limited, waiting {wait_time}s before retry")
                     await asyncio.sleep(wait_time)
                 else:
+                    LLM_REQUEST_SECONDS.labels("error").observe(time.perf_counter() - started)
+                    stats.record_request("error", tokens)
+                    reason = "error"
                     logger.error(f"Attempt {attempt + 1}/{self.max_retries} failed: {e}")
                     await asyncio.sleep(ServiceConfig.LLM_RETRY_DELAY)
 
+            if attempt + 1 < self.max_retries:
+                LLM_RETRIES.labels(reason).inc()
+                stats.retries += 1
+
         logger.error(f"All {self.max_retries} attempts failed. Last error: {last_error}")
-        return self.empty_response(field_keys)
+        return None, "failed"
 
     async def extract_batch(
         self,
@@ -98,6 +194,8 @@ class ResumeDataExtractor:
         resume_texts: List[Dict[str, str]],
         field_keys: List[str],
         progress_callback: Optional[callable] = None,
+        result_callback: Optional[callable] = None,
+        stats: Optional[LLMStats] = None,
     ) -> List[Dict[str, Any]]:
         total = len(resume_texts)
         completed = 0
@@ -108,7 +206,9 @@ class ResumeDataExtractor:
             file_id = item.get("id", "unknown")
             text = item.get("text", "")
 
-            data = await self.extract_resume_data(prompt, text, field_keys)
+            data = await self.extract_resume_data(prompt, text, field_keys, stats, file_id)
+            if result_callback:
+                await result_callback(file_id, data)
 
             completed += 1
             if progress_callback:
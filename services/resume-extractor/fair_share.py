@@ -0,0 +1,206 @@
+"""
+Weighted fair sharing of conversion and LLM capacity across concurrent tasks.
+
+Several tasks run at once (WORKER_COUNT), and they draw on the same conversion
+workers and the same LLM concurrency. Handing slots out first-come-first-served
+lets a 5,000-file task that arrived first starve a 10-file task behind it, so
+each shared resource is a FairScheduler: a fixed number of slots allocated by
+start-time fair queuing over task flows.
+
+- Every task is a flow. Each user's share is split evenly between that user's
+  active tasks, so one user submitting four tasks does not get four shares.
+- A flow's virtual time advances by the service time it actually used divided
+  by its weight. Waiting requests are served in order of their flow's virtual
+  time, so a newly arrived task starts at the current virtual time and is
+  interleaved with the large task instead of queueing behind all of it.
+- Time spent waiting for a slot is recorded per flow and reported with the task.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("resume-extractor.fair_share")
+
+# Weight of each observed slot hold time in a scheduler's expected service time
+SERVICE_TIME_ALPHA = 0.1
+
+
+# ============================================================================
+# Task Flows
+# ============================================================================
+
+
+class TaskFlow:
+    """One task's claim on the shared schedulers, with its queue wait accounting."""
+
+    def __init__(self, task_id: str, user_id: str):
+        self.task_id = task_id
+        self.user_id = user_id
+        # Virtual time per scheduler name
+        self.virtual_time: Dict[str, float] = {}
+        self.wait_seconds: Dict[str, float] = {}
+        self.max_wait_seconds: Dict[str, float] = {}
+        self.acquisitions: Dict[str, int] = {}
+
+    @property
+    def weight(self) -> float:
+        return 1.0 / max(1, _active_tasks_by_user.get(self.user_id, 0))
+
+    def record_wait(self, resource: str, seconds: float):
+        self.wait_seconds[resource] = self.wait_seconds.get(resource, 0.0) + seconds
+        self.max_wait_seconds[resource] = max(self.max_wait_seconds.get(resource, 0.0), seconds)
+        self.acquisitions[resource] = self.acquisitions.get(resource, 0) + 1
+
+    def wait_summary(self) -> str:
+        return ", ".join(
+            f"{resource} {seconds:.1f}s total / {self.max_wait_seconds[resource]:.1f}s max "
+            f"over {self.acquisitions[resource]} slots"
+            for resource, seconds in sorted(self.wait_seconds.items())
+        )
+
+
+_active_tasks_by_user: Dict[str, int] = {}
+
+# Work done outside a task (benchmarks, ad-hoc conversions) shares one flow
+_default_flow = TaskFlow("-", "-")
+
+_current_flow: ContextVar[Optional[TaskFlow]] = ContextVar("task_flow", default=None)
+
+
+def current_flow() -> TaskFlow:
+    return _current_flow.get() or _default_flow
+
+
+@contextmanager
+def task_flow(task_id: str, user_id: str) -> Iterator[TaskFlow]:
+    """Register a task as active and attribute every slot it takes to it."""
+    flow = TaskFlow(task_id, user_id)
+    _active_tasks_by_user[user_id] = _active_tasks_by_user.get(user_id, 0) + 1
+    token = _current_flow.set(flow)
+    try:
+        yield flow
+    finally:
+        _current_flow.reset(token)
+        remaining = _active_tasks_by_user.get(user_id, 1) - 1
+        if remaining > 0:
+            _active_tasks_by_user[user_id] = remaining
+        else:
+            _active_tasks_by_user.pop(user_id, None)
+
+
+# ============================================================================
+# Scheduler
+# ============================================================================
+
+
+class FairScheduler:
+    """
+    A fixed number of slots shared by task flows with start-time fair queuing.
+
+    A request is tagged with max(scheduler virtual time, its flow's virtual
+    time) and waiting requests are granted in tag order. On grant, the flow is
+    charged the expected service time (so its queued requests do not all carry
+    the same tag); on release, the charge is corrected to the actual hold time.
+    """
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.in_use = 0
+        self.virtual_time = 0.0
+        self.expected_service = 1.0
+        self._waiting: List[Tuple[float, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiting if not future.done())
+
+    def _tag(self, flow: TaskFlow, weight: float) -> float:
+        tag = max(self.virtual_time, flow.virtual_time.get(self.name, 0.0))
+        flow.virtual_time[self.name] = tag + self.expected_service / weight
+        return tag
+
+    async def _acquire(self, tag: float):
+        if self.in_use < self.capacity and not self._waiting:
+            self.in_use += 1
+            self.virtual_time = max(self.virtual_time, tag)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (tag, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                # Granted just as we were cancelled: pass the slot on
+                self._release()
+            raise
+
+    def _release(self):
+        while self._waiting:
+            tag, _, future = heapq.heappop(self._waiting)
+            if future.done():
+                # Cancelled while waiting
+                continue
+            # The slot passes straight to the next waiter
+            self.virtual_time = max(self.virtual_time, tag)
+            future.set_result(None)
+            return
+        self.in_use -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one slot for the current task flow."""
+        flow = current_flow()
+        weight = flow.weight
+        tag = self._tag(flow, weight)
+
+        queued = time.monotonic()
+        await self._acquire(tag)
+        granted = time.monotonic()
+        flow.record_wait(self.name, granted - queued)
+
+        try:
+            yield
+        finally:
+            held = time.monotonic() - granted
+            # Replace the expected charge with the actual hold time
+            flow.virtual_time[self.name] += (held - self.expected_service) / weight
+            self.expected_service += SERVICE_TIME_ALPHA * (held - self.expected_service)
+            self._release()
+
+
+_schedulers: Dict[str, FairScheduler] = {}
+
+
+def get_fair_scheduler(name: str, capacity: int) -> FairScheduler:
+    """Get or create the process-wide scheduler for a shared resource."""
+    scheduler = _schedulers.get(name)
+    if scheduler is None:
+        scheduler = _schedulers[name] = FairScheduler(name, capacity)
+        logger.info(f"Fair scheduler '{name}' allocating {scheduler.capacity} slots across tasks")
+    return scheduler
+
+
+def active_task_count() -> int:
+    return sum(_active_tasks_by_user.values())
+
+
+def scheduler_stats() -> Dict[str, Dict[str, float]]:
+    """Occupancy of every shared scheduler, for the status endpoint."""
+    return {
+        name: {
+            "capacity": scheduler.capacity,
+            "in_use": scheduler.in_use,
+            "waiting": scheduler.waiting,
+            "expected_service_seconds": round(scheduler.expected_service, 3),
+        }
+        for name, scheduler in _schedulers.items()
+    }
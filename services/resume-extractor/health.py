@@ -0,0 +1,256 @@
+"""
+HTTP health, readiness and load status for orchestrators and autoscalers.
+
+Served on HEALTH_PORT (0 disables it):
+
+- GET /healthz: liveness, 200 while the event loop responds.
+- GET /readyz: readiness, 200 while consuming, 503 while draining or
+  disconnected from RabbitMQ.
+- GET /status: JSON load snapshot. It has internal queue depth, active tasks,
+  converter pool and LLM slot occupancy, the current bottleneck
+  ("conversion", "llm", "workers", "none" or "idle") and backlog_seconds.
+  backlog_seconds is a rough estimate of how long the work already received
+  would take to clear, suitable as an external scaler metric.
+- GET /metrics: Prometheus metrics of every pipeline stage (see metrics.py).
+
+Under supervisor.py each consumer process serves its own port
+(HEALTH_PORT + 1 + index), and the supervisor serves HEALTH_PORT with the
+processes' statuses aggregated and their metrics summed.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from config import ServiceConfig
+from fair_share import active_task_count, scheduler_stats
+from metrics import render_metrics
+from workers import worker_pool_stats
+
+logger = logging.getLogger("resume-extractor.health")
+
+# Weight of each finished task's duration in the average used for queued tasks
+TASK_SECONDS_ALPHA = 0.2
+
+
+class ServiceState:
+    """What the consumer exposes to the status endpoint."""
+
+    def __init__(self):
+        self.task_queue = None
+        self.active_jobs: Dict[Any, Any] = {}
+        self.connected = False
+        self.draining = False
+        self.task_seconds: Optional[float] = None
+        self.started = time.monotonic()
+
+    @property
+    def ready(self) -> bool:
+        return self.connected and not self.draining
+
+    def record_task(self, seconds: float):
+        if self.task_seconds is None:
+            self.task_seconds = seconds
+        else:
+            self.task_seconds += TASK_SECONDS_ALPHA * (seconds - self.task_seconds)
+
+
+service_state = ServiceState()
+
+
+def _utilization(stats: Optional[Dict[str, float]]) -> float:
+    if not stats or not stats["capacity"]:
+        return 0.0
+    return stats["in_use"] / stats["capacity"]
+
+
+def _slot_backlog(stats: Optional[Dict[str, float]]) -> float:
+    """Seconds to serve the requests waiting for a scheduler's slots."""
+    if not stats or not stats["capacity"]:
+        return 0.0
+    return stats["waiting"] * stats["expected_service_seconds"] / stats["capacity"]
+
+
+def build_status(state: ServiceState = service_state) -> Dict[str, Any]:
+    """Load snapshot of this process."""
+    schedulers = scheduler_stats()
+    conversion = schedulers.get("conversion")
+    llm = schedulers.get("llm")
+    worker_count = ServiceConfig.WORKER_COUNT + ServiceConfig.EXPRESS_WORKER_COUNT
+
+    task_queue = state.task_queue
+    queue_depth = task_queue.qsize() if task_queue is not None else 0
+    active_by_class: Dict[str, int] = {}
+    for item in list(state.active_jobs.values()):
+        active_by_class[item.size_class] = active_by_class.get(item.size_class, 0) + 1
+    active_tasks = max(sum(active_by_class.values()), active_task_count())
+
+    conversion_backlog = _slot_backlog(conversion)
+    llm_backlog = _slot_backlog(llm)
+    # Queued tasks start as workers free up, at the recent average task duration
+    queued_backlog = queue_depth * (state.task_seconds or 0.0) / max(1, worker_count)
+
+    if not active_tasks and not queue_depth:
+        bottleneck = "idle"
+    elif conversion_backlog or llm_backlog:
+        bottleneck = "conversion" if conversion_backlog >= llm_backlog else "llm"
+    elif queue_depth and active_tasks >= worker_count:
+        bottleneck = "workers"
+    else:
+        bottleneck = "none"
+
+    return {
+        "ready": state.ready,
+        "draining": state.draining,
+        "uptime_seconds": round(time.monotonic() - state.started, 1),
+        "queue_depth": queue_depth,
+        "queue_depth_by_class": task_queue.depth_by_class() if task_queue is not None else {},
+        "queue_wait": task_queue.wait_stats.summary() if task_queue is not None else {},
+        "active_tasks": active_tasks,
+        "active_tasks_by_class": active_by_class,
+        "workers": worker_count,
+        "converter_pool": worker_pool_stats(),
+        "conversion": conversion,
+        "llm": llm,
+        "utilization": {
+            "workers": round(active_tasks / max(1, worker_count), 3),
+            "conversion": round(_utilization(conversion), 3),
+            "llm": round(_utilization(llm), 3),
+        },
+        "bottleneck": bottleneck,
+        "backlog_seconds": round(max(conversion_backlog, llm_backlog) + queued_backlog, 1),
+    }
+
+
+def _sum_slots(items: List[Optional[Dict[str, float]]]) -> Optional[Dict[str, float]]:
+    items = [item for item in items if item]
+    if not items:
+        return None
+    return {
+        key: (
+            max(item[key] for item in items)
+            if key == "expected_service_seconds"
+            else sum(item[key] for item in items)
+        )
+        for key in items[0]
+    }
+
+
+def _sum_counts(items: List[Dict[str, int]]) -> Dict[str, int]:
+    total: Dict[str, int] = {}
+    for item in items:
+        for key, value in item.items():
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def aggregate_status(children: List[Dict[str, Any]], draining: bool) -> Dict[str, Any]:
+    """
+    Combine the statuses of a supervisor's consumer processes. Counts and
+    slots are summed; backlog_seconds is the largest process backlog, since
+    the processes clear their backlogs in parallel.
+    """
+    conversion = _sum_slots([child.get("conversion") for child in children])
+    llm = _sum_slots([child.get("llm") for child in children])
+    active_tasks = sum(child.get("active_tasks", 0) for child in children)
+    workers = sum(child.get("workers", 0) for child in children)
+    bottlenecks = [child.get("bottleneck", "idle") for child in children]
+    for bottleneck in ("conversion", "llm", "workers", "none", "idle"):
+        if bottleneck in bottlenecks:
+            break
+
+    return {
+        "ready": not draining and any(child.get("ready") for child in children),
+        "draining": draining,
+        "processes": len(children),
+        "queue_depth": sum(child.get("queue_depth", 0) for child in children),
+        "queue_depth_by_class": _sum_counts(
+            [child.get("queue_depth_by_class", {}) for child in children]
+        ),
+        "active_tasks": active_tasks,
+        "active_tasks_by_class": _sum_counts(
+            [child.get("active_tasks_by_class", {}) for child in children]
+        ),
+        "workers": workers,
+        "converter_pool": _sum_slots([child.get("converter_pool") for child in children]),
+        "conversion": conversion,
+        "llm": llm,
+        "utilization": {
+            "workers": round(active_tasks / max(1, workers), 3),
+            "conversion": round(_utilization(conversion), 3),
+            "llm": round(_utilization(llm), 3),
+        },
+        "bottleneck": bottleneck,
+        "backlog_seconds": max(
+            (child.get("backlog_seconds", 0.0) for child in children), default=0.0
+        ),
+    }
+
+
+class HealthServer:
+    """aiohttp server for /healthz, /readyz, /status and /metrics."""
+
+    def __init__(
+        self,
+        status_provider: Callable[[], Awaitable[Dict[str, Any]]],
+        metrics_provider: Callable[[], bytes] = render_metrics,
+    ):
+        self.status_provider = status_provider
+        self.metrics_provider = metrics_provider
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _healthz(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    async def _readyz(self, request: web.Request) -> web.Response:
+        status = await self.status_provider()
+        return web.json_response(
+            {"ready": status["ready"], "draining": status["draining"]},
+            status=200 if status["ready"] else 503,
+        )
+
+    async def _status(self, request: web.Request) -> web.Response:
+        return web.json_response(await self.status_provider())
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        # Rendering reads every metric (and, under the supervisor, every process's file)
+        body = await asyncio.get_running_loop().run_in_executor(None, self.metrics_provider)
+        return web.Response(body=body, headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+    async def start(self, port: int):
+        app = web.Application()
+        app.router.add_get("/healthz", self._healthz)
+        app.router.add_get("/readyz", self._readyz)
+        app.router.add_get("/status", self._status)
+        app.router.add_get("/metrics", self._metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", port).start()
+        logger.info(f"Health endpoint listening on port {port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _local_status() -> Dict[str, Any]:
+    return build_status()
+
+
+async def start_health_server() -> Optional[HealthServer]:
+    """Serve this process's status on HEALTH_PORT, unless it is 0."""
+    if ServiceConfig.HEALTH_PORT <= 0:
+        return None
+    server = HealthServer(_local_status)
+    try:
+        await server.start(ServiceConfig.HEALTH_PORT)
+    except OSError as e:
+        # A busy port must not keep the consumer from starting
+        logger.error(f"Health endpoint not started on port {ServiceConfig.HEALTH_PORT}: {e}")
+        return None
+    return server
@@ -18,12 +18,19 @@ import logging
 import os
 import signal
 import sys
+import time
+from typing import Dict, List, Tuple
 
 import aio_pika
 from aio_pika.abc import AbstractIncomingMessage
 
 from config import QueueNames, ServiceConfig, init_directories
-from processor import process_task
+from health import service_state, start_health_server
+from processor import process_chunk, process_task
+from sharding import close_publisher
+from task_queue import CHUNK, SIZE_CLASS_PRIORITY, PriorityTaskQueue, QueuedTask, size_class
+from utils import mark_task_failed
+from workers import shutdown_worker_pool
 
 # Configure logging
 logging.basicConfig(
@@ -48,7 +55,11 @@ async def process_message(message: AbstractIncomingMessage):
     {
         "userId": "user-id",
         "taskId": "task-id",
-        "extractFromArchive": true/false (optional, defaults to true)
+        "extractFromArchive": true/false (optional, defaults to true),
+        "reprocessFailed": true/false (optional; reprocess only the files of a
+                           completed task whose results were empty),
+        "fileCount": 120 (optional; sets the task's size class when the
+                     message has no priority)
     }
 
     Uses early-ack pattern: acknowledge message immediately after validation,
@@ -64,6 +75,7 @@ async def process_message(message: AbstractIncomingMessage):
         user_id = data.get("userId")
         task_id = data.get("taskId")
         extract_from_archive = data.get("extractFromArchive", True)
+        reprocess_failed = data.get("reprocessFailed", False)
 
         if not user_id or not task_id:
             raise ValueError("Missing 'userId' or 'taskId' in message")
@@ -71,7 +83,7 @@ async def process_message(message: AbstractIncomingMessage):
         await message.ack()
         logger.info(f"Message acknowledged for task {task_id}, starting processing...")
 
-        result = await process_task(user_id, task_id, extract_from_archive)
+        result = await process_task(user_id, task_id, extract_from_archive, reprocess_failed)
 
         if result.success:
             logger.info(
@@ -94,31 +106,209 @@ async def process_message(message: AbstractIncomingMessage):
             await message.nack(requeue=False)
 
 
-async def worker(task_queue: asyncio.Queue, worker_id: int):
+async def process_shard_message(message: AbstractIncomingMessage):
+    """
+    Process one file chunk of a sharded task.
+
+    Expected message format:
+    {
+        "userId": "user-id",
+        "taskId": "task-id",
+        "chunk": 0
+    }
+
+    Chunks are small, so unlike task messages they are acknowledged only after
+    processing: a chunk lost with its replica is redelivered to another one.
+    A chunk that fails again on redelivery fails the task.
+    """
+    task_id = None
+    try:
+        data = json.loads(message.body.decode())
+        user_id = data.get("userId")
+        task_id = data.get("taskId")
+        chunk = data.get("chunk")
+
+        if not user_id or not task_id or not isinstance(chunk, int):
+            raise ValueError("Missing 'userId', 'taskId' or 'chunk' in shard message")
+
+        await process_chunk(user_id, task_id, chunk)
+        await message.ack()
+
+    except (json.JSONDecodeError, ValueError) as e:
+        logger.error(f"Invalid shard message: {e}")
+        await message.nack(requeue=False)
+    except Exception as e:
+        logger.exception(f"Error processing chunk of task {task_id}: {e}")
+        if message.redelivered:
+            await mark_task_failed(task_id, f"Chunk processing failed: {e}")
+        await message.nack(requeue=not message.redelivered)
+
+
+def classify_message(message: AbstractIncomingMessage) -> tuple[int, str]:
+    """Priority and size class of a task message, from its priority or fileCount hint."""
+    try:
+        file_count = json.loads(message.body.decode()).get("fileCount")
+    except (ValueError, AttributeError):
+        # Rejected by process_message once a worker takes it
+        file_count = None
+    if not isinstance(file_count, int):
+        file_count = None
+
+    task_class = size_class(file_count)
+    if message.priority is not None:
+        return message.priority, task_class
+    return SIZE_CLASS_PRIORITY[task_class], task_class
+
+
+async def worker(
+    task_queue: PriorityTaskQueue,
+    worker_id: int,
+    active_jobs: Dict[asyncio.Task, QueuedTask],
+    express: bool = False,
+):
     """
     Worker function that processes messages from the internal task queue.
+    Express workers only take small tasks. The message being processed is
+    registered in active_jobs so a drain can interrupt and requeue it.
     """
-    logger.info(f"Worker {worker_id} started")
+    name = f"Express worker {worker_id}" if express else f"Worker {worker_id}"
+    logger.info(f"{name} started")
 
     while not shutdown_event.is_set():
         try:
             # Wait for a message with timeout
             try:
-                message = await asyncio.wait_for(task_queue.get(), timeout=1.0)
+                item = await asyncio.wait_for(task_queue.get(express), timeout=1.0)
             except asyncio.TimeoutError:
                 continue
 
-            logger.info(f"Worker {worker_id} processing task")
-            await process_message(message)
+            logger.info(f"{name} processing {item.size_class} task")
+            job = asyncio.create_task(item.handler(item.message), context=item.job_context())
+            active_jobs[job] = item
+            started = time.monotonic()
+            try:
+                await job
+            finally:
+                active_jobs.pop(job, None)
+            service_state.record_task(time.monotonic() - started)
             task_queue.task_done()
 
         except asyncio.CancelledError:
-            logger.info(f"Worker {worker_id} cancelled")
+            logger.info(f"{name} cancelled")
             break
         except Exception as e:
-            logger.exception(f"Worker {worker_id} error: {e}")
+            logger.exception(f"{name} error: {e}")
+
+    logger.info(f"{name} stopped")
+
+
+async def requeue_interrupted(channel: aio_pika.abc.AbstractChannel, item: QueuedTask):
+    """
+    Hand an interrupted message back to RabbitMQ. Unacknowledged messages
+    (shard chunks, or tasks interrupted before their early ack) are rejected
+    with requeue; acknowledged task messages are published again. The
+    republished task repeats its setup, including the parseable file insert,
+    which is idempotent (see utils.parseable_file_id).
+    """
+    if not item.message.processed:
+        await item.message.nack(requeue=True)
+        return
+
+    try:
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=item.message.body,
+                priority=item.priority,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=QueueNames.RESUME_EXTRACTOR,
+        )
+        logger.info(f"Republished interrupted task: {item.message.body.decode()}")
+    except Exception as e:
+        logger.exception(f"Failed to republish interrupted task {item.message.body!r}: {e}")
+        task_id = json.loads(item.message.body).get("taskId")
+        if task_id:
+            await mark_task_failed(task_id, "Interrupted by shutdown and could not be requeued")
+
+
+async def drain(
+    channel: aio_pika.abc.AbstractChannel,
+    consumers: List[Tuple[aio_pika.abc.AbstractQueue, str]],
+    task_queue: PriorityTaskQueue,
+    workers: List[asyncio.Task],
+    active_jobs: Dict[asyncio.Task, QueuedTask],
+):
+    """
+    Stop consuming, return waiting messages to RabbitMQ, give in-flight tasks
+    DRAIN_GRACE_SECONDS to finish, then interrupt the rest and requeue them.
+    Interrupted tasks flush their checkpoint, so whichever replica receives
+    them next resumes from the files already converted and extracted.
+    """
+    service_state.draining = True
+    for queue, consumer_tag in consumers:
+        try:
+            await queue.cancel(consumer_tag)
+        except Exception as e:
+            logger.warning(f"Failed to cancel consumer on {queue.name}: {e}")
+
+    waiting = task_queue.drain_nowait()
+    for item in waiting:
+        await item.message.nack(requeue=True)
+    if waiting:
+        logger.info(f"Returned {len(waiting)} waiting message(s) to RabbitMQ")
+
+    # Workers exit once their current task finishes
+    pending = set()
+    if workers:
+        if active_jobs:
+            logger.info(
+                f"Waiting up to {ServiceConfig.DRAIN_GRACE_SECONDS:.0f}s for "
+                f"{len(active_jobs)} in-flight task(s) to finish"
+            )
+        _, pending = await asyncio.wait(workers, timeout=ServiceConfig.DRAIN_GRACE_SECONDS)
+
+    interrupted = list(active_jobs.items())
+    for job, _ in interrupted:
+        job.cancel()
+    await asyncio.gather(*(job for job, _ in interrupted), return_exceptions=True)
+    for job, item in interrupted:
+        # A task may have finished just as the grace period ran out
+        if job.cancelled():
+            await requeue_interrupted(channel, item)
+    if interrupted:
+        logger.info(f"Interrupted {len(interrupted)} task(s) after the grace period")
+
+    for w in pending:
+        w.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def declare_task_queue(
+    connection: aio_pika.abc.AbstractRobustConnection, channel: aio_pika.abc.AbstractChannel
+) -> tuple[aio_pika.abc.AbstractChannel, aio_pika.abc.AbstractQueue]:
+    """
+    Declare the task queue with x-max-priority. RabbitMQ cannot add priorities
+    to an existing queue, so a queue declared without them is used as is
+    (on a new channel, since the failed declare closes the channel).
+    """
+    if ServiceConfig.QUEUE_MAX_PRIORITY > 0:
+        try:
+            queue = await channel.declare_queue(
+                QueueNames.RESUME_EXTRACTOR,
+                durable=True,
+                arguments={"x-max-priority": ServiceConfig.QUEUE_MAX_PRIORITY},
+            )
+            return channel, queue
+        except aio_pika.exceptions.ChannelPreconditionFailed:
+            logger.warning(
+                f"Queue {QueueNames.RESUME_EXTRACTOR} exists without x-max-priority; "
+                f"RabbitMQ will deliver it in FIFO order until it is deleted and redeclared"
+            )
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=ServiceConfig.CONCURRENCY)
+            return channel, await channel.declare_queue(QueueNames.RESUME_EXTRACTOR, passive=True)
 
-    logger.info(f"Worker {worker_id} stopped")
+    return channel, await channel.declare_queue(QueueNames.RESUME_EXTRACTOR, durable=True)
 
 
 async def start_consumer():
@@ -138,67 +328,94 @@ async def start_consumer():
 
                 # Declare the queue
                 # Listen on both the new queue and legacy queue for backward compatibility
-                queue = await channel.declare_queue(QueueNames.RESUME_EXTRACTOR, durable=True)
+                channel, queue = await declare_task_queue(connection, channel)
 
                 # Also listen on the legacy extract_archive queue
                 legacy_queue = await channel.declare_queue(QueueNames.EXTRACT_ARCHIVE, durable=True)
 
-                # Internal task queue and worker pool
-                task_queue = asyncio.Queue(maxsize=ServiceConfig.QUEUE_SIZE)
+                # Internal task queue and worker pool, plus express workers for small tasks
+                task_queue = PriorityTaskQueue(maxsize=ServiceConfig.QUEUE_SIZE)
 
+                active_jobs: Dict[asyncio.Task, QueuedTask] = {}
                 workers = [
-                    asyncio.create_task(worker(task_queue, i))
+                    asyncio.create_task(worker(task_queue, i, active_jobs))
                     for i in range(ServiceConfig.WORKER_COUNT)
                 ]
+                workers += [
+                    asyncio.create_task(worker(task_queue, i, active_jobs, express=True))
+                    for i in range(ServiceConfig.EXPRESS_WORKER_COUNT)
+                ]
 
                 async def enqueue_message(message: AbstractIncomingMessage):
-                    """Enqueue message for processing by workers."""
-                    await task_queue.put(message)
+                    """Enqueue message for processing by workers, highest priority first."""
+                    priority, task_class = classify_message(message)
+                    await task_queue.put(process_message, message, priority, task_class)
+
+                async def enqueue_shard_message(message: AbstractIncomingMessage):
+                    priority = message.priority
+                    if priority is None:
+                        priority = SIZE_CLASS_PRIORITY[CHUNK]
+                    await task_queue.put(process_shard_message, message, priority, CHUNK)
 
                 # Start consuming from both queues
-                await queue.consume(enqueue_message)
-                await legacy_queue.consume(enqueue_message)
+                consumers = [
+                    (queue, await queue.consume(enqueue_message)),
+                    (legacy_queue, await legacy_queue.consume(enqueue_message)),
+                ]
+                queue_names = [QueueNames.RESUME_EXTRACTOR, QueueNames.EXTRACT_ARCHIVE]
+
+                # In shard mode every replica also works on chunks of sharded tasks
+                if ServiceConfig.SHARD_MODE:
+                    shard_queue = await channel.declare_queue(
+                        QueueNames.RESUME_EXTRACTOR_SHARDS, durable=True
+                    )
+                    consumers.append(
+                        (shard_queue, await shard_queue.consume(enqueue_shard_message))
+                    )
+                    queue_names.append(QueueNames.RESUME_EXTRACTOR_SHARDS)
+
+                service_state.task_queue = task_queue
+                service_state.active_jobs = active_jobs
+                service_state.connected = True
 
                 logger.info(
                     f"Consumer started. "
-                    f"Listening on queues: {QueueNames.RESUME_EXTRACTOR}, {QueueNames.EXTRACT_ARCHIVE}. "
-                    f"Workers: {ServiceConfig.WORKER_COUNT}"
+                    f"Listening on queues: {', '.join(queue_names)}. "
+                    f"Workers: {ServiceConfig.WORKER_COUNT} "
+                    f"(+{ServiceConfig.EXPRESS_WORKER_COUNT} express)"
                 )
 
                 # Wait for shutdown signal
                 await shutdown_event.wait()
 
                 # Graceful shutdown
-                logger.info("Shutting down workers...")
-
-                # Wait for pending tasks
-                await task_queue.join()
-
-                # Cancel workers
-                for w in workers:
-                    w.cancel()
+                logger.info("Draining workers...")
+                await drain(channel, consumers, task_queue, workers, active_jobs)
 
-                await asyncio.gather(*workers, return_exceptions=True)
-
-                logger.info("All workers stopped")
+                logger.info(f"All workers stopped. Queue wait: {task_queue.wait_stats.summary()}")
 
         except aio_pika.exceptions.AMQPConnectionError as e:
+            service_state.connected = False
             logger.error(f"RabbitMQ connection error: {e}. Reconnecting in 5s...")
             await asyncio.sleep(5)
         except Exception as e:
+            service_state.connected = False
             logger.exception(f"Consumer error: {e}. Reconnecting in 5s...")
             await asyncio.sleep(5)
 
 
 async def graceful_shutdown(sig: signal.Signals):
     """
-    Handle graceful shutdown on receiving a signal.
+    Handle graceful shutdown on receiving a signal: the first signal starts a
+    drain, a second one cancels everything immediately.
     """
-    logger.info(f"Received {sig.name}. Initiating shutdown...")
-    shutdown_event.set()
+    if not shutdown_event.is_set():
+        logger.info(f"Received {sig.name}. Draining (send again to stop immediately)...")
+        service_state.draining = True
+        shutdown_event.set()
+        return
 
-    # Give some time for cleanup
-    await asyncio.sleep(2)
+    logger.info(f"Received {sig.name} again. Stopping now...")
 
     # Cancel remaining tasks
     tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
@@ -218,14 +435,33 @@ async def main():
     logger.info("=" * 60)
     logger.info("Resume Extractor Service Starting")
     logger.info("=" * 60)
+    if os.getenv("SUPERVISOR_CHILD_INDEX"):
+        logger.info(f"Consumer process {os.getenv('SUPERVISOR_CHILD_INDEX')} (pid {os.getpid()})")
     logger.info(f"Work directory: {ServiceConfig.WORK_DIR}")
     logger.info(f"Worker count: {ServiceConfig.WORKER_COUNT}")
     logger.info(f"File processing concurrency: {ServiceConfig.FILE_PROCESSING_CONCURRENCY}")
     logger.info(f"LLM concurrency: {ServiceConfig.LLM_CONCURRENCY}")
+    logger.info(f"Converter workers: {ServiceConfig.CONVERTER_WORKERS or 'threads'}")
+    logger.info(
+        f"Express workers: {ServiceConfig.EXPRESS_WORKER_COUNT} "
+        f"(tasks of up to {ServiceConfig.EXPRESS_MAX_FILES} files)"
+    )
+    if ServiceConfig.SHARD_MODE:
+        logger.info(
+            f"Shard mode: tasks with {ServiceConfig.SHARD_MIN_FILES}+ files split into "
+            f"chunks of {ServiceConfig.SHARD_SIZE}"
+        )
     logger.info("=" * 60)
 
     # Start the consumer
-    await start_consumer()
+    health_server = await start_health_server()
+    try:
+        await start_consumer()
+    finally:
+        if health_server is not None:
+            await health_server.stop()
+        await close_publisher()
+        shutdown_worker_pool()
 
 
 if __name__ == "__main__":
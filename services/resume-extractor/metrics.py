@@ -0,0 +1,213 @@
+"""
+Prometheus metrics for every pipeline stage, served on GET /metrics of the
+health endpoint (HEALTH_PORT).
+
+- Tasks: duration and file counts by outcome, and time spent waiting in the
+  internal task queue by size class.
+- Conversion: per-file duration by file type, winning method and outcome, and
+  every fallback chain strategy attempt.
+- LLM: request latency, retries, 429s and tokens from usage_metadata.
+- MinIO and API helpers in utils: call duration by target, operation and outcome.
+
+Only counters and histograms are used, so under supervisor.py each consumer
+process writes its values to METRICS_MULTIPROC_DIR and the supervisor serves
+them summed across processes. Recording a value is a lock and an add, so the
+hot path only pays for one label lookup per observation.
+"""
+
+import functools
+import inspect
+import os
+import shutil
+import time
+from typing import Any, Callable, Dict
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Environment variable through which prometheus_client finds the multi-process directory
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+TASK_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400)
+CONVERSION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+IO_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# ============================================================================
+# Tasks
+# ============================================================================
+
+TASK_SECONDS = Histogram(
+    "resume_extractor_task_seconds",
+    "Wall time of process_task",
+    ["outcome"],
+    buckets=TASK_BUCKETS,
+)
+TASK_FILES = Counter(
+    "resume_extractor_task_files_total",
+    "Files of finished tasks: processed, invalid, duplicate, failed_result and resumed",
+    ["kind"],
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "resume_extractor_queue_wait_seconds",
+    "Time a received task waited for a worker",
+    ["size_class"],
+    buckets=TASK_BUCKETS,
+)
+
+# ============================================================================
+# Conversion
+# ============================================================================
+
+CONVERSION_SECONDS = Histogram(
+    "resume_extractor_conversion_seconds",
+    "Wall time of FileConverter.convert_to_text per file",
+    ["file_type", "method", "outcome"],
+    buckets=CONVERSION_BUCKETS,
+)
+STRATEGY_ATTEMPTS = Counter(
+    "resume_extractor_strategy_attempts_total",
+    "Fallback chain strategy attempts",
+    ["chain", "strategy", "outcome"],
+)
+STRATEGY_SECONDS = Counter(
+    "resume_extractor_strategy_seconds_total",
+    "Time spent in fallback chain strategy attempts",
+    ["chain", "strategy"],
+)
+
+# ============================================================================
+# LLM
+# ============================================================================
+
+LLM_REQUEST_SECONDS = Histogram(
+    "resume_extractor_llm_request_seconds",
+    "Latency of one generate_content call",
+    ["outcome"],
+    buckets=LLM_BUCKETS,
+)
+LLM_EXTRACTION_SECONDS = Histogram(
+    "resume_extractor_llm_extraction_seconds",
+    "Latency of one resume extraction, retries and backoff included",
+    ["outcome"],
+    buckets=LLM_BUCKETS,
+)
+LLM_RETRIES = Counter(
+    "resume_extractor_llm_retries_total",
+    "generate_content calls retried",
+    ["reason"],
+)
+LLM_RATE_LIMITED = Counter(
+    "resume_extractor_llm_rate_limited_total",
+    "generate_content calls rejected with 429 or a quota error",
+)
+LLM_TOKENS = Counter(
+    "resume_extractor_llm_tokens_total",
+    "Tokens reported in usage_metadata",
+    ["kind"],
+)
+
+# usage_metadata field -> kind label
+TOKEN_FIELDS = {
+    "prompt_token_count": "prompt",
+    "candidates_token_count": "candidates",
+    "thoughts_token_count": "thoughts",
+    "cached_content_token_count": "cached",
+    "total_token_count": "total",
+}
+
+# ============================================================================
+# MinIO and API I/O
+# ============================================================================
+
+IO_SECONDS = Histogram(
+    "resume_extractor_io_seconds",
+    "Duration of MinIO and API helper calls",
+    ["target", "operation", "outcome"],
+    buckets=IO_BUCKETS,
+)
+
+
+def record_llm_usage(usage_metadata: Any) -> Dict[str, int]:
+    """Count the tokens of one response and return them by kind; usage_metadata may be None."""
+    tokens: Dict[str, int] = {}
+    if usage_metadata is None:
+        return tokens
+    for name, kind in TOKEN_FIELDS.items():
+        count = getattr(usage_metadata, name, None)
+        if count:
+            LLM_TOKENS.labels(kind).inc(count)
+            tokens[kind] = count
+    return tokens
+
+
+def _io_outcome(result: Any) -> str:
+    # API helpers report a rejected update by returning False
+    return "error" if result is False else "ok"
+
+
+def timed_io(target: str, operation: str) -> Callable[[Callable], Callable]:
+    """Decorate a sync or async helper to observe its duration in IO_SECONDS."""
+
+    def decorate(fn: Callable) -> Callable:
+        ok = IO_SECONDS.labels(target, operation, "ok")
+        error = IO_SECONDS.labels(target, operation, "error")
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    error.observe(time.perf_counter() - start)
+                    raise
+                (ok if _io_outcome(result) == "ok" else error).observe(time.perf_counter() - start)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                error.observe(time.perf_counter() - start)
+                raise
+            (ok if _io_outcome(result) == "ok" else error).observe(time.perf_counter() - start)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+# ============================================================================
+# Exposition
+# ============================================================================
+
+
+def render_metrics() -> bytes:
+    """This process's metrics in the Prometheus text format."""
+    return generate_latest(REGISTRY)
+
+
+def render_multiprocess_metrics(path: str) -> bytes:
+    """The metrics of every process writing to path, summed."""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=path)
+    return generate_latest(registry)
+
+
+def reset_multiprocess_dir(path: str):
+    """Start a supervisor run with an empty multi-process directory."""
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
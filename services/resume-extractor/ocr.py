@@ -0,0 +1,491 @@
+"""
+OCR pipeline shared by the PDF and image converters.
+
+Works on in-memory buffers end to end:
+- pymupdf pixmaps are viewed as numpy arrays without copying the samples
+- encoded images are decoded straight from bytes with cv2.imdecode
+- OpenCV preprocessing runs in place on a single working buffer
+- recognition runs on a pooled in-process tesseract handle (tesserocr) when available,
+  otherwise the buffer is streamed to the tesseract CLI over stdin as a PGM
+
+Either way no temporary image files are written.
+"""
+
+import logging
+import os
+import queue
+import struct
+import subprocess
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import ServiceConfig
+
+try:
+    import tesserocr
+except ImportError:  # optional dependency, the CLI path is used instead
+    tesserocr = None
+
+logger = logging.getLogger("resume-extractor.ocr")
+
+TESSERACT_CMD = "/usr/bin/tesseract"
+TESSERACT_LANG = "eng"
+TESSERACT_PSM = 6
+TESSERACT_OEM = 3
+
+# Morphological kernel used to clean up speckle noise after binarization
+_OPEN_KERNEL = np.ones((2, 2), np.uint8)
+
+
+# ============================================================================
+# Buffer Sources
+# ============================================================================
+
+
+def pixmap_to_ndarray(pix) -> np.ndarray:
+    """
+    View a pymupdf pixmap's samples as a uint8 array without copying.
+
+    Grayscale pixmaps become (height, width) arrays, everything else (height, width, n).
+    The array borrows the pixmap's memory, so the pixmap must outlive it.
+    """
+    buf = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+    rows = buf.reshape(pix.height, pix.stride)[:, : pix.width * pix.n]
+
+    if pix.n == 1:
+        return rows
+    return rows.reshape(pix.height, pix.width, pix.n)
+
+
+def image_dimensions(data) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from a PNG, JPEG or WEBP header without decoding pixels.
+    Returns None for anything it does not recognize.
+    """
+    view = memoryview(data)
+    head = bytes(view[:64])
+
+    try:
+        if head.startswith(b"\x89PNG\r\n\x1a\n"):
+            width, height = struct.unpack(">II", head[16:24])
+            return width, height
+
+        if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = int.from_bytes(head[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                width = int.from_bytes(head[24:27], "little") + 1
+                height = int.from_bytes(head[27:30], "little") + 1
+                return width, height
+            return None
+
+        if head.startswith(b"\xff\xd8"):
+            return _jpeg_dimensions(view)
+    except (struct.error, IndexError):
+        return None
+
+    return None
+
+
+def _jpeg_dimensions(data: memoryview) -> Optional[Tuple[int, int]]:
+    """Walk JPEG markers up to the first start-of-frame segment."""
+    size = len(data)
+    pos = 2
+    while pos + 9 < size:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        length = (data[pos + 2] << 8) | data[pos + 3]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = (data[pos + 5] << 8) | data[pos + 6]
+            width = (data[pos + 7] << 8) | data[pos + 8]
+            return width, height
+        pos += 2 + length
+    return None
+
+
+def _reduced_decode_flag(dimensions: Optional[Tuple[int, int]]) -> int:
+    """
+    Pick the IMREAD_REDUCED_GRAYSCALE_* flag that keeps the long side at or above
+    OCR_DECODE_TARGET_SIDE. JPEGs are then decoded at reduced size directly
+    instead of being decoded in full and shrunk afterwards.
+    """
+    if dimensions is None:
+        return cv2.IMREAD_GRAYSCALE
+
+    long_side = max(dimensions)
+    target = ServiceConfig.OCR_DECODE_TARGET_SIDE
+    for factor, flag in (
+        (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+        (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+        (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+    ):
+        if long_side / factor >= target:
+            return flag
+    return cv2.IMREAD_GRAYSCALE
+
+
+def decode_image(data) -> Optional[np.ndarray]:
+    """
+    Decode an encoded image buffer (bytes, memoryview or uint8 array) to grayscale.
+    Very large images are decoded at a reduced resolution.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    return cv2.imdecode(buf, _reduced_decode_flag(image_dimensions(buf)))
+
+
+def decode_image_file(file_path: str) -> Optional[np.ndarray]:
+    """Read an image file once into memory and decode it to grayscale."""
+    return decode_image(np.fromfile(file_path, dtype=np.uint8))
+
+
+def to_grayscale(image: np.ndarray) -> np.ndarray:
+    """Return a single-channel view of the image, converting only when needed."""
+    if image.ndim == 2:
+        return image
+    channels = image.shape[2]
+    if channels == 1:
+        return image[:, :, 0]
+    if channels == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+# ============================================================================
+# Preprocessing
+# ============================================================================
+
+
+def estimate_layout(gray: np.ndarray) -> Tuple[float, Optional[float]]:
+    """
+    Estimate skew angle (degrees) and median glyph height (full-resolution pixels).
+
+    Works on a copy downsampled to OCR_ANALYSIS_MAX_SIDE and binarized with Otsu,
+    so cost stays flat regardless of the input resolution. Both values are
+    scale-invariant (the height is mapped back to full resolution).
+    """
+    try:
+        height, width = gray.shape[:2]
+        factor = min(1.0, ServiceConfig.OCR_ANALYSIS_MAX_SIDE / max(height, width))
+        if factor < 1.0:
+            small = cv2.resize(
+                gray, (int(width * factor), int(height * factor)), interpolation=cv2.INTER_AREA
+            )
+        else:
+            small = gray
+
+        _, mask = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+
+        coords = np.column_stack(np.where(mask > 0))
+        if len(coords) == 0:
+            return 0.0, None
+
+        # minAreaRect's angle convention changed across OpenCV releases ([-90, 0) vs (0, 90]);
+        # folding into [-45, 45] gives the same skew for both
+        angle = cv2.minAreaRect(coords)[-1]
+        if angle < -45:
+            angle += 90
+        elif angle > 45:
+            angle -= 90
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        heights = stats[1:count, cv2.CC_STAT_HEIGHT]
+        widths = stats[1:count, cv2.CC_STAT_WIDTH]
+        glyphs = heights[
+            (heights >= 2) & (heights < small.shape[0] * 0.1) & (widths <= heights * 8)
+        ]
+        text_height = float(np.median(glyphs)) / factor if len(glyphs) else None
+
+        return -angle, text_height
+    except Exception as e:
+        logger.warning(f"Layout estimation failed: {e}")
+        return 0.0, None
+
+
+def deskew(gray: np.ndarray, angle: Optional[float] = None) -> np.ndarray:
+    """Rotate a grayscale image by the estimated skew; tiny angles are left alone."""
+    try:
+        if angle is None:
+            angle, _ = estimate_layout(gray)
+
+        if abs(angle) < ServiceConfig.OCR_MIN_DESKEW_ANGLE:
+            return gray
+
+        h, w = gray.shape[:2]
+        center = (w // 2, h // 2)
+        M = cv2.getRotationMatrix2D(center, angle, 1.0)
+        return cv2.warpAffine(
+            gray, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE
+        )
+    except Exception as e:
+        logger.warning(f"Deskew failed: {e}, returning original image")
+        return gray
+
+
+def scale_for_text_height(text_height: Optional[float]) -> float:
+    """
+    Resize factor that brings the detected glyph height to OCR_TARGET_TEXT_HEIGHT,
+    clamped to [OCR_MIN_SCALE, OCR_MAX_SCALE]. Falls back to the legacy 1.5x
+    upscale when no text height could be measured.
+    """
+    if not text_height:
+        return 1.5
+
+    scale = ServiceConfig.OCR_TARGET_TEXT_HEIGHT / text_height
+    scale = min(max(scale, ServiceConfig.OCR_MIN_SCALE), ServiceConfig.OCR_MAX_SCALE)
+
+    # Resizing by a few percent costs a full-image pass for no OCR benefit
+    return 1.0 if abs(scale - 1.0) < 0.1 else scale
+
+
+def preprocess(gray: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """
+    Binarize a grayscale image for OCR.
+
+    Resizing (when scale != 1) produces the one working buffer; blur, thresholding
+    and the morphological open then all run in place on it.
+    """
+    try:
+        if scale != 1.0:
+            width = int(gray.shape[1] * scale)
+            height = int(gray.shape[0] * scale)
+            work = cv2.resize(gray, (width, height), interpolation=cv2.INTER_LINEAR)
+        elif gray.flags.writeable and gray.flags.c_contiguous:
+            work = gray
+        else:
+            work = np.ascontiguousarray(gray).copy()
+
+        # Gaussian blur to reduce noise
+        cv2.GaussianBlur(work, (5, 5), 0, dst=work)
+
+        # Adaptive thresholding for binarization
+        cv2.adaptiveThreshold(
+            work, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2, dst=work
+        )
+
+        # Morphological open to clean up noise
+        cv2.morphologyEx(work, cv2.MORPH_OPEN, _OPEN_KERNEL, dst=work)
+
+        return work
+    except Exception as e:
+        logger.warning(f"Image preprocessing failed: {e}")
+        return gray
+
+
+# ============================================================================
+# Recognition
+# ============================================================================
+
+
+class EngineInitError(RuntimeError):
+    """A tesserocr handle could not be created (missing language data, bad TESSDATA_PREFIX)."""
+
+
+class TesseractEnginePool:
+    """
+    Pool of initialized in-process tesseract handles sharing one set of settings.
+
+    Handles are created lazily up to `size` and reused across images, so
+    eng.traineddata is loaded once per handle instead of once per image.
+    tesserocr releases the GIL during recognition, so pooled handles run
+    in parallel on the converter threads.
+    """
+
+    def __init__(self, lang: str, psm: int, oem: int, size: int):
+        self.lang = lang
+        self.psm = psm
+        self.oem = oem
+        self.size = max(1, size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create_handle(self):
+        kwargs = {"lang": self.lang, "psm": self.psm, "oem": self.oem}
+        if os.getenv("TESSDATA_PREFIX"):
+            kwargs["path"] = os.environ["TESSDATA_PREFIX"]
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    @contextmanager
+    def acquire(self) -> Iterator:
+        """Borrow a handle, creating one if the pool has not reached its size yet."""
+        try:
+            api = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    api = self._create_handle()
+                except Exception as e:
+                    with self._lock:
+                        self._created -= 1
+                    raise EngineInitError(str(e)) from e
+            else:
+                api = self._idle.get()
+
+        try:
+            yield api
+        finally:
+            api.Clear()
+            self._idle.put(api)
+
+    def recognize(self, gray: np.ndarray) -> str:
+        """Recognize a grayscale buffer on a pooled handle."""
+        gray = np.ascontiguousarray(gray)
+        height, width = gray.shape[:2]
+
+        with self.acquire() as api:
+            api.SetImageBytes(gray.tobytes(), width, height, 1, gray.strides[0])
+            return api.GetUTF8Text()
+
+
+_engine_pools: Dict[Tuple[str, int, int], TesseractEnginePool] = {}
+_engine_pools_lock = threading.Lock()
+_engine_disabled = False
+
+
+def get_engine_pool(
+    lang: str = TESSERACT_LANG, psm: int = TESSERACT_PSM, oem: int = TESSERACT_OEM
+) -> Optional[TesseractEnginePool]:
+    """Get the shared in-process engine pool for these settings, or None if unavailable."""
+    if tesserocr is None or _engine_disabled or ServiceConfig.OCR_ENGINE == "cli":
+        return None
+
+    key = (lang, psm, oem)
+    with _engine_pools_lock:
+        pool = _engine_pools.get(key)
+        if pool is None:
+            pool = TesseractEnginePool(lang, psm, oem, ServiceConfig.OCR_ENGINE_POOL_SIZE)
+            _engine_pools[key] = pool
+        return pool
+
+
+def _tesseract_args(psm: int) -> list[str]:
+    return [
+        TESSERACT_CMD,
+        "stdin",
+        "stdout",
+        "-l",
+        TESSERACT_LANG,
+        "--psm",
+        str(psm),
+        "--oem",
+        str(TESSERACT_OEM),
+    ]
+
+
+def recognize_cli(gray: np.ndarray, psm: int = TESSERACT_PSM) -> str:
+    """
+    Run the tesseract CLI on a grayscale buffer.
+
+    The image is written to tesseract's stdin as a binary PGM: a short header
+    followed by the raw pixel rows, so the buffer is never re-encoded or saved to disk.
+    """
+    gray = np.ascontiguousarray(gray)
+    height, width = gray.shape[:2]
+    header = f"P5\n{width} {height}\n255\n".encode("ascii")
+
+    with subprocess.Popen(
+        _tesseract_args(psm),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    ) as proc:
+        try:
+            proc.stdin.write(header)
+            proc.stdin.write(memoryview(gray).cast("B"))
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        try:
+            stdout, stderr = proc.communicate(timeout=ServiceConfig.OCR_TIMEOUT_SECONDS)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"tesseract returned {proc.returncode}: {stderr.decode(errors='replace').strip()}"
+        )
+
+    return stdout.decode("utf-8", errors="replace")
+
+
+def recognize(gray: np.ndarray, psm: int = TESSERACT_PSM) -> str:
+    """
+    Recognize text in a grayscale buffer.
+
+    Uses a pooled in-process tesseract handle when tesserocr is installed and
+    falls back to the CLI otherwise. If the in-process engine cannot be
+    initialized it is disabled for the rest of the process; if it fails on
+    one image only that image goes to the CLI.
+    """
+    global _engine_disabled
+
+    pool = get_engine_pool(psm=psm)
+    if pool is not None:
+        try:
+            return pool.recognize(gray)
+        except EngineInitError as e:
+            if ServiceConfig.OCR_ENGINE == "tesserocr":
+                raise
+            logger.warning(f"In-process tesseract unavailable ({e}), using the CLI from now on")
+            _engine_disabled = True
+        except Exception as e:
+            if ServiceConfig.OCR_ENGINE == "tesserocr":
+                raise
+            logger.warning(
+                f"In-process tesseract failed on this image ({e}), retrying with the CLI"
+            )
+
+    return recognize_cli(gray, psm=psm)
+
+
+def ocr_image(gray: np.ndarray, scale: Optional[float] = None) -> str:
+    """
+    Deskew, preprocess and recognize a grayscale image.
+
+    With scale=None the resize factor is chosen from the detected text height;
+    callers that already control resolution (rendered PDF pages) pass 1.0.
+    """
+    angle, text_height = estimate_layout(gray)
+    deskewed = deskew(gray, angle)
+    if scale is None:
+        scale = scale_for_text_height(text_height)
+    processed = preprocess(deskewed, scale=scale)
+    return recognize(processed)
+
+
+def ocr_pixmap(pix) -> str:
+    """OCR a grayscale pymupdf pixmap through the shared pipeline."""
+    return ocr_image(pixmap_to_ndarray(pix), scale=1.0)
+
+
+def ocr_image_file(file_path: str, scale: Optional[float] = None) -> str:
+    """OCR an encoded image file through the shared pipeline."""
+    gray = decode_image_file(file_path)
+    if gray is None:
+        raise ValueError(f"Failed to decode image: {os.path.basename(file_path)}")
+    return ocr_image(gray, scale=scale)
@@ -0,0 +1,155 @@
+"""
+Progressive delivery of results while a task is still running.
+
+Without this, the JSON and Excel outputs only exist once every file has been
+converted and extracted, so on a large task users wait hours for the first
+row. Instead, results are collected as the LLM returns them, and every
+PARTIAL_RESULTS_EVERY_FILES new results or PARTIAL_RESULTS_INTERVAL_SECONDS
+(whichever comes first) a snapshot of everything finished so far is uploaded
+to aggregated-results:
+
+    <user_id>/<task_id>/<task_name>-partial.jsonl
+    <user_id>/<task_id>/<task_name>-partial.xlsx
+
+Their paths are reported through the task API (partialJsonFilePath and
+partialSheetFilePath) after the first upload. Rows are in completion order,
+not file order; the final outputs replace the snapshots when the task
+completes. A failed task keeps its last snapshot.
+"""
+
+import asyncio
+import io
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from config import MinioBuckets, ServiceConfig
+from utils import (
+    ExtractedFile,
+    ensure_bucket,
+    get_minio_client,
+    put_object_bytes,
+    update_parsing_task,
+    write_results_excel,
+)
+
+logger = logging.getLogger("resume-extractor.partial_results")
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _excel_bytes(rows: List[Dict[str, Any]]) -> bytes:
+    buffer = io.BytesIO()
+    write_results_excel(buffer, rows)
+    return buffer.getvalue()
+
+
+def _jsonl_bytes(rows: List[Dict[str, Any]]) -> bytes:
+    return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+class PartialResults:
+    """Collects a task's finished results and uploads snapshots in the background."""
+
+    def __init__(
+        self,
+        user_id: str,
+        task_id: str,
+        task_name: str,
+        duplicates: Optional[Dict[str, List[ExtractedFile]]] = None,
+    ):
+        self.task_id = task_id
+        self.json_path = f"{user_id}/{task_id}/{task_name}-partial.jsonl"
+        self.sheet_path = f"{user_id}/{task_id}/{task_name}-partial.xlsx"
+        self.rows: List[Dict[str, Any]] = []
+        self.uploads = 0
+        # Each duplicate gets its own row, as in the final results
+        self._copies = {path: 1 + len(group) for path, group in (duplicates or {}).items()}
+        self._new_rows = 0
+        self._last_upload = time.monotonic()
+        self._upload_task: Optional[asyncio.Task] = None
+        self._discarded = False
+
+    def add(self, path: str, data: Dict[str, Any]):
+        """Record the result of the file at path, uploading a snapshot when one is due."""
+        copies = self._copies.get(path, 1)
+        self.rows.extend([data] + [dict(data) for _ in range(copies - 1)])
+        self._new_rows += copies
+
+        due = (
+            self._new_rows >= ServiceConfig.PARTIAL_RESULTS_EVERY_FILES
+            or time.monotonic() - self._last_upload
+            >= ServiceConfig.PARTIAL_RESULTS_INTERVAL_SECONDS
+        )
+        # An upload still in progress picks up the new rows next time
+        if due and (self._upload_task is None or self._upload_task.done()):
+            self._new_rows = 0
+            self._last_upload = time.monotonic()
+            self._upload_task = asyncio.create_task(self._upload(list(self.rows)))
+
+    async def _upload(self, rows: List[Dict[str, Any]]):
+        loop = asyncio.get_event_loop()
+        try:
+            if self.uploads == 0:
+                await loop.run_in_executor(None, ensure_bucket, MinioBuckets.AGGREGATED_RESULTS)
+            json_data = await loop.run_in_executor(None, _jsonl_bytes, rows)
+            await loop.run_in_executor(
+                None,
+                put_object_bytes,
+                MinioBuckets.AGGREGATED_RESULTS,
+                self.json_path,
+                json_data,
+                "application/x-ndjson",
+            )
+            sheet_data = await loop.run_in_executor(None, _excel_bytes, rows)
+            await loop.run_in_executor(
+                None,
+                put_object_bytes,
+                MinioBuckets.AGGREGATED_RESULTS,
+                self.sheet_path,
+                sheet_data,
+                XLSX_CONTENT_TYPE,
+            )
+        except Exception as e:
+            # The next snapshot includes these rows again
+            logger.warning(f"Failed to upload partial results for task {self.task_id}: {e}")
+            return
+
+        self.uploads += 1
+        # Once discarded the snapshots are about to be deleted: don't report them
+        if self.uploads == 1 and not self._discarded:
+            await update_parsing_task(
+                self.task_id,
+                {"partialJsonFilePath": self.json_path, "partialSheetFilePath": self.sheet_path},
+            )
+        logger.info(f"Task {self.task_id}: uploaded partial results ({len(rows)} rows)")
+
+    async def close(self, discard: bool = False):
+        """
+        Wait for an upload in progress. With discard (the final results are
+        out), the snapshots are deleted; call it before the task is marked
+        completed so their paths are not reported afterwards.
+        """
+        self._discarded = discard
+        if self._upload_task is not None:
+            await asyncio.gather(self._upload_task, return_exceptions=True)
+        if not discard:
+            # Bring the snapshot up to date with everything that finished
+            if self.uploads and self._new_rows:
+                self._new_rows = 0
+                await self._upload(list(self.rows))
+            return
+        if self.uploads == 0:
+            return
+
+        client = get_minio_client()
+        loop = asyncio.get_event_loop()
+        for path in (self.json_path, self.sheet_path):
+            try:
+                await loop.run_in_executor(
+                    None, client.remove_object, MinioBuckets.AGGREGATED_RESULTS, path
+                )
+            except Exception as e:
+                logger.error(f"Failed to delete partial results {path}: {e}")
@@ -10,20 +10,45 @@ import time
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
-from config import ServiceConfig, SupportedExtensions, init_directories
-from converters import FileConverter
+from checkpoint import TaskCheckpoint
+from config import ServiceConfig, init_directories
+from converters import ConversionStats, FileConverter
 from extractor import get_extractor
+from fair_share import task_flow
+from metrics import TASK_FILES, TASK_SECONDS
+from partial_results import PartialResults
+from reprocess import (
+    delete_retry_objects,
+    is_empty_result,
+    load_aggregated_results,
+    load_retry_manifest,
+    retain_failed_files,
+    retain_failed_shard_files,
+    retry_download_dir,
+    save_retry_manifest,
+)
+from sharding import (
+    chunk_download_dir,
+    completed_chunks,
+    delete_shard_objects,
+    load_chunk_results,
+    load_manifest,
+    save_chunk_result,
+    should_shard,
+    start_sharded_task,
+)
+from task_report import TaskReport, summarize, upload_report
 from utils import (
     ExtractedFile,
+    FileStatus,
     ParseableFile,
-    ParsingTask,
     ProgressTracker,
     TaskStatus,
-    FileStatus,
     categorize_files,
     cleanup_directory,
     cleanup_files,
     convert_and_upload_excel,
+    dedupe_files,
     delete_archive_files_from_minio,
     delete_parseable_files_from_minio,
     download_archive_files,
@@ -36,8 +61,10 @@ from utils import (
     insert_parseable_files,
     mark_task_completed,
     mark_task_failed,
+    parseable_file_id,
     update_parsing_task,
     update_task_file_counts,
+    update_task_progress,
     upload_aggregated_json,
 )
 
@@ -70,6 +97,23 @@ class TaskProcessingResult:
     success: bool = True
     error: Optional[str] = None
     processing_time_seconds: float = 0.0
+    type_mismatches: int = 0
+    conversion_timeouts: int = 0
+    duplicate_files: int = 0
+    # Files whose results came from an earlier run's checkpoint
+    resumed_files: int = 0
+    # Time spent waiting for shared conversion/LLM slots behind other tasks
+    conversion_queue_seconds: float = 0.0
+    llm_queue_seconds: float = 0.0
+    # Chunks published in shard mode; results are uploaded by the aggregation step
+    shard_chunks: int = 0
+    # Results left empty, whose files are kept for a reprocessFailed run
+    failed_results: int = 0
+    # Empty results that a reprocessFailed run filled in
+    recovered_results: int = 0
+    # Performance report uploaded next to the results, and its summary
+    report_path: Optional[str] = None
+    report: Dict[str, Any] = field(default_factory=dict)
     results: List[Dict[str, Any]] = field(default_factory=list)
 
 
@@ -92,6 +136,38 @@ class ResumeProcessor:
         init_directories()
 
     async def process_task(
+        self,
+        user_id: str,
+        task_id: str,
+        extract_from_archive: bool = True,
+        reprocess_failed: bool = False,
+    ) -> TaskProcessingResult:
+        """
+        Process a complete resume extraction task, sharing conversion and LLM
+        capacity fairly with the other tasks running at the same time.
+
+        With reprocess_failed, only the files of a completed task whose
+        results were empty are processed again.
+        """
+        started = time.monotonic()
+        try:
+            with task_flow(task_id, user_id) as flow:
+                if reprocess_failed:
+                    result = await self._reprocess_failed(user_id, task_id)
+                else:
+                    result = await self._process_task(user_id, task_id, extract_from_archive)
+        except asyncio.CancelledError:
+            TASK_SECONDS.labels("interrupted").observe(time.monotonic() - started)
+            raise
+        self._record_metrics(result, reprocess_failed, time.monotonic() - started)
+
+        result.conversion_queue_seconds = flow.wait_seconds.get("conversion", 0.0)
+        result.llm_queue_seconds = flow.wait_seconds.get("llm", 0.0)
+        if flow.wait_seconds:
+            logger.info(f"Task {task_id} queue wait: {flow.wait_summary()}")
+        return result
+
+    async def _process_task(
         self, user_id: str, task_id: str, extract_from_archive: bool = True
     ) -> TaskProcessingResult:
         """
@@ -116,14 +192,23 @@ class ResumeProcessor:
         )
 
         extraction_dir = None
+        checkpoint: Optional[TaskCheckpoint] = None
+        partial: Optional[PartialResults] = None
+        sharded = False
+        interrupted = False
         archive_paths = []
         archive_object_names = []
         parseable_files_api = []
+        valid_files: List[ExtractedFile] = []
+        # Set once the task is being processed, i.e. is due a report
+        task_name: Optional[str] = None
+        report = TaskReport(task_id)
 
         try:
             logger.info(f"Starting task processing: {task_id} (archive={extract_from_archive})")
 
             # Step 1: Fetch task details
+            report.begin("setup")
             task = await fetch_parsing_task(task_id)
             logger.info(f"Task details: {task.task_name}, status: {task.task_status.value}")
 
@@ -141,6 +226,7 @@ class ResumeProcessor:
                 await update_parsing_task(
                     task_id, {"taskStatus": TaskStatus.EXTRACTING.value, "errorMessage": None}
                 )
+            task_name = task.task_name
 
             # Step 2: Fetch extraction config (prompt + field keys)
             extraction_prompt, field_keys = await fetch_extraction_config(task_id)
@@ -152,6 +238,7 @@ class ResumeProcessor:
             if extract_from_archive:
                 # Archive flow: download archives and extract
                 logger.info("Downloading archive files...")
+                report.begin("download")
                 archive_paths, archive_object_names = await download_archive_files(user_id, task_id)
                 logger.info(f"Downloaded {len(archive_paths)} archive(s)")
 
@@ -160,8 +247,10 @@ class ResumeProcessor:
 
                 # Extract archives
                 logger.info("Extracting archives...")
+                report.begin("archive_extraction")
                 extraction_dir, extracted_files = await extract_archives(task_id, archive_paths)
                 logger.info(f"Extracted {len(extracted_files)} files")
+                report.begin("preparation")
 
                 # Categorize files (valid vs invalid)
                 valid_files, invalid_files = categorize_files(extracted_files)
@@ -179,6 +268,7 @@ class ResumeProcessor:
             else:
                 # Direct files flow: fetch from API and download from parseable-files bucket
                 logger.info("Fetching parseable files from API...")
+                report.begin("download")
                 parseable_files_api = await fetch_parseable_files_from_api(task_id)
 
                 if not parseable_files_api:
@@ -189,6 +279,7 @@ class ResumeProcessor:
                 # Download individual files
                 extraction_dir = os.path.join(ServiceConfig.EXTRACTION_DIR, f"task-{task_id}")
                 extracted_files = await download_parseable_files(task_id, parseable_files_api)
+                report.begin("preparation")
 
                 # All files from API are already validated, categorize anyway for consistency
                 valid_files, invalid_files = categorize_files(extracted_files)
@@ -201,13 +292,65 @@ class ResumeProcessor:
             # Step 4: Process all files
             if valid_files:
                 logger.info(f"Processing {len(valid_files)} files...")
+                unique_files, duplicates = dedupe_files(valid_files)
+                result.duplicate_files = len(valid_files) - len(unique_files)
+                if result.duplicate_files:
+                    saved_bytes = sum(f.size for group in duplicates.values() for f in group)
+                    logger.info(
+                        f"Task {task_id}: {result.duplicate_files} duplicate file(s) "
+                        f"({saved_bytes / (1024 * 1024):.1f}MB) share content with "
+                        f"{len(duplicates)} other file(s); skipping "
+                        f"{result.duplicate_files} conversion(s) and LLM call(s)"
+                    )
+
+            if valid_files and should_shard(len(unique_files)):
+                # Shard mode: other replicas convert and extract the chunks,
+                # and the aggregation step uploads the results
+                sharded = True
+                result.shard_chunks = await start_sharded_task(
+                    user_id,
+                    task_id,
+                    task.task_name,
+                    valid_files,
+                    unique_files,
+                    duplicates,
+                    archive_object_names,
+                    parseable_files_api,
+                )
+                logger.info(
+                    f"Task {task_id} sharded into {result.shard_chunks} chunk(s) "
+                    f"of up to {ServiceConfig.SHARD_SIZE} files"
+                )
+
+            elif valid_files:
+                # Files finished by an earlier, interrupted run are skipped
+                if ServiceConfig.CHECKPOINT_ENABLED:
+                    checkpoint = TaskCheckpoint(task_id)
+                    result.resumed_files = await checkpoint.load()
+                if ServiceConfig.PARTIAL_RESULTS_ENABLED:
+                    partial = PartialResults(user_id, task_id, task.task_name, duplicates)
+
+                conversion_stats = report.conversion
                 results = await self._process_files(
-                    valid_files, extraction_prompt, field_keys, task_id
+                    valid_files,
+                    extraction_prompt,
+                    field_keys,
+                    task_id,
+                    conversion_stats,
+                    unique_files=unique_files,
+                    duplicates=duplicates,
+                    checkpoint=checkpoint,
+                    partial=partial,
+                    report=report,
                 )
                 result.results = results
                 result.processed_files = len(results)
+                result.type_mismatches = conversion_stats.type_mismatches
+                result.conversion_timeouts = conversion_stats.timeouts
+                self._log_conversion_stats(task_id, conversion_stats)
 
             # Step 5: Upload results
+            report.begin("upload")
             if result.results:
                 logger.info("Uploading results...")
 
@@ -222,11 +365,38 @@ class ResumeProcessor:
                 )
 
             # Step 6: Mark task completed
+            report.begin("finalize")
             if result.json_path and result.sheet_path:
+                # Before completing, so a snapshot upload still in flight
+                # cannot report its paths on the completed task
+                if partial is not None:
+                    await partial.close(discard=True)
+                    partial = None
                 await mark_task_completed(task_id, result.json_path, result.sheet_path)
+                if checkpoint is not None:
+                    await checkpoint.delete()
+                result.failed_results = await self._retain_failed(
+                    task_id, valid_files, result.results, duplicates
+                )
 
             result.success = True
-            logger.info(f"Task {task_id} completed successfully")
+            if sharded:
+                logger.info(f"Task {task_id} handed off to shard workers")
+            else:
+                logger.info(f"Task {task_id} completed successfully")
+
+        except asyncio.CancelledError:
+            # Interrupted by a drain: keep the sources and save the checkpoint
+            # so the requeued task resumes on another replica
+            result.success = False
+            result.error = "Interrupted by shutdown"
+            interrupted = True
+            logger.warning(f"Task {task_id} interrupted; saving progress")
+            if checkpoint is not None:
+                await checkpoint.flush()
+            if sharded and not result.shard_chunks:
+                await delete_shard_objects(task_id)
+            raise
 
         except Exception as e:
             result.success = False
@@ -235,10 +405,16 @@ class ResumeProcessor:
 
             # Mark task as failed
             await mark_task_failed(task_id, str(e))
+            if sharded:
+                await delete_shard_objects(task_id)
 
         finally:
             # Cleanup
             result.processing_time_seconds = time.time() - start_time
+            report.begin("cleanup")
+
+            if partial is not None:
+                await partial.close()
 
             # Clean up archive files (archive flow)
             await cleanup_files(archive_paths)
@@ -247,15 +423,24 @@ class ResumeProcessor:
             if extraction_dir:
                 await cleanup_directory(extraction_dir)
 
-            # Delete source files from MinIO
-            if extract_from_archive and archive_object_names:
+            # Delete source files from MinIO once the task has completed. A failed
+            # task keeps them (and its checkpoint) so a rerun can resume; a sharded
+            # task's are deleted by the aggregation step.
+            delete_sources = result.success and not sharded
+            if extract_from_archive and archive_object_names and delete_sources:
                 await delete_archive_files_from_minio(archive_object_names)
-            elif not extract_from_archive and parseable_files_api:
+            elif not extract_from_archive and parseable_files_api and delete_sources:
                 await delete_parseable_files_from_minio(parseable_files_api)
 
+            if task_name is not None and not sharded and not interrupted:
+                await self._report(user_id, task_id, task_name, result, report, valid_files)
+
             logger.info(
                 f"Task {task_id} finished in {result.processing_time_seconds:.2f}s. "
                 f"Processed: {result.processed_files}/{result.total_files}"
+                f" ({result.resumed_files} resumed), "
+                f"type mismatches: {result.type_mismatches}, "
+                f"conversion timeouts: {result.conversion_timeouts}"
             )
 
         return result
@@ -266,31 +451,150 @@ class ResumeProcessor:
         extraction_prompt: str,
         field_keys: List[str],
         task_id: str,
+        conversion_stats: Optional[ConversionStats] = None,
+        unique_files: Optional[List[ExtractedFile]] = None,
+        duplicates: Optional[Dict[str, List[ExtractedFile]]] = None,
+        checkpoint: Optional[TaskCheckpoint] = None,
+        partial: Optional[PartialResults] = None,
+        report: Optional[TaskReport] = None,
     ) -> List[Dict[str, Any]]:
+        """
+        Convert and LLM-extract files, returning one result per input file.
+
+        When unique_files/duplicates (from dedupe_files) are given, only the
+        unique files are converted and extracted; each duplicate gets a copy of
+        its representative's result in its own position in the output.
+        Finished files are recorded in the checkpoint, and added to the
+        partial results, if given. A report times the conversion and LLM
+        stages and collects the LLM stats.
+        """
         total_files = len(files)
         progress = ProgressTracker(task_id, total_files)
+        if unique_files is None:
+            unique_files, duplicates = files, {}
+
+        data_by_path = await self._extract_files(
+            unique_files,
+            extraction_prompt,
+            field_keys,
+            conversion_stats,
+            progress,
+            checkpoint,
+            partial,
+            report,
+        )
+
+        # Duplicates finish with their representative
+        duplicate_count = sum(len(group) for group in duplicates.values())
+        if duplicate_count:
+            await progress.increment(duplicate_count)
+
+        # Combine results with original file info, copying each result to its duplicates
+        representative_of = {
+            f.local_path: representative
+            for representative, group in duplicates.items()
+            for f in group
+        }
+
+        # One result per input file, so positions line up with files
+        final_results = []
+        for f in files:
+            data = data_by_path.get(representative_of.get(f.local_path, f.local_path))
+            if data is None:
+                data = self.extractor.empty_response(field_keys)
+            final_results.append(dict(data) if f.local_path in representative_of else data)
+
+        return final_results
+
+    async def _extract_files(
+        self,
+        unique_files: List[ExtractedFile],
+        extraction_prompt: str,
+        field_keys: List[str],
+        conversion_stats: Optional[ConversionStats] = None,
+        progress: Optional[ProgressTracker] = None,
+        checkpoint: Optional[TaskCheckpoint] = None,
+        partial: Optional[PartialResults] = None,
+        report: Optional[TaskReport] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Convert and LLM-extract files, returning extracted data by local path.
+
+        With a checkpoint, files it already has results for are skipped, files
+        it has text for skip conversion, and each new result is recorded.
+        Every result, resumed or new, is added to the partial results.
+        """
+        data_by_path: Dict[str, Dict[str, Any]] = {}
+        texts: Dict[str, str] = {}
+        to_convert = unique_files
+        if checkpoint is not None:
+            to_convert = []
+            for f in unique_files:
+                entry = checkpoint.get(f)
+                if entry and entry.data is not None:
+                    data_by_path[f.local_path] = entry.data
+                elif entry and entry.text:
+                    texts[f.local_path] = entry.text
+                else:
+                    to_convert.append(f)
+            if data_by_path or texts:
+                logger.info(
+                    f"Resuming from checkpoint: {len(data_by_path)} file(s) done, "
+                    f"{len(texts)} converted, {len(to_convert)} to convert"
+                )
+            if data_by_path and progress is not None:
+                await progress.increment(len(data_by_path))
+            if report is not None:
+                # The checkpoint only holds non-empty texts and results
+                report.cache_hits.update(
+                    checkpoint_results=len(data_by_path), checkpoint_texts=len(texts)
+                )
+        if partial is not None:
+            for path, data in data_by_path.items():
+                partial.add(path, data)
+
+        files_by_path = {f.local_path: f for f in unique_files}
+
+        async def on_converted(path: str, text: str):
+            # Empty texts and results are not recorded, so a restart retries those files
+            await checkpoint.record_text(files_by_path[path], text)
+
+        async def on_extracted(path: str, data: Dict[str, Any]):
+            if checkpoint is not None:
+                await checkpoint.record_result(files_by_path[path], data)
+            if partial is not None:
+                partial.add(path, data)
 
         logger.info("Stage 1: Converting files to text...")
-        file_paths = [f.local_path for f in files]
+        if report is not None:
+            report.begin("conversion")
         text_results = await FileConverter.convert_batch(
-            file_paths, concurrency=ServiceConfig.FILE_PROCESSING_CONCURRENCY
+            [f.local_path for f in to_convert],
+            concurrency=ServiceConfig.FILE_PROCESSING_CONCURRENCY,
+            stats=conversion_stats,
+            on_converted=on_converted if checkpoint is not None else None,
         )
+        texts.update(text_results)
 
         resume_texts = []
-        for f in files:
-            text = text_results.get(f.local_path, "")
+        for f in unique_files:
+            if f.local_path in data_by_path:
+                continue
             resume_texts.append(
                 {
                     "id": f.local_path,
-                    "text": text,
+                    "text": texts.get(f.local_path, ""),
                     "original_name": f.original_name,
                 }
             )
 
         logger.info("Stage 2: Extracting resume data with LLM...")
+        if report is not None:
+            report.begin("llm_extraction")
 
         async def progress_callback(completed: int, total: int):
-            await progress.increment()
+            if progress is not None:
+                await progress.increment()
             if completed % 50 == 0 or completed == total:
                 logger.info(f"LLM extraction progress: {completed}/{total}")
 
@@ -299,14 +603,297 @@ class ResumeProcessor:
             resume_texts,
             field_keys,
             progress_callback=progress_callback,
+            result_callback=(
+                on_extracted if checkpoint is not None or partial is not None else None
+            ),
+            stats=report.llm if report is not None else None,
         )
+        data_by_path.update({item["id"]: item["data"] for item in extraction_results})
 
-        # Combine results with original file info
-        final_results = []
-        for item in extraction_results:
-            final_results.append(item["data"])
+        if checkpoint is not None:
+            await checkpoint.flush()
+        return data_by_path
 
-        return final_results
+    # ========================================================================
+    # Shard Mode
+    # ========================================================================
+
+    async def process_chunk(self, user_id: str, task_id: str, chunk: int):
+        """
+        Convert and extract one chunk of a sharded task, then run the
+        aggregation step if this was the last chunk to finish.
+        """
+        task = await fetch_parsing_task(task_id)
+        if task.task_status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+            logger.info(f"Task {task_id} is {task.task_status.value}, skipping chunk {chunk}")
+            return
+
+        manifest = await load_manifest(task_id)
+        records = manifest["chunks"][chunk]
+        extraction_prompt, field_keys = await fetch_extraction_config(task_id)
+
+        download_dir = chunk_download_dir(task_id, chunk)
+        try:
+            files = await download_parseable_files(task_id, records, download_dir=download_dir)
+            conversion_stats = ConversionStats()
+            with task_flow(task_id, user_id):
+                data_by_path = await self._extract_files(
+                    files, extraction_prompt, field_keys, conversion_stats
+                )
+            self._log_conversion_stats(task_id, conversion_stats)
+        finally:
+            await cleanup_directory(download_dir)
+
+        # Key results by shard object; files that failed to download get empty results
+        data_by_object = {
+            record["filePath"]: data_by_path.get(
+                os.path.join(download_dir, os.path.basename(record["filePath"])),
+                self.extractor.empty_response(field_keys),
+            )
+            for record in records
+        }
+        await save_chunk_result(task_id, chunk, data_by_object)
+
+        done = await completed_chunks(task_id)
+        logger.info(f"Task {task_id} chunk {chunk} done ({len(done)}/{len(manifest['chunks'])})")
+
+        # Progress counts every input file, so duplicates count with their representative
+        done_objects = {
+            record["filePath"] for index in done for record in manifest["chunks"][index]
+        }
+        await update_task_progress(
+            task_id, sum(1 for name in manifest["order"] if name in done_objects)
+        )
+
+        if len(done) == len(manifest["chunks"]):
+            await self._aggregate_shards(manifest)
+
+    async def _aggregate_shards(self, manifest: Dict[str, Any]):
+        """Merge a sharded task's chunk results in input order and upload the outputs."""
+        task_id = manifest["taskId"]
+        user_id = manifest["userId"]
+        try:
+            task = await fetch_parsing_task(task_id)
+            if task.task_status == TaskStatus.COMPLETED:
+                logger.info(f"Task {task_id} already aggregated")
+                return
+
+            data_by_object = await load_chunk_results(task_id, len(manifest["chunks"]))
+            results = []
+            seen = set()
+            for name in manifest["order"]:
+                data = data_by_object.get(name, {})
+                # Duplicates get their own copy of the representative's result
+                results.append(dict(data) if name in seen else data)
+                seen.add(name)
+
+            json_path = await upload_aggregated_json(
+                user_id, task_id, manifest["taskName"], results
+            )
+            sheet_path = await convert_and_upload_excel(
+                user_id, task_id, manifest["taskName"], results
+            )
+            await mark_task_completed(task_id, json_path, sheet_path)
+            logger.info(
+                f"Task {task_id} aggregated {len(results)}/{manifest['totalFiles']} results "
+                f"from {len(manifest['chunks'])} chunk(s)"
+            )
+        except Exception as e:
+            # A concurrent aggregation may have finished first and removed the chunk results
+            task = await fetch_parsing_task(task_id)
+            if task.task_status == TaskStatus.COMPLETED:
+                logger.info(f"Task {task_id} was aggregated by another replica")
+                return
+            # Sources and chunk results are kept so the task can be rerun
+            logger.exception(f"Aggregation of task {task_id} failed: {e}")
+            await mark_task_failed(task_id, str(e))
+            return
+
+        # Shard files with empty results are kept for a reprocessFailed run
+        keep = set()
+        try:
+            original_names = {
+                record["filePath"]: record["originalName"]
+                for chunk in manifest["chunks"]
+                for record in chunk
+            }
+            keep = await retain_failed_shard_files(
+                task_id, manifest["order"], results, original_names
+            )
+        except Exception as e:
+            logger.error(f"Failed to record empty results of task {task_id} for reprocessing: {e}")
+
+        if manifest["archiveObjects"]:
+            await delete_archive_files_from_minio(manifest["archiveObjects"])
+        elif manifest["parseableFiles"]:
+            await delete_parseable_files_from_minio(manifest["parseableFiles"])
+        await delete_shard_objects(task_id, keep=keep)
+
+    # ========================================================================
+    # Reprocessing Failed Files
+    # ========================================================================
+
+    async def _retain_failed(
+        self,
+        task_id: str,
+        files: List[ExtractedFile],
+        results: List[Dict[str, Any]],
+        duplicates: Dict[str, List[ExtractedFile]],
+    ) -> int:
+        """Keep the sources of empty results for a reprocessFailed run; never fails the task."""
+        try:
+            return await retain_failed_files(task_id, files, results, duplicates)
+        except Exception as e:
+            logger.error(f"Failed to record empty results of task {task_id} for reprocessing: {e}")
+            return 0
+
+    async def _reprocess_failed(self, user_id: str, task_id: str) -> TaskProcessingResult:
+        """
+        Convert and extract again only the files whose results were empty,
+        and merge the new results into the task's JSON and Excel in place.
+
+        A failed attempt leaves the existing outputs and the task's completed
+        status untouched.
+        """
+        start_time = time.time()
+        result = TaskProcessingResult(
+            task_id=task_id,
+            user_id=user_id,
+            total_files=0,
+            processed_files=0,
+            invalid_files=0,
+        )
+        download_dir = retry_download_dir(task_id)
+
+        try:
+            task = await fetch_parsing_task(task_id)
+            if task.task_status != TaskStatus.COMPLETED or not task.json_file_path:
+                raise Exception(
+                    f"Task is {task.task_status.value}; only completed tasks can be reprocessed"
+                )
+            result.json_path = task.json_file_path
+            result.sheet_path = task.sheet_file_path
+
+            entries = await load_retry_manifest(task_id)
+            if not entries:
+                logger.info(f"Task {task_id} has no empty results to reprocess")
+                return result
+
+            extraction_prompt, field_keys = await fetch_extraction_config(task_id)
+            results = await load_aggregated_results(task.json_file_path)
+            result.total_files = sum(len(entry["indices"]) for entry in entries)
+            logger.info(
+                f"Reprocessing {len(entries)} file(s) with {result.total_files} empty result(s) "
+                f"of task {task_id}"
+            )
+
+            files = await download_parseable_files(task_id, entries, download_dir=download_dir)
+            conversion_stats = ConversionStats()
+            data_by_path = await self._extract_files(
+                files, extraction_prompt, field_keys, conversion_stats
+            )
+            self._log_conversion_stats(task_id, conversion_stats)
+
+            recovered = []
+            remaining = []
+            for entry in entries:
+                local_path = os.path.join(download_dir, os.path.basename(entry["filePath"]))
+                data = data_by_path.get(local_path)
+                if is_empty_result(data):
+                    remaining.append(entry)
+                    continue
+                for n, index in enumerate(entry["indices"]):
+                    results[index] = dict(data) if n else data
+                recovered.append(entry)
+                result.recovered_results += len(entry["indices"])
+
+            result.processed_files = result.total_files
+            result.failed_results = result.total_files - result.recovered_results
+            if recovered:
+                # Same task name, so the outputs are replaced in place
+                result.json_path = await upload_aggregated_json(
+                    user_id, task_id, task.task_name, results
+                )
+                result.sheet_path = await convert_and_upload_excel(
+                    user_id, task_id, task.task_name, results
+                )
+                await mark_task_completed(task_id, result.json_path, result.sheet_path)
+
+            await save_retry_manifest(task_id, remaining)
+            await delete_retry_objects(recovered)
+            result.results = results
+            result.success = True
+            logger.info(
+                f"Task {task_id} reprocessing recovered {result.recovered_results}/"
+                f"{result.total_files} result(s); {result.failed_results} still empty"
+            )
+
+        except Exception as e:
+            result.success = False
+            result.error = str(e)
+            logger.exception(f"Reprocessing failed files of task {task_id} failed: {e}")
+
+        finally:
+            result.processing_time_seconds = time.time() - start_time
+            await cleanup_directory(download_dir)
+
+        return result
+
+    @staticmethod
+    def _record_metrics(result: TaskProcessingResult, reprocess_failed: bool, seconds: float):
+        if not result.success:
+            outcome = "failed"
+        elif result.shard_chunks:
+            outcome = "sharded"
+        else:
+            outcome = "reprocessed" if reprocess_failed else "completed"
+        TASK_SECONDS.labels(outcome).observe(seconds)
+
+        for kind, count in (
+            ("processed", result.processed_files),
+            ("invalid", result.invalid_files),
+            ("duplicate", result.duplicate_files),
+            ("resumed", result.resumed_files),
+            ("failed_result", result.failed_results),
+        ):
+            if count:
+                TASK_FILES.labels(kind).inc(count)
+
+    @staticmethod
+    async def _report(
+        user_id: str,
+        task_id: str,
+        task_name: str,
+        result: TaskProcessingResult,
+        report: TaskReport,
+        files: List[ExtractedFile],
+    ):
+        """Attach the task's report summary to the result and upload the full report."""
+        full = report.build(result, {f.local_path: f.original_name for f in files})
+        result.report = summarize(full)
+        slowest = full["slowest_files"][0]["name"] if full["slowest_files"] else None
+        logger.info(f"Task {task_id} stages: {result.report['stages']}; slowest file: {slowest}")
+        if ServiceConfig.TASK_REPORT_ENABLED:
+            result.report_path = await upload_report(user_id, task_id, task_name, full)
+
+    def _log_conversion_stats(self, task_id: str, stats: ConversionStats):
+        """Log conversion latency percentiles, timeouts and extension mismatches for a task."""
+        latency = stats.latency_percentiles()
+        if latency:
+            logger.info(
+                f"Task {task_id} conversion latency over {len(stats.durations)} files: "
+                + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in latency.items())
+            )
+        if stats.timeouts:
+            logger.warning(
+                f"Task {task_id}: {stats.timeouts} file(s) timed out during conversion: "
+                f"{stats.timed_out_files}"
+            )
+        if stats.type_mismatches:
+            logger.info(
+                f"{stats.type_mismatches} file(s) had content not matching "
+                f"their extension: {stats.mismatch_kinds}"
+            )
 
     def _create_parseable_file_records(
         self,
@@ -328,6 +915,7 @@ class ResumeProcessor:
                     size=f.size,
                     status=FileStatus.PENDING,
                     parsing_task_id=task_id,
+                    id=parseable_file_id(task_id, f.local_path),
                 )
             )
 
@@ -347,6 +935,12 @@ def get_processor() -> ResumeProcessor:
 
 
 async def process_task(
-    user_id: str, task_id: str, extract_from_archive: bool = True
+    user_id: str, task_id: str, extract_from_archive: bool = True, reprocess_failed: bool = False
 ) -> TaskProcessingResult:
-    return await get_processor().process_task(user_id, task_id, extract_from_archive)
+    return await get_processor().process_task(
+        user_id, task_id, extract_from_archive, reprocess_failed
+    )
+
+
+async def process_chunk(user_id: str, task_id: str, chunk: int):
+    await get_processor().process_chunk(user_id, task_id, chunk)
@@ -0,0 +1,194 @@
+"""
+Reprocessing of the failed subset of a completed task.
+
+When a task completes, files whose result is empty (conversion produced no
+text, or the LLM gave up and returned an empty response) are kept in MinIO
+under parseable-files/retry/<task_id>/, and a retry manifest listing them and
+their positions in the aggregated results is written to processed-json-files.
+
+A message with "reprocessFailed": true then converts and extracts only those
+files again and merges the new results into the existing JSON and Excel in
+place. Files that are still empty stay in the manifest for a later attempt.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set
+
+import orjson
+
+from config import MinioBuckets, ServiceConfig
+from utils import (
+    ExtractedFile,
+    cuid2_generator,
+    ensure_bucket,
+    get_minio_client,
+    get_object_bytes,
+    put_object_bytes,
+)
+
+logger = logging.getLogger("resume-extractor.reprocess")
+
+
+def _manifest_key(task_id: str) -> str:
+    return f"{task_id}/retry.json"
+
+
+def is_empty_result(data: Optional[Dict[str, Any]]) -> bool:
+    """Whether an extraction result carries no field values at all."""
+    if not data:
+        return True
+    return all(value in (None, "", [], {}) for value in data.values())
+
+
+def failed_indices(results: List[Dict[str, Any]]) -> Set[int]:
+    return {i for i, data in enumerate(results) if is_empty_result(data)}
+
+
+def retry_download_dir(task_id: str) -> str:
+    return os.path.join(ServiceConfig.EXTRACTION_DIR, f"task-{task_id}-retry")
+
+
+async def load_retry_manifest(task_id: str) -> List[Dict[str, Any]]:
+    """Entries still awaiting reprocessing, or an empty list if there are none."""
+    loop = asyncio.get_event_loop()
+    try:
+        data = await loop.run_in_executor(
+            None, get_object_bytes, MinioBuckets.PROCESSED_JSON_FILES, _manifest_key(task_id)
+        )
+    except Exception as e:
+        logger.debug(f"No retry manifest for task {task_id}: {e}")
+        return []
+    return orjson.loads(data)
+
+
+async def save_retry_manifest(task_id: str, entries: List[Dict[str, Any]]):
+    """Write the manifest, or remove it when nothing is left to retry."""
+    loop = asyncio.get_event_loop()
+    client = get_minio_client()
+    if not entries:
+        await loop.run_in_executor(
+            None, client.remove_object, MinioBuckets.PROCESSED_JSON_FILES, _manifest_key(task_id)
+        )
+        return
+    await loop.run_in_executor(None, ensure_bucket, MinioBuckets.PROCESSED_JSON_FILES)
+    await loop.run_in_executor(
+        None,
+        put_object_bytes,
+        MinioBuckets.PROCESSED_JSON_FILES,
+        _manifest_key(task_id),
+        orjson.dumps(entries),
+    )
+
+
+async def delete_retry_objects(entries: List[Dict[str, Any]]):
+    client = get_minio_client()
+    loop = asyncio.get_event_loop()
+    for entry in entries:
+        try:
+            await loop.run_in_executor(
+                None, client.remove_object, entry["bucketName"], entry["filePath"]
+            )
+        except Exception as e:
+            logger.error(f"Failed to delete retry file {entry['filePath']}: {e}")
+
+
+async def retain_failed_files(
+    task_id: str,
+    files: List[ExtractedFile],
+    results: List[Dict[str, Any]],
+    duplicates: Dict[str, List[ExtractedFile]],
+) -> int:
+    """
+    Keep the sources of files with empty results for a later reprocessing run.
+
+    results must line up with files. Byte-identical duplicates share one
+    retained file, listing every position it fills. Returns the number of
+    positions left to retry.
+    """
+    failed = failed_indices(results)
+    if not failed:
+        await save_retry_manifest(task_id, [])
+        return 0
+
+    representative_of = {
+        f.local_path: representative for representative, group in duplicates.items() for f in group
+    }
+    indices_by_source: Dict[str, List[int]] = {}
+    first_by_source: Dict[str, ExtractedFile] = {}
+    for i in sorted(failed):
+        f = files[i]
+        source = representative_of.get(f.local_path, f.local_path)
+        indices_by_source.setdefault(source, []).append(i)
+        first_by_source.setdefault(source, f)
+
+    client = get_minio_client()
+    loop = asyncio.get_event_loop()
+    entries = []
+    for source, indices in indices_by_source.items():
+        f = first_by_source[source]
+        object_name = f"retry/{task_id}/{cuid2_generator()}{f.extension}"
+        try:
+            await loop.run_in_executor(
+                None, client.fput_object, MinioBuckets.PARSEABLE_FILES, object_name, source
+            )
+        except Exception as e:
+            logger.error(f"Failed to retain {f.original_name} for reprocessing: {e}")
+            continue
+        entries.append(
+            {
+                "bucketName": MinioBuckets.PARSEABLE_FILES,
+                "filePath": object_name,
+                "originalName": f.original_name,
+                "indices": indices,
+            }
+        )
+
+    await save_retry_manifest(task_id, entries)
+    logger.info(
+        f"Task {task_id}: kept {len(entries)} file(s) with empty results "
+        f"({len(failed)} result(s)) for reprocessing"
+    )
+    return len(failed)
+
+
+async def retain_failed_shard_files(
+    task_id: str,
+    order: List[str],
+    results: List[Dict[str, Any]],
+    original_names: Dict[str, str],
+) -> Set[str]:
+    """
+    Keep the shard objects of a sharded task's empty results for reprocessing.
+
+    order gives the shard object of each position in results. Returns the
+    object names to spare when the task's shard objects are deleted.
+    """
+    indices_by_object: Dict[str, List[int]] = {}
+    for i in sorted(failed_indices(results)):
+        indices_by_object.setdefault(order[i], []).append(i)
+
+    entries = [
+        {
+            "bucketName": MinioBuckets.PARSEABLE_FILES,
+            "filePath": name,
+            "originalName": original_names.get(name, os.path.basename(name)),
+            "indices": indices,
+        }
+        for name, indices in indices_by_object.items()
+    ]
+    await save_retry_manifest(task_id, entries)
+    if entries:
+        logger.info(
+            f"Task {task_id}: kept {len(entries)} shard file(s) with empty results for reprocessing"
+        )
+    return set(indices_by_object)
+
+
+async def load_aggregated_results(json_path: str) -> List[Dict[str, Any]]:
+    loop = asyncio.get_event_loop()
+    data = await loop.run_in_executor(
+        None, get_object_bytes, MinioBuckets.AGGREGATED_RESULTS, json_path
+    )
+    return orjson.loads(data)
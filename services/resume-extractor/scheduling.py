@@ -0,0 +1,126 @@
+"""
+Cost-aware ordering of file conversions within a task.
+
+Each file is probed cheaply (content sniff, and for PDFs the page count and
+scanned/text classification) and given an estimated conversion time from a
+per-class rate model. The batch is then dispatched longest-first (LPT) so the
+expensive files start early and do not set the makespan, with small files
+interleaved between the large ones so short jobs fill the gaps and progress
+keeps moving. Observed conversion times feed back into the rates (EWMA), so
+the estimates calibrate to the actual hardware and OCR engine.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from config import ServiceConfig
+
+logger = logging.getLogger("resume-extractor.scheduling")
+
+# Starting seconds per cost unit for each file class, before any calibration.
+# Units are pages for PDFs, and 1 + size in MB for everything else.
+DEFAULT_RATES = {
+    "pdf-text": 0.05,
+    "pdf-scanned": 2.0,
+    "pdf-unknown": 0.3,
+    "image": 2.5,
+    "doc": 5.0,
+    "docx": 0.2,
+    "rtf": 0.05,
+    "text": 0.01,
+    "unknown": 0.1,
+}
+
+
+@dataclass
+class FileJob:
+    """A probed file awaiting conversion."""
+
+    file_path: str
+    file_type: str
+    content_format: Optional[str]
+    size: int
+    page_count: Optional[int] = None
+    scanned: Optional[bool] = None
+    # PDFProfile from the probe, handed to the PDF converter so it is not recomputed
+    profile: Any = None
+    # The probe itself ran past the file's deadline
+    timed_out: bool = False
+    estimate: float = 0.0
+
+    @property
+    def cost_class(self) -> str:
+        if self.file_type == "pdf":
+            if self.scanned is None:
+                return "pdf-unknown"
+            return "pdf-scanned" if self.scanned else "pdf-text"
+        if self.file_type == "word":
+            return "doc" if self.content_format == "doc" else "docx"
+        return self.file_type if self.file_type in DEFAULT_RATES else "unknown"
+
+    @property
+    def cost_units(self) -> float:
+        if self.file_type == "pdf" and self.page_count:
+            return float(self.page_count)
+        return 1.0 + self.size / (1024 * 1024)
+
+
+class CostModel:
+    """Per-class seconds-per-unit rates, updated from observed conversion times."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self._rates: Dict[str, float] = dict(DEFAULT_RATES)
+        self._observations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def estimate(self, job: FileJob) -> float:
+        with self._lock:
+            rate = self._rates.get(job.cost_class, DEFAULT_RATES["unknown"])
+        return rate * job.cost_units
+
+    def observe(self, job: FileJob, seconds: float):
+        """Fold one observed conversion time into its class rate."""
+        observed_rate = seconds / job.cost_units
+        with self._lock:
+            cost_class = job.cost_class
+            current = self._rates.get(cost_class, DEFAULT_RATES["unknown"])
+            self._rates[cost_class] = current + self.alpha * (observed_rate - current)
+            self._observations[cost_class] = self._observations.get(cost_class, 0) + 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {k: v for k, v in self._rates.items() if k in self._observations}
+
+
+def lpt_interleaved(jobs: List[FileJob]) -> List[FileJob]:
+    """
+    Order jobs longest-first, slotting the cheapest remaining job after each
+    expensive one (e.g. 50-page scan, 1KB txt, 20-page scan, 2KB rtf, ...).
+    The big jobs still start in LPT order; the small ones fill in between.
+    """
+    ordered = sorted(jobs, key=lambda job: job.estimate, reverse=True)
+    result = []
+    low, high = 0, len(ordered) - 1
+    while low <= high:
+        result.append(ordered[low])
+        low += 1
+        if low <= high:
+            result.append(ordered[high])
+            high -= 1
+    return result
+
+
+_cost_model: Optional[CostModel] = None
+_cost_model_lock = threading.Lock()
+
+
+def get_cost_model() -> CostModel:
+    """Get or create the process-wide cost model."""
+    global _cost_model
+    with _cost_model_lock:
+        if _cost_model is None:
+            _cost_model = CostModel(alpha=ServiceConfig.SCHEDULER_EWMA_ALPHA)
+        return _cost_model
@@ -0,0 +1,284 @@
+"""
+Shard mode: fan a large task out across replicas as file chunks.
+
+Without sharding, a task runs inside one process_task call on one replica, so
+adding replicas does not make a large task finish sooner. In shard mode
+(SHARD_MODE=true) the replica that receives a task with at least
+SHARD_MIN_FILES unique files acts as coordinator:
+
+1. It extracts and dedupes the files as usual, uploads the unique ones to
+   parseable-files under shards/<task_id>/, and writes a manifest (chunk file
+   lists, original file order, sources to delete) to processed-json-files.
+2. It publishes one message per chunk of SHARD_SIZE files to the shard queue.
+
+Any replica consumes chunk messages: it downloads the chunk's files, converts
+and LLM-extracts them, and writes the chunk's results next to the manifest.
+The replica that writes the last chunk result runs the aggregation step,
+which merges the chunk results in the original file order (copying results to
+duplicates) and uploads the JSON and Excel outputs.
+
+Aggregation is idempotent: if two replicas finish the last chunks at the same
+moment, both produce the same outputs, and the task's completed status stops
+any later redelivery from repeating it.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Collection, Dict, List, Optional
+
+import aio_pika
+import orjson
+
+from config import MinioBuckets, QueueNames, ServiceConfig
+from utils import (
+    ExtractedFile,
+    cuid2_generator,
+    delete_prefix,
+    ensure_bucket,
+    get_minio_client,
+    get_object_bytes,
+    list_object_names,
+    put_object_bytes,
+)
+
+logger = logging.getLogger("resume-extractor.sharding")
+
+
+def should_shard(unique_file_count: int) -> bool:
+    return ServiceConfig.SHARD_MODE and unique_file_count >= ServiceConfig.SHARD_MIN_FILES
+
+
+def _prefix(task_id: str) -> str:
+    return f"{task_id}/shards/"
+
+
+def _manifest_key(task_id: str) -> str:
+    return f"{_prefix(task_id)}manifest.json"
+
+
+def _chunk_result_key(task_id: str, chunk: int) -> str:
+    return f"{_prefix(task_id)}chunk-{chunk:05d}.json"
+
+
+# ============================================================================
+# MinIO Storage
+# ============================================================================
+
+
+def _put_json(bucket: str, key: str, value: Any):
+    put_object_bytes(bucket, key, orjson.dumps(value))
+
+
+def _get_json(bucket: str, key: str) -> Any:
+    return orjson.loads(get_object_bytes(bucket, key))
+
+
+async def upload_shard_files(task_id: str, files: List[ExtractedFile]) -> Dict[str, str]:
+    """
+    Upload unique files for shard workers to download.
+
+    Returns:
+        Mapping of local_path to the file's object name in parseable-files.
+    """
+    client = get_minio_client()
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(ServiceConfig.FILE_PROCESSING_CONCURRENCY)
+
+    async def upload(f: ExtractedFile) -> tuple[str, str]:
+        object_name = f"{_prefix(task_id)}{cuid2_generator()}{f.extension}"
+        async with semaphore:
+            await loop.run_in_executor(
+                None, client.fput_object, MinioBuckets.PARSEABLE_FILES, object_name, f.local_path
+            )
+        return f.local_path, object_name
+
+    uploaded = await asyncio.gather(*(upload(f) for f in files))
+    return dict(uploaded)
+
+
+async def save_manifest(task_id: str, manifest: Dict[str, Any]):
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, ensure_bucket, MinioBuckets.PROCESSED_JSON_FILES)
+    await loop.run_in_executor(
+        None, _put_json, MinioBuckets.PROCESSED_JSON_FILES, _manifest_key(task_id), manifest
+    )
+
+
+async def load_manifest(task_id: str) -> Dict[str, Any]:
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        None, _get_json, MinioBuckets.PROCESSED_JSON_FILES, _manifest_key(task_id)
+    )
+
+
+async def save_chunk_result(task_id: str, chunk: int, data_by_object: Dict[str, Any]):
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(
+        None,
+        _put_json,
+        MinioBuckets.PROCESSED_JSON_FILES,
+        _chunk_result_key(task_id, chunk),
+        data_by_object,
+    )
+
+
+async def load_chunk_results(task_id: str, chunk_count: int) -> Dict[str, Any]:
+    """Merge every chunk's results into one mapping of shard object name to data."""
+    loop = asyncio.get_event_loop()
+    merged: Dict[str, Any] = {}
+    for chunk in range(chunk_count):
+        merged.update(
+            await loop.run_in_executor(
+                None,
+                _get_json,
+                MinioBuckets.PROCESSED_JSON_FILES,
+                _chunk_result_key(task_id, chunk),
+            )
+        )
+    return merged
+
+
+def _completed_chunks(task_id: str) -> List[int]:
+    prefix = f"{_prefix(task_id)}chunk-"
+    return [
+        int(name[len(prefix) : -len(".json")])
+        for name in list_object_names(MinioBuckets.PROCESSED_JSON_FILES, prefix)
+    ]
+
+
+async def completed_chunks(task_id: str) -> List[int]:
+    """Indexes of the chunks whose results have been written."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, _completed_chunks, task_id)
+
+
+async def delete_shard_objects(task_id: str, keep: Collection[str] = ()):
+    """Remove the task's shard files (except those in keep), manifest and chunk results."""
+    loop = asyncio.get_event_loop()
+    for bucket in (MinioBuckets.PARSEABLE_FILES, MinioBuckets.PROCESSED_JSON_FILES):
+        try:
+            await loop.run_in_executor(None, delete_prefix, bucket, _prefix(task_id), keep)
+        except Exception as e:
+            logger.error(f"Failed to delete shard objects for task {task_id} from {bucket}: {e}")
+
+
+# ============================================================================
+# Chunk Messages
+# ============================================================================
+
+_connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+_channel: Optional[aio_pika.abc.AbstractChannel] = None
+
+
+async def _get_channel() -> aio_pika.abc.AbstractChannel:
+    global _connection, _channel
+    if _channel is None or _channel.is_closed:
+        if _connection is None or _connection.is_closed:
+            _connection = await aio_pika.connect_robust(ServiceConfig.RABBITMQ_URL)
+        _channel = await _connection.channel()
+        await _channel.declare_queue(QueueNames.RESUME_EXTRACTOR_SHARDS, durable=True)
+    return _channel
+
+
+async def publish_chunks(user_id: str, task_id: str, chunk_count: int):
+    channel = await _get_channel()
+    for chunk in range(chunk_count):
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=orjson.dumps({"userId": user_id, "taskId": task_id, "chunk": chunk}),
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=QueueNames.RESUME_EXTRACTOR_SHARDS,
+        )
+    logger.info(f"Published {chunk_count} chunk(s) of task {task_id}")
+
+
+async def close_publisher():
+    global _connection, _channel
+    if _connection is not None and not _connection.is_closed:
+        await _connection.close()
+    _connection = _channel = None
+
+
+# ============================================================================
+# Coordinator
+# ============================================================================
+
+
+def build_manifest(
+    user_id: str,
+    task_id: str,
+    task_name: str,
+    files: List[ExtractedFile],
+    unique_files: List[ExtractedFile],
+    duplicates: Dict[str, List[ExtractedFile]],
+    object_names: Dict[str, str],
+    archive_objects: List[str],
+    parseable_files: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Describe a sharded task: chunk file lists, and for every input file in its
+    original order, the shard object whose result it takes.
+    """
+    size = max(1, ServiceConfig.SHARD_SIZE)
+    chunks = [
+        [
+            {
+                "bucketName": MinioBuckets.PARSEABLE_FILES,
+                "filePath": object_names[f.local_path],
+                "originalName": f.original_name,
+            }
+            for f in unique_files[start : start + size]
+        ]
+        for start in range(0, len(unique_files), size)
+    ]
+
+    representative_of = {
+        f.local_path: representative for representative, group in duplicates.items() for f in group
+    }
+    order = [object_names[representative_of.get(f.local_path, f.local_path)] for f in files]
+
+    return {
+        "userId": user_id,
+        "taskId": task_id,
+        "taskName": task_name,
+        "totalFiles": len(files),
+        "chunks": chunks,
+        "order": order,
+        "archiveObjects": archive_objects,
+        "parseableFiles": parseable_files,
+    }
+
+
+async def start_sharded_task(
+    user_id: str,
+    task_id: str,
+    task_name: str,
+    files: List[ExtractedFile],
+    unique_files: List[ExtractedFile],
+    duplicates: Dict[str, List[ExtractedFile]],
+    archive_objects: List[str],
+    parseable_files: List[Dict[str, Any]],
+) -> int:
+    """Upload a task's files and manifest, then publish its chunks. Returns the chunk count."""
+    object_names = await upload_shard_files(task_id, unique_files)
+    manifest = build_manifest(
+        user_id,
+        task_id,
+        task_name,
+        files,
+        unique_files,
+        duplicates,
+        object_names,
+        archive_objects,
+        parseable_files,
+    )
+    await save_manifest(task_id, manifest)
+    chunk_count = len(manifest["chunks"])
+    await publish_chunks(user_id, task_id, chunk_count)
+    return chunk_count
+
+
+def chunk_download_dir(task_id: str, chunk: int) -> str:
+    return os.path.join(ServiceConfig.EXTRACTION_DIR, f"task-{task_id}-chunk-{chunk}")
@@ -0,0 +1,284 @@
+"""
+Success-rate and latency statistics for the converter fallback chains.
+
+Every strategy attempt (e.g. pdfplumber on a PDF) is recorded under the chain
+name, a coarse file-feature key (producer, page count bucket, size bucket) and
+the strategy name. Chains ask for an ordering before running and try the
+strategy with the lowest expected cost to success first. Stats are persisted
+as JSON so the ordering survives restarts. Consumer processes share the file:
+each save adds the attempts recorded since the last one to what is on disk,
+under a file lock.
+"""
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from config import ServiceConfig
+from metrics import STRATEGY_ATTEMPTS, STRATEGY_SECONDS
+
+logger = logging.getLogger("resume-extractor.strategy_stats")
+
+# Key used for stats aggregated over all feature keys of a chain
+ANY_FEATURES = "*"
+
+
+class StrategyTimeout(Exception):
+    """Raised by a strategy that ran past its time budget."""
+
+
+def check_deadline(deadline: Optional[float], strategy: str):
+    """Raise StrategyTimeout if a monotonic deadline has passed."""
+    if deadline is not None and time.monotonic() > deadline:
+        raise StrategyTimeout(f"{strategy} exceeded its time budget")
+
+
+def size_bucket(size_bytes: int) -> str:
+    """Coarse file size bucket used in feature keys."""
+    if size_bytes < 100 * 1024:
+        return "<100k"
+    if size_bytes < 1024 * 1024:
+        return "<1m"
+    if size_bytes < 10 * 1024 * 1024:
+        return "<10m"
+    return ">=10m"
+
+
+def page_bucket(page_count: int) -> str:
+    """Coarse page count bucket used in feature keys."""
+    if page_count <= 1:
+        return "1"
+    if page_count <= 3:
+        return "2-3"
+    if page_count <= 10:
+        return "4-10"
+    return "11+"
+
+
+def producer_family(producer: Optional[str]) -> str:
+    """Reduce a producer/application string to its first word, e.g. 'Microsoft® Word 2019' -> 'microsoft'."""
+    if not producer:
+        return "unknown"
+    first = producer.strip().split()[0] if producer.strip() else ""
+    family = "".join(ch for ch in first.lower() if ch.isalnum() or ch in "-./")
+    return family[:32] or "unknown"
+
+
+def feature_key(*parts: str) -> str:
+    return "|".join(parts)
+
+
+@dataclass
+class StrategyRecord:
+    """Running totals for one strategy under one feature key."""
+
+    attempts: int = 0
+    successes: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.attempts if self.attempts else 0.0
+
+    @property
+    def expected_cost(self) -> float:
+        """
+        Expected seconds spent per success (mean latency / smoothed success rate).
+        Sorting a fallback chain by this value minimizes the expected time to the
+        first success.
+        """
+        success_rate = (self.successes + 1) / (self.attempts + 2)
+        return self.mean_seconds / success_rate
+
+
+# chain -> feature key -> strategy -> record
+Records = Dict[str, Dict[str, Dict[str, StrategyRecord]]]
+
+
+def _merge(into: Records, records: Records):
+    """Add records into another set of records."""
+    for chain, keys in records.items():
+        for features, strategies in keys.items():
+            for strategy, record in strategies.items():
+                strategies_into = into.setdefault(chain, {}).setdefault(features, {})
+                total = strategies_into.setdefault(strategy, StrategyRecord())
+                total.attempts += record.attempts
+                total.successes += record.successes
+                total.total_seconds += record.total_seconds
+
+
+class StrategyStats:
+    """Thread-safe store of StrategyRecords, periodically flushed to disk."""
+
+    def __init__(self, path: str, min_samples: int, save_interval: float):
+        self.path = path
+        self.min_samples = min_samples
+        self.save_interval = save_interval
+        self._records: Records = {}
+        # Attempts recorded since the last save, added to the file on the next one
+        self._pending: Records = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._last_save = time.monotonic()
+        self.load()
+
+    def _read(self) -> Records:
+        """Parse the stats file; a missing file is empty."""
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        return {
+            chain: {
+                features: {
+                    strategy: StrategyRecord(**record) for strategy, record in strategies.items()
+                }
+                for features, strategies in keys.items()
+            }
+            for chain, keys in raw.items()
+        }
+
+    def load(self):
+        """Load persisted stats, ignoring a missing or unreadable file."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            records = self._read()
+            with self._lock:
+                self._records = records
+            logger.info(f"Loaded strategy stats from {self.path}")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable strategy stats {self.path}: {e}")
+
+    def save(self):
+        """
+        Add the attempts recorded since the last save to the stats file
+        (blocking operation).
+
+        The file is re-read under an exclusive lock, so processes sharing it
+        do not overwrite each other's records, and this process picks up
+        theirs. The write itself is atomic.
+        """
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._last_save = time.monotonic()
+            if not pending:
+                return
+
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(f"{self.path}.lock", "a") as lock:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    try:
+                        records = self._read()
+                    except (ValueError, TypeError) as e:
+                        logger.warning(f"Replacing unreadable strategy stats {self.path}: {e}")
+                        records = {}
+                    _merge(records, pending)
+                    payload = {
+                        chain: {
+                            features: {
+                                strategy: asdict(record) for strategy, record in strategies.items()
+                            }
+                            for features, strategies in keys.items()
+                        }
+                        for chain, keys in records.items()
+                    }
+                    tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(payload, f)
+                    os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.warning(f"Failed to save strategy stats to {self.path}: {e}")
+                # Keep the attempts for the next save
+                with self._lock:
+                    _merge(self._pending, pending)
+                return
+
+            with self._lock:
+                # Attempts recorded while saving are not in the file yet
+                _merge(records, self._pending)
+                self._records = records
+
+    def record(
+        self, chain: str, features: str, strategy: str, success: bool, seconds: float
+    ) -> bool:
+        """
+        Record one attempt under both the feature key and the chain-wide key.
+
+        Returns True when a save is due; the caller runs save() where blocking
+        is acceptable.
+        """
+        with self._lock:
+            for records in (self._records, self._pending):
+                keys = records.setdefault(chain, {})
+                for key in (features, ANY_FEATURES):
+                    record = keys.setdefault(key, {}).setdefault(strategy, StrategyRecord())
+                    record.attempts += 1
+                    record.successes += int(success)
+                    record.total_seconds += seconds
+            due = time.monotonic() - self._last_save >= self.save_interval
+
+        STRATEGY_ATTEMPTS.labels(chain, strategy, "success" if success else "failure").inc()
+        STRATEGY_SECONDS.labels(chain, strategy).inc(seconds)
+        return due
+
+    def order(self, chain: str, features: str, strategies: List[str]) -> List[str]:
+        """
+        Order strategies by expected cost to success.
+
+        Strategies with at least min_samples attempts under the feature key
+        (or, failing that, chain-wide) are sorted by expected cost among the
+        positions they occupy in the default order; strategies without enough
+        samples keep their default position. Later strategies only run when
+        earlier ones fail, so they collect samples exactly where reordering matters.
+        """
+        with self._lock:
+            keys = self._records.get(chain, {})
+            specific = keys.get(features, {})
+            general = keys.get(ANY_FEATURES, {})
+
+            costs = {}
+            for strategy in strategies:
+                for records in (specific, general):
+                    record = records.get(strategy)
+                    if record is not None and record.attempts >= self.min_samples:
+                        costs[strategy] = record.expected_cost
+                        break
+
+        if len(costs) < 2:
+            return list(strategies)
+
+        slots = [i for i, strategy in enumerate(strategies) if strategy in costs]
+        ranked = sorted(costs, key=lambda s: (costs[s], strategies.index(s)))
+        ordered = list(strategies)
+        for slot, strategy in zip(slots, ranked):
+            ordered[slot] = strategy
+        return ordered
+
+
+_stats: Optional[StrategyStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_strategy_stats() -> StrategyStats:
+    """Get or create the process-wide strategy stats."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = StrategyStats(
+                ServiceConfig.STRATEGY_STATS_PATH,
+                min_samples=ServiceConfig.STRATEGY_MIN_SAMPLES,
+                save_interval=ServiceConfig.STRATEGY_STATS_SAVE_INTERVAL,
+            )
+            atexit.register(_stats.save)
+        return _stats
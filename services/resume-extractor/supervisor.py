@@ -0,0 +1,215 @@
+"""
+Resume Extractor Service - Multi-Process Supervisor
+
+Runs SUPERVISOR_PROCESSES copies of the consumer (main.py), each a separate
+process with its own event loop and RabbitMQ connection, so conversion, JSON
+and pandas work in one process does not hold up message and HTTP I/O in the
+others.
+
+- The process count defaults to the CPUs allowed by the container's cgroup
+  quota (available_cpus).
+- CONVERTER_WORKERS and LLM_CONCURRENCY are totals for the container and are
+  split between the children; every other setting applies to each child.
+- A child that exits while the supervisor is running is restarted, with an
+  exponential backoff when it keeps exiting soon after starting.
+- SIGTERM/SIGINT is forwarded to every child so each drains its own work;
+  children still running after SUPERVISOR_SHUTDOWN_TIMEOUT seconds are killed.
+- Child i serves its status on HEALTH_PORT + 1 + i; the supervisor serves
+  HEALTH_PORT with the children's statuses aggregated and, on /metrics, their
+  Prometheus metrics summed from METRICS_MULTIPROC_DIR.
+
+Usage: python supervisor.py
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import signal
+import sys
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from config import ServiceConfig
+from health import HealthServer, aggregate_status
+from metrics import MULTIPROC_ENV, render_multiprocess_metrics, reset_multiprocess_dir
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.StreamHandler(sys.stdout),
+    ],
+)
+
+logger = logging.getLogger("resume-extractor.supervisor")
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# A child that exits sooner than this after starting is restarted with backoff
+MIN_HEALTHY_UPTIME_SECONDS = 30.0
+MAX_RESTART_DELAY_SECONDS = 60.0
+
+
+def child_environment(index: int, process_count: int) -> Dict[str, str]:
+    """Environment of one child: the container-wide limits split between the children."""
+    env = dict(os.environ)
+    env["SUPERVISOR_CHILD_INDEX"] = str(index)
+    env[MULTIPROC_ENV] = ServiceConfig.METRICS_MULTIPROC_DIR
+    if ServiceConfig.CONVERTER_WORKERS > 0:
+        env["CONVERTER_WORKERS"] = str(max(1, ServiceConfig.CONVERTER_WORKERS // process_count))
+    env["LLM_CONCURRENCY"] = str(max(1, ServiceConfig.LLM_CONCURRENCY // process_count))
+    if ServiceConfig.HEALTH_PORT > 0:
+        env["HEALTH_PORT"] = str(ServiceConfig.HEALTH_PORT + 1 + index)
+    return env
+
+
+class Supervisor:
+    """Starts, restarts and stops the consumer processes."""
+
+    def __init__(self, process_count: int):
+        self.process_count = max(1, process_count)
+        self.stopping = asyncio.Event()
+        self.children: Dict[int, asyncio.subprocess.Process] = {}
+
+    async def _start(self, index: int) -> asyncio.subprocess.Process:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            MAIN_SCRIPT,
+            env=child_environment(index, self.process_count),
+            # Own process group: a terminal Ctrl-C reaches only the supervisor, which
+            # forwards one SIGTERM, instead of also counting as a child's second signal
+            start_new_session=True,
+        )
+        self.children[index] = process
+        logger.info(f"Started consumer process {index} (pid {process.pid})")
+        return process
+
+    async def _supervise(self, index: int):
+        """Keep child index running until the supervisor stops."""
+        restart_delay = 1.0
+        while not self.stopping.is_set():
+            started = time.monotonic()
+            process = await self._start(index)
+            if self.stopping.is_set():
+                # Started while stop() was signalling the others
+                self._signal(process, signal.SIGTERM)
+            returncode = await process.wait()
+            if self.stopping.is_set():
+                break
+
+            uptime = time.monotonic() - started
+            if uptime >= MIN_HEALTHY_UPTIME_SECONDS:
+                restart_delay = 1.0
+            logger.error(
+                f"Consumer process {index} (pid {process.pid}) exited with code {returncode} "
+                f"after {uptime:.0f}s; restarting in {restart_delay:.0f}s"
+            )
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=restart_delay)
+            except asyncio.TimeoutError:
+                pass
+            restart_delay = min(restart_delay * 2, MAX_RESTART_DELAY_SECONDS)
+
+    async def status(self) -> Dict[str, Any]:
+        """Aggregated status of the children that answer."""
+        statuses = []
+        timeout = aiohttp.ClientTimeout(total=2)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            for index, process in sorted(self.children.items()):
+                if process.returncode is not None:
+                    continue
+                url = f"http://127.0.0.1:{ServiceConfig.HEALTH_PORT + 1 + index}/status"
+                try:
+                    async with session.get(url) as response:
+                        statuses.append(await response.json())
+                except Exception as e:
+                    logger.debug(f"No status from consumer process {index}: {e}")
+        return aggregate_status(statuses, draining=self.stopping.is_set())
+
+    @staticmethod
+    def _signal(process: asyncio.subprocess.Process, sig: signal.Signals):
+        if process.returncode is None:
+            try:
+                process.send_signal(sig)
+            except ProcessLookupError:
+                pass
+
+    def _signal_children(self, sig: signal.Signals):
+        for process in self.children.values():
+            self._signal(process, sig)
+
+    def stop(self, sig: signal.Signals):
+        if self.stopping.is_set():
+            return
+        logger.info(f"Received {sig.name}. Draining {len(self.children)} consumer process(es)...")
+        self.stopping.set()
+        self._signal_children(signal.SIGTERM)
+
+    async def run(self):
+        supervisors = [
+            asyncio.create_task(self._supervise(index)) for index in range(self.process_count)
+        ]
+        await self.stopping.wait()
+
+        # Each supervising task returns once its child has exited, including a
+        # child it was still starting when the stop came
+        _, pending = await asyncio.wait(
+            supervisors, timeout=ServiceConfig.SUPERVISOR_SHUTDOWN_TIMEOUT
+        )
+        if pending:
+            logger.warning(
+                f"{len(pending)} consumer process(es) still running after "
+                f"{ServiceConfig.SUPERVISOR_SHUTDOWN_TIMEOUT:.0f}s; killing them"
+            )
+            self._signal_children(signal.SIGKILL)
+
+        await asyncio.gather(*supervisors, return_exceptions=True)
+        logger.info("All consumer processes stopped")
+
+
+async def main(process_count: Optional[int] = None):
+    supervisor = Supervisor(process_count or ServiceConfig.SUPERVISOR_PROCESSES)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, supervisor.stop, sig)
+
+    logger.info("=" * 60)
+    logger.info("Resume Extractor Supervisor Starting")
+    logger.info("=" * 60)
+    logger.info(f"Consumer processes: {supervisor.process_count}")
+    child_env = child_environment(0, supervisor.process_count)
+    converter_workers = (
+        child_env["CONVERTER_WORKERS"] if ServiceConfig.CONVERTER_WORKERS else "threads"
+    )
+    logger.info(
+        f"Per process: converter workers {converter_workers}, "
+        f"LLM concurrency {child_env['LLM_CONCURRENCY']}"
+    )
+    logger.info("=" * 60)
+
+    # Counters of earlier runs' processes must not be summed into this run's
+    reset_multiprocess_dir(ServiceConfig.METRICS_MULTIPROC_DIR)
+    health_server = None
+    if ServiceConfig.HEALTH_PORT > 0:
+        health_server = HealthServer(
+            supervisor.status,
+            functools.partial(render_multiprocess_metrics, ServiceConfig.METRICS_MULTIPROC_DIR),
+        )
+        await health_server.start(ServiceConfig.HEALTH_PORT)
+    try:
+        await supervisor.run()
+    finally:
+        if health_server is not None:
+            await health_server.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except Exception as e:
+        logger.exception(f"Fatal error: {e}")
+        sys.exit(1)
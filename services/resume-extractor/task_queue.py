@@ -0,0 +1,200 @@
+"""
+Priority ordering of received tasks, with an express lane for small ones.
+
+Task messages used to go into one FIFO queue, so a 10-resume task waited behind
+every multi-thousand-file task received before it. Now:
+
+- The task queue is declared with x-max-priority, and publishers set each
+  message's priority from the task's file count, so RabbitMQ delivers small
+  tasks first when messages back up in the broker.
+- Received messages wait in a PriorityTaskQueue ordered by that priority
+  (ties in arrival order) instead of a FIFO.
+- EXPRESS_WORKER_COUNT extra workers take only small tasks (at most
+  EXPRESS_MAX_FILES files), so a small task starts even while every regular
+  worker is busy with a large one.
+
+Messages without a priority get one from their fileCount hint, or the normal
+priority when the file count is unknown (e.g. archive uploads, whose file
+count is only known after extraction). Time spent waiting in the queue is
+recorded per size class.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from config import ServiceConfig
+from metrics import QUEUE_WAIT_SECONDS
+
+logger = logging.getLogger("resume-extractor.task_queue")
+
+SMALL = "small"
+MEDIUM = "medium"
+LARGE = "large"
+UNKNOWN = "unknown"
+CHUNK = "chunk"
+
+# Message priority by size class, within 0..QUEUE_MAX_PRIORITY (keep in sync
+# with TASK_PRIORITY in the web app's constants)
+SIZE_CLASS_PRIORITY = {
+    SMALL: 8,
+    MEDIUM: 5,
+    UNKNOWN: 5,
+    CHUNK: 5,
+    LARGE: 2,
+}
+
+
+# Seconds the task being handled waited in the queue, set in each job's context
+current_queue_wait: contextvars.ContextVar[float] = contextvars.ContextVar(
+    "queue_wait", default=0.0
+)
+
+
+def size_class(file_count: Optional[int]) -> str:
+    if file_count is None:
+        return UNKNOWN
+    if file_count <= ServiceConfig.EXPRESS_MAX_FILES:
+        return SMALL
+    if file_count >= ServiceConfig.LARGE_TASK_MIN_FILES:
+        return LARGE
+    return MEDIUM
+
+
+@dataclass(order=True)
+class QueuedTask:
+    """A received message waiting for a worker."""
+
+    # Negated priority so the heap pops the highest priority first
+    sort_key: int
+    sequence: int
+    handler: Callable = field(compare=False)
+    message: Any = field(compare=False)
+    size_class: str = field(compare=False, default=UNKNOWN)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+    wait_seconds: float = field(compare=False, default=0.0)
+
+    @property
+    def priority(self) -> int:
+        return -self.sort_key
+
+    def job_context(self) -> contextvars.Context:
+        """Context for the job handling this task, carrying its queue wait."""
+        context = contextvars.copy_context()
+        context.run(current_queue_wait.set, self.wait_seconds)
+        return context
+
+
+class QueueWaitStats:
+    """Queue wait per size class: count, total and max seconds."""
+
+    def __init__(self):
+        self.count: Dict[str, int] = {}
+        self.total_seconds: Dict[str, float] = {}
+        self.max_seconds: Dict[str, float] = {}
+
+    def record(self, size_class: str, seconds: float):
+        self.count[size_class] = self.count.get(size_class, 0) + 1
+        self.total_seconds[size_class] = self.total_seconds.get(size_class, 0.0) + seconds
+        self.max_seconds[size_class] = max(self.max_seconds.get(size_class, 0.0), seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "count": self.count[name],
+                "avg_seconds": round(self.total_seconds[name] / self.count[name], 3),
+                "max_seconds": round(self.max_seconds[name], 3),
+            }
+            for name in sorted(self.count)
+        }
+
+
+class PriorityTaskQueue:
+    """
+    Bounded priority queue of received messages. Regular workers take the
+    highest-priority task; express workers take the highest-priority small one.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        self.maxsize = maxsize
+        self.wait_stats = QueueWaitStats()
+        self._heap: List[QueuedTask] = []
+        self._sequence = itertools.count()
+        self._changed = asyncio.Condition()
+        self._unfinished = 0
+        self._all_done = asyncio.Event()
+        self._all_done.set()
+
+    def qsize(self) -> int:
+        return len(self._heap)
+
+    def depth_by_class(self) -> Dict[str, int]:
+        depth: Dict[str, int] = {}
+        for item in self._heap:
+            depth[item.size_class] = depth.get(item.size_class, 0) + 1
+        return depth
+
+    async def put(self, handler: Callable, message: Any, priority: int, size_class: str):
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: self.maxsize <= 0 or len(self._heap) < self.maxsize
+            )
+            heapq.heappush(
+                self._heap,
+                QueuedTask(-priority, next(self._sequence), handler, message, size_class),
+            )
+            self._unfinished += 1
+            self._all_done.clear()
+            self._changed.notify_all()
+
+    def _pop(self, express: bool) -> Optional[QueuedTask]:
+        if not express:
+            return heapq.heappop(self._heap) if self._heap else None
+        small = [item for item in self._heap if item.size_class == SMALL]
+        if not small:
+            return None
+        item = min(small)
+        self._heap.remove(item)
+        heapq.heapify(self._heap)
+        return item
+
+    async def get(self, express: bool = False) -> QueuedTask:
+        async with self._changed:
+            item = None
+            while item is None:
+                item = self._pop(express)
+                if item is None:
+                    await self._changed.wait()
+            self._changed.notify_all()
+
+        wait = time.monotonic() - item.enqueued_at
+        item.wait_seconds = wait
+        self.wait_stats.record(item.size_class, wait)
+        QUEUE_WAIT_SECONDS.labels(item.size_class).observe(wait)
+        logger.info(
+            f"Dequeued {item.size_class} task (priority {item.priority}) "
+            f"after {wait:.1f}s in queue"
+        )
+        return item
+
+    def drain_nowait(self) -> List[QueuedTask]:
+        """Remove and return every waiting task, highest priority first."""
+        items = sorted(self._heap)
+        self._heap.clear()
+        for _ in items:
+            self.task_done()
+        return items
+
+    def task_done(self):
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._all_done.set()
+
+    async def join(self):
+        await self._all_done.wait()
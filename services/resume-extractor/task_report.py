@@ -0,0 +1,178 @@
+"""
+Per-task performance report, uploaded next to the results:
+
+    <user_id>/<task_id>/<task_name>-report.json
+
+After a slow task it shows which stages and files the time went to:
+
+- stages: wall time of each pipeline stage (setup, download,
+  archive_extraction, preparation, conversion, llm_extraction, upload,
+  finalize, cleanup)
+- files: per file, conversion time, method and outcome, OCR pages and LLM time
+- slowest_files: the REPORT_SLOWEST_FILES files with the most conversion and
+  LLM time
+- conversion: latency percentiles and counts by method and outcome
+- llm: requests by outcome, latency percentiles, retries, 429s and tokens
+- cache_hits: work skipped for duplicate files and checkpointed results/texts
+- queue_wait: time in the internal task queue and waiting for shared
+  conversion and LLM slots
+
+Failed tasks get a report too; sharded and interrupted ones do not.
+TaskProcessingResult.report carries everything except the per-file list.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from config import MinioBuckets, ServiceConfig
+from converters import ConversionStats
+from extractor import LLMStats
+from fair_share import current_flow
+from task_queue import current_queue_wait
+from utils import ensure_bucket, put_object_bytes
+
+logger = logging.getLogger("resume-extractor.task_report")
+
+
+def _round(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds, 3)
+
+
+def _counts(values: List[str]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+class TaskReport:
+    """Stage timings and conversion/LLM stats of one task."""
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.stages: Dict[str, float] = {}
+        self.cache_hits: Dict[str, int] = {}
+        self.conversion = ConversionStats()
+        self.llm = LLMStats()
+        self._stage: Optional[str] = None
+        self._stage_started = 0.0
+
+    def begin(self, stage: str):
+        """End the current stage, if any, and start timing the next one."""
+        self.end()
+        self._stage = stage
+        self._stage_started = time.monotonic()
+
+    def end(self):
+        if self._stage is not None:
+            elapsed = time.monotonic() - self._stage_started
+            self.stages[self._stage] = self.stages.get(self._stage, 0.0) + elapsed
+            self._stage = None
+
+    def _files(self, names: Dict[str, str]) -> List[Dict[str, Any]]:
+        conversions = {c.file_path: c for c in self.conversion.conversions}
+        llm_seconds = self.llm.seconds_by_file
+        files = []
+        for path in list(conversions) + [p for p in llm_seconds if p not in conversions]:
+            conversion = conversions.get(path)
+            files.append(
+                {
+                    "name": names.get(path, os.path.basename(path)),
+                    "file_type": conversion.file_type if conversion else None,
+                    # Files without a conversion had their text in the checkpoint
+                    "method": conversion.method if conversion else "checkpoint",
+                    "outcome": conversion.outcome if conversion else None,
+                    "conversion_seconds": _round(conversion.seconds) if conversion else 0.0,
+                    "ocr_pages": conversion.ocr_pages if conversion else 0,
+                    "llm_seconds": _round(llm_seconds.get(path)),
+                }
+            )
+        return files
+
+    def build(self, result: Any, names: Dict[str, str]) -> Dict[str, Any]:
+        """
+        The full report for a TaskProcessingResult. names maps local paths to
+        the files' original names.
+        """
+        self.end()
+        files = self._files(names)
+        slowest = sorted(
+            files,
+            key=lambda f: (f["conversion_seconds"] or 0.0) + (f["llm_seconds"] or 0.0),
+            reverse=True,
+        )[: ServiceConfig.REPORT_SLOWEST_FILES]
+
+        conversions = self.conversion.conversions
+        flow_waits = current_flow().wait_seconds
+        return {
+            "task_id": self.task_id,
+            "success": result.success,
+            "error": result.error,
+            # Cleanup included, unlike processing_time_seconds
+            "total_seconds": _round(sum(self.stages.values())),
+            "total_files": result.total_files,
+            "processed_files": result.processed_files,
+            "invalid_files": result.invalid_files,
+            "stages": {name: _round(seconds) for name, seconds in self.stages.items()},
+            "conversion": {
+                "files": len(conversions),
+                "seconds": _round(sum(c.seconds for c in conversions)),
+                "latency": {p: _round(v) for p, v in self.conversion.latency_percentiles().items()},
+                "methods": _counts([c.method for c in conversions]),
+                "outcomes": _counts([c.outcome for c in conversions]),
+                "ocr_pages": sum(c.ocr_pages for c in conversions),
+                "type_mismatches": self.conversion.type_mismatches,
+                "timeouts": self.conversion.timeouts,
+            },
+            "llm": {
+                "requests": self.llm.requests,
+                "outcomes": self.llm.outcomes,
+                "seconds": _round(sum(self.llm.durations)),
+                "latency": {p: _round(v) for p, v in self.llm.latency_percentiles().items()},
+                "retries": self.llm.retries,
+                "rate_limited": self.llm.rate_limited,
+                "tokens": self.llm.tokens,
+            },
+            "cache_hits": {"duplicates": result.duplicate_files, **self.cache_hits},
+            "queue_wait": {
+                "task_queue": _round(current_queue_wait.get()),
+                "conversion_slots": _round(flow_waits.get("conversion", 0.0)),
+                "llm_slots": _round(flow_waits.get("llm", 0.0)),
+            },
+            "slowest_files": slowest,
+            "files": files,
+        }
+
+
+def summarize(report: Dict[str, Any]) -> Dict[str, Any]:
+    """The report without its per-file list, for TaskProcessingResult."""
+    return {key: value for key, value in report.items() if key != "files"}
+
+
+async def upload_report(
+    user_id: str, task_id: str, task_name: str, report: Dict[str, Any]
+) -> Optional[str]:
+    """Upload the report next to the task's results; returns its path, or None on failure."""
+    path = f"{user_id}/{task_id}/{task_name}-report.json"
+    loop = asyncio.get_event_loop()
+    try:
+        # A task that failed early has not created the results bucket
+        await loop.run_in_executor(None, ensure_bucket, MinioBuckets.AGGREGATED_RESULTS)
+        await loop.run_in_executor(
+            None,
+            put_object_bytes,
+            MinioBuckets.AGGREGATED_RESULTS,
+            path,
+            orjson.dumps(report, option=orjson.OPT_INDENT_2),
+        )
+    except Exception as e:
+        # The report is diagnostic; the task's outcome does not depend on it
+        logger.warning(f"Failed to upload performance report for task {task_id}: {e}")
+        return None
+    logger.info(f"Uploaded performance report to: {path}")
+    return path
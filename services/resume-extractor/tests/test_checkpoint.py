@@ -0,0 +1,106 @@
+import gzip
+from typing import Dict
+
+import orjson
+import pytest
+
+import checkpoint
+from checkpoint import TaskCheckpoint, file_key
+from config import ServiceConfig
+from utils import ExtractedFile
+
+
+@pytest.fixture
+def store(monkeypatch) -> Dict[str, bytes]:
+    """In-memory stand-in for the processed-json-files bucket."""
+    objects: Dict[str, bytes] = {}
+
+    def put_object_bytes(bucket, name, data, content_type=None):
+        objects[name] = data
+
+    monkeypatch.setattr(checkpoint, "ensure_bucket", lambda bucket: None)
+    monkeypatch.setattr(checkpoint, "put_object_bytes", put_object_bytes)
+    monkeypatch.setattr(checkpoint, "get_object_bytes", lambda bucket, name: objects[name])
+    monkeypatch.setattr(
+        checkpoint,
+        "list_object_names",
+        lambda bucket, prefix: [name for name in objects if name.startswith(prefix)],
+    )
+    monkeypatch.setattr(
+        checkpoint,
+        "delete_prefix",
+        lambda bucket, prefix: [objects.pop(n) for n in list(objects) if n.startswith(prefix)],
+    )
+    # Flush only when asked
+    monkeypatch.setattr(ServiceConfig, "CHECKPOINT_FLUSH_FILES", 1000)
+    monkeypatch.setattr(ServiceConfig, "CHECKPOINT_FLUSH_SECONDS", 1e9)
+    return objects
+
+
+def _file(name: str, content_hash=None) -> ExtractedFile:
+    return ExtractedFile(name, f"/work/task-1/{name}", name, ".pdf", 100, content_hash)
+
+
+def test_file_key_falls_back_to_name_and_size():
+    assert file_key(_file("a.pdf", "abc")) == "abc"
+    assert file_key(_file("a.pdf")) == "a.pdf:100"
+
+
+async def test_resume_skips_done_files(store):
+    done, converted, pending = _file("done.pdf", "h1"), _file("conv.pdf", "h2"), _file("new.pdf")
+
+    first = TaskCheckpoint("task-1")
+    await first.record_text(done, "Jane Doe")
+    await first.record_result(done, {"name": "Jane Doe"})
+    await first.record_text(converted, "John Roe")
+    await first.flush()
+    assert list(store) == ["task-1/checkpoint/segment-000000.jsonl.gz"]
+
+    resumed = TaskCheckpoint("task-1")
+    assert await resumed.load() == 1
+    assert resumed.get(done).data == {"name": "Jane Doe"}
+    assert resumed.get(converted).data is None
+    assert resumed.get(converted).text == "John Roe"
+    assert resumed.get(pending) is None
+
+
+async def test_empty_texts_and_results_are_not_recorded(store):
+    failed, empty = _file("failed.pdf", "h1"), _file("empty.pdf", "h2")
+
+    first = TaskCheckpoint("task-1")
+    await first.record_text(failed, "   ")
+    await first.record_text(empty, "Some text")
+    await first.record_result(empty, {"name": None, "skills": []})
+    await first.flush()
+
+    resumed = TaskCheckpoint("task-1")
+    assert await resumed.load() == 0
+    assert resumed.get(failed) is None
+    # The text is kept, so a resumed run only repeats the LLM call
+    assert resumed.get(empty).text == "Some text"
+    assert resumed.get(empty).data is None
+
+
+async def test_segments_continue_numbering_and_delete(store):
+    first = TaskCheckpoint("task-1")
+    await first.record_result(_file("a.pdf", "h1"), {"name": "A"})
+    await first.flush()
+
+    second = TaskCheckpoint("task-1")
+    await second.load()
+    await second.record_result(_file("b.pdf", "h2"), {"name": "B"})
+    await second.flush()
+    # Nothing pending: no empty segment is written
+    await second.flush()
+    assert sorted(store) == [
+        "task-1/checkpoint/segment-000000.jsonl.gz",
+        "task-1/checkpoint/segment-000001.jsonl.gz",
+    ]
+    lines = gzip.decompress(store["task-1/checkpoint/segment-000001.jsonl.gz"]).splitlines()
+    assert [orjson.loads(line)["key"] for line in lines] == ["h2"]
+
+    third = TaskCheckpoint("task-1")
+    assert await third.load() == 2
+
+    await third.delete()
+    assert store == {}
@@ -0,0 +1,111 @@
+import time
+import zipfile
+
+import pytest
+
+import converters
+from config import ServiceConfig
+from converters import run_fallback_chain, sniff_format
+from strategy_stats import StrategyStats
+from workers import file_deadline
+
+
+@pytest.mark.parametrize(
+    "head, expected",
+    [
+        (b"%PDF-1.7\n", "pdf"),
+        (b"\xef\xbb\xbf\r\n%PDF-1.4\n", "pdf"),
+        (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\0" * 16, "doc"),
+        (b"\xef\xbb\xbf  {\\rtf1\\ansi Hello}", "rtf"),
+        (b"\x89PNG\r\n\x1a\n" + b"\0" * 8, "png"),
+        (b"\xff\xd8\xff\xe0", "jpeg"),
+        (b"RIFF\0\0\0\0WEBPVP8 ", "webp"),
+        (b"Jane Doe\nEngineer\n", None),
+    ],
+)
+def test_sniff_format(tmp_path, head, expected):
+    path = tmp_path / "file"
+    path.write_bytes(head)
+    assert sniff_format(str(path)) == expected
+
+
+def test_sniff_format_zip(tmp_path):
+    docx = tmp_path / "a.pdf"
+    with zipfile.ZipFile(docx, "w") as archive:
+        archive.writestr("word/document.xml", "<w:document/>")
+    other = tmp_path / "b.zip"
+    with zipfile.ZipFile(other, "w") as archive:
+        archive.writestr("readme.txt", "hello")
+
+    assert sniff_format(str(docx)) == "docx"
+    assert sniff_format(str(other)) is None
+
+
+def _hang(path):
+    time.sleep(0.5)
+    return "late text that arrives after the budget"
+
+
+def _fail(path):
+    raise ValueError("corrupt")
+
+
+def _empty(path):
+    return " "
+
+
+def _ok(path):
+    return "extracted text"
+
+
+@pytest.fixture
+def stats(monkeypatch) -> StrategyStats:
+    # Thread mode, with stats that are not persisted
+    monkeypatch.setattr(ServiceConfig, "CONVERTER_WORKERS", 0)
+    stats = StrategyStats("", min_samples=1, save_interval=60)
+    monkeypatch.setattr(converters, "get_strategy_stats", lambda: stats)
+    return stats
+
+
+async def test_fallback_chain_stops_overrunning_strategy(stats):
+    strategies = {"hang": _hang, "fail": _fail, "empty": _empty, "ok": _ok}
+    with file_deadline(30) as deadline:
+        started = time.monotonic()
+        text, winner = await run_fallback_chain("test", "resume.docx", "k", strategies, 0.1)
+
+    assert (text, winner) == ("extracted text", "ok")
+    assert deadline.method == "ok"
+    assert not deadline.timed_out
+    assert time.monotonic() - started < 0.4
+
+    records = stats._records["test"]["k"]
+    assert {name: (r.attempts, r.successes) for name, r in records.items()} == {
+        "hang": (1, 0),
+        "fail": (1, 0),
+        "empty": (1, 0),
+        "ok": (1, 1),
+    }
+    assert records["hang"].total_seconds == pytest.approx(0.1)
+
+
+async def test_fallback_chain_uses_learned_order(stats, monkeypatch):
+    strategies = {"fail": _fail, "ok": _ok}
+    await run_fallback_chain("test", "resume.docx", "k", strategies, 1)
+
+    # The failed strategy now has the higher expected cost and is not tried first
+    calls = []
+    run_strategy = converters._run_strategy
+
+    def spy(fn, *args):
+        calls.append(fn.__name__)
+        return run_strategy(fn, *args)
+
+    monkeypatch.setattr(converters, "_run_strategy", spy)
+    text, winner = await run_fallback_chain("test", "resume.docx", "k", strategies, 1)
+    assert winner == "ok"
+    assert calls == ["_ok"]
+
+
+async def test_fallback_chain_all_failed(stats):
+    text, winner = await run_fallback_chain("test", "x.docx", "k", {"fail": _fail}, 1)
+    assert (text, winner) == ("", None)
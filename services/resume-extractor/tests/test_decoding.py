@@ -0,0 +1,59 @@
+import codecs
+
+import pytest
+
+from decoding import detect_bom, detect_encoding, read_rtf, read_text, rtf_codepage
+
+
+@pytest.mark.parametrize(
+    "sample, expected",
+    [
+        (codecs.BOM_UTF8 + b"abc", ("utf-8", 3)),
+        (codecs.BOM_UTF32_LE + b"a\0\0\0", ("utf-32-le", 4)),
+        (codecs.BOM_UTF16_LE + b"a\0", ("utf-16-le", 2)),
+        ("résumé".encode("utf-8"), ("utf-8", 0)),
+        # A multi-byte sequence cut off at the end of the sample is still UTF-8
+        ("résumé".encode("utf-8")[:-1], ("utf-8", 0)),
+        ("“résumé”".encode("cp1252"), ("cp1252", 0)),
+        (b"caf\xe9 \x81", ("latin-1", 0)),
+    ],
+)
+def test_detect_encoding(sample, expected):
+    assert detect_encoding(sample) == expected
+
+
+def test_detect_bom_none():
+    assert detect_bom(b"plain") == (None, 0)
+
+
+def test_read_text_falls_back_past_the_sample(tmp_path, monkeypatch):
+    import decoding
+
+    monkeypatch.setattr(decoding, "SAMPLE_BYTES", 16)
+    path = tmp_path / "resume.txt"
+    path.write_bytes(b"a" * 32 + "café".encode("cp1252"))
+
+    text, encoding = read_text(str(path))
+    assert encoding == "cp1252"
+    assert text.endswith("café")
+
+
+def test_read_text_skips_bom_and_handles_empty(tmp_path):
+    path = tmp_path / "bom.txt"
+    path.write_bytes(codecs.BOM_UTF16_LE + "Jane".encode("utf-16-le"))
+    assert read_text(str(path)) == ("Jane", "utf-16-le")
+
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert read_text(str(empty)) == ("", "utf-8")
+
+
+def test_rtf_codepage(tmp_path):
+    assert rtf_codepage(rb"{\rtf1\ansi\ansicpg1251 x}") == "cp1251"
+    assert rtf_codepage(rb"{\rtf1\ansi\ansicpg65001 x}") == "utf-8"
+    assert rtf_codepage(rb"{\rtf1\ansi\ansicpg99999 x}") is None
+    assert rtf_codepage(rb"{\rtf1\ansi x}") is None
+
+    path = tmp_path / "a.rtf"
+    path.write_bytes(rb"{\rtf1\ansi\ansicpg1251 " + "Да".encode("cp1251") + b"}")
+    assert read_rtf(str(path)) == ("{\\rtf1\\ansi\\ansicpg1251 Да}", "cp1251")
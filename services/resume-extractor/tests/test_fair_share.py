@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from fair_share import FairScheduler, active_task_count, current_flow, task_flow
+
+
+async def _request(scheduler: FairScheduler, name: str, order: list, release: asyncio.Event):
+    async with scheduler.slot():
+        order.append(name)
+        await release.wait()
+
+
+async def _grant_all(release: asyncio.Event, tasks: list):
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+async def test_small_task_is_interleaved_with_large_one():
+    scheduler = FairScheduler("conversion", capacity=1)
+    order: list = []
+    release = asyncio.Event()
+
+    # Hold the only slot so every request below has to queue
+    holder = asyncio.create_task(_request(scheduler, "holder", order, release))
+    await asyncio.sleep(0)
+
+    tasks = []
+    with task_flow("large", "user-a"):
+        tasks += [
+            asyncio.create_task(_request(scheduler, f"large-{i}", order, release)) for i in range(6)
+        ]
+    with task_flow("small", "user-b"):
+        tasks += [
+            asyncio.create_task(_request(scheduler, f"small-{i}", order, release)) for i in range(2)
+        ]
+    await asyncio.sleep(0)
+
+    await _grant_all(release, [holder, *tasks])
+
+    granted = order[1:]
+    assert len(granted) == 8
+    # First-come-first-served would run all six large requests first
+    assert granted.index("small-1") < 4
+    assert [name for name in granted if name.startswith("large")] == [
+        f"large-{i}" for i in range(6)
+    ]
+
+
+def test_user_share_is_split_between_their_tasks():
+    assert active_task_count() == 0
+    with task_flow("t1", "user-a") as first:
+        assert first.weight == 1.0
+        with task_flow("t2", "user-a") as second:
+            assert current_flow() is second
+            assert first.weight == second.weight == 0.5
+            with task_flow("t3", "user-b") as other:
+                assert other.weight == 1.0
+                assert active_task_count() == 3
+        assert first.weight == 1.0
+    assert active_task_count() == 0
+    assert current_flow().task_id == "-"
+
+
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = FairScheduler("llm", capacity=1)
+    order: list = []
+    release = asyncio.Event()
+
+    holder = asyncio.create_task(_request(scheduler, "holder", order, release))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(_request(scheduler, "cancelled", order, release))
+    waiter = asyncio.create_task(_request(scheduler, "waiter", order, release))
+    await asyncio.sleep(0)
+    assert scheduler.waiting == 2
+
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    await _grant_all(release, [holder, waiter])
+    assert order == ["holder", "waiter"]
+    assert scheduler.in_use == 0
+    assert scheduler.waiting == 0
+
+
+async def test_wait_time_is_recorded_on_the_flow():
+    scheduler = FairScheduler("conversion", capacity=1)
+    release = asyncio.Event()
+    order: list = []
+
+    holder = asyncio.create_task(_request(scheduler, "holder", order, release))
+    await asyncio.sleep(0)
+    with task_flow("t1", "user-a") as flow:
+        waiter = asyncio.create_task(_request(scheduler, "waiter", order, release))
+    await asyncio.sleep(0.05)
+
+    await _grant_all(release, [holder, waiter])
+    assert flow.acquisitions == {"conversion": 1}
+    assert flow.wait_seconds["conversion"] >= 0.04
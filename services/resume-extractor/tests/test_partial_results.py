@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from typing import Dict, List
+
+import pytest
+
+import partial_results
+from config import ServiceConfig
+from partial_results import PartialResults
+
+
+class _Client:
+    def __init__(self):
+        self.removed: List[str] = []
+
+    def remove_object(self, bucket, name):
+        self.removed.append(name)
+
+
+@pytest.fixture
+def store(monkeypatch) -> Dict:
+    """Uploads that block until released, and a record of task updates."""
+    state = {"objects": {}, "updates": [], "release": threading.Event(), "client": _Client()}
+
+    def put_object_bytes(bucket, name, data, content_type=None):
+        state["release"].wait(5)
+        state["objects"][name] = data
+
+    async def update_parsing_task(task_id, fields):
+        state["updates"].append(fields)
+
+    monkeypatch.setattr(partial_results, "ensure_bucket", lambda bucket: None)
+    monkeypatch.setattr(partial_results, "put_object_bytes", put_object_bytes)
+    monkeypatch.setattr(partial_results, "update_parsing_task", update_parsing_task)
+    monkeypatch.setattr(partial_results, "get_minio_client", lambda: state["client"])
+    monkeypatch.setattr(partial_results, "_excel_bytes", lambda rows: b"xlsx")
+    monkeypatch.setattr(ServiceConfig, "PARTIAL_RESULTS_EVERY_FILES", 1)
+    return state
+
+
+async def test_first_upload_reports_paths(store):
+    store["release"].set()
+    partial = PartialResults("user-1", "task-1", "cvs")
+    partial.add("/work/a.pdf", {"name": "A"})
+    await partial.close()
+
+    assert partial.uploads == 1
+    assert store["objects"]["user-1/task-1/cvs-partial.jsonl"] == b'{"name":"A"}\n'
+    assert store["updates"] == [
+        {
+            "partialJsonFilePath": "user-1/task-1/cvs-partial.jsonl",
+            "partialSheetFilePath": "user-1/task-1/cvs-partial.xlsx",
+        }
+    ]
+
+
+async def test_upload_in_flight_at_discard_is_not_reported(store):
+    partial = PartialResults("user-1", "task-1", "cvs")
+    partial.add("/work/a.pdf", {"name": "A"})
+    await asyncio.sleep(0.01)
+
+    # The task finalizes while the first snapshot is still uploading
+    closing = asyncio.create_task(partial.close(discard=True))
+    await asyncio.sleep(0.01)
+    store["release"].set()
+    await asyncio.wait_for(closing, 5)
+
+    assert store["updates"] == []
+    assert sorted(store["client"].removed) == [
+        "user-1/task-1/cvs-partial.jsonl",
+        "user-1/task-1/cvs-partial.xlsx",
+    ]
@@ -0,0 +1,72 @@
+import pytest
+from striprtf.striprtf import rtf_to_text as striprtf_to_text
+
+from rtf import rtf_to_text
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        r"{\rtf1\ansi{\fonttbl{\f0 Arial;}}\f0 Jane Doe\par Senior Engineer\par}",
+        r"{\rtf1\ansi Skills:\tab Python\line Go\par}",
+        r"{\rtf1\ansi Caf\'e9 \endash  r\'e9sum\'e9\par}",
+        r"{\rtf1\ansi\uc1 \u8220?quoted\u8221?\par}",
+        r"{\rtf1\ansi{\*\generator Writer;}{\info{\author Someone}}Body\par}",
+        r"{\rtf1\ansi\trowd\cellx3000\cellx6000 Python\cell Go\cell\row }",
+        r"{\rtf1\ansi{\header Page header}Body text\par}",
+    ],
+)
+def test_matches_striprtf(source):
+    assert rtf_to_text(source) == striprtf_to_text(source)
+
+
+def test_embedded_objects_are_skipped():
+    pict = "89504e47" * 2000
+    source = (
+        r"{\rtf1\ansi Before "
+        r"{\*\shppict{\pict\pngblip\picw10\pich10 " + pict + "}}"
+        r"{\object\objemb{\*\objclass Package}{\*\objdata " + pict + "}}"
+        r"After\par}"
+    )
+    assert rtf_to_text(source) == "Before After\n"
+
+
+def test_bin_data_with_braces_is_skipped():
+    source = r"{\rtf1\ansi A{\*\blipuid{\bin4 }}{x}}B\par}"
+    assert rtf_to_text(source) == "AB\n"
+
+
+def test_unicode_skip_count():
+    # \uc2: two fallback characters follow each \u escape
+    assert rtf_to_text(r"{\rtf1\ansi\uc2 \u1046??ok\par}") == "Жok\n"
+    # A negative argument is a code point above 0x7fff
+    assert rtf_to_text(r"{\rtf1\ansi\u-3913?\par}") == chr(0x10000 - 3913) + "\n"
+
+
+def test_font_charset_decodes_hex_escapes():
+    source = (
+        r"{\rtf1\ansi\deff0{\fonttbl{\f0\fswiss\fcharset0 Arial;}"
+        r"{\f1\fswiss\fcharset204 Arial Cyr;}}"
+        r"\f1 \'cf\'f0\'e8\'e2\'e5\'f2 \f0 caf\'e9\par}"
+    )
+    assert rtf_to_text(source) == "Привет café\n"
+
+
+def test_ansicpg_header_sets_default_codepage():
+    assert rtf_to_text(r"{\rtf1\ansi\ansicpg1251 \'c4\'e0\par}") == "Да\n"
+
+
+def test_hyperlinks_keep_their_url():
+    source = (
+        r"{\rtf1\ansi See {\field{\*\fldinst{HYPERLINK " + '"https://example.com/a"'
+        r"}}{\fldrslt{\ul portfolio}}} and "
+        r"{\field{\*\fldinst HYPERLINK " + '"mailto:jane@example.com"'
+        r"}{\fldrslt jane@example.com}}\par}"
+    )
+    assert rtf_to_text(source) == (
+        "See portfolio(https://example.com/a) and jane@example.com(mailto:jane@example.com)\n"
+    )
+
+
+def test_text_after_document_group_is_ignored():
+    assert rtf_to_text(r"{\rtf1\ansi Body\par}trailing garbage") == "Body\n"
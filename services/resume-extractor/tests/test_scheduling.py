@@ -0,0 +1,24 @@
+from scheduling import FileJob, lpt_interleaved
+
+
+def _job(name: str, estimate: float) -> FileJob:
+    return FileJob(name, "pdf", "pdf", 1000, estimate=estimate)
+
+
+def test_lpt_interleaved_alternates_largest_and_smallest():
+    jobs = [_job(name, estimate) for name, estimate in [("a", 1), ("b", 50), ("c", 5), ("d", 20)]]
+    assert [job.file_path for job in lpt_interleaved(jobs)] == ["b", "a", "d", "c"]
+
+
+def test_lpt_interleaved_keeps_every_job_once():
+    jobs = [_job(str(i), float(i % 7)) for i in range(11)]
+    ordered = lpt_interleaved(jobs)
+    assert sorted(job.file_path for job in ordered) == sorted(job.file_path for job in jobs)
+    # The expensive jobs still start in LPT order
+    assert [job.estimate for job in ordered[::2]] == sorted(
+        (job.estimate for job in ordered[::2]), reverse=True
+    )
+
+
+def test_lpt_interleaved_empty():
+    assert lpt_interleaved([]) == []
@@ -0,0 +1,73 @@
+from strategy_stats import StrategyStats, feature_key, page_bucket, producer_family
+
+CHAIN = ["pymupdf", "pdfplumber", "pypdf2"]
+
+
+def _stats(tmp_path, min_samples: int = 3) -> StrategyStats:
+    return StrategyStats(str(tmp_path / "stats.json"), min_samples=min_samples, save_interval=0)
+
+
+def _record(stats: StrategyStats, features: str, strategy: str, successes: int, failures: int):
+    for success in [True] * successes + [False] * failures:
+        stats.record("pdf", features, strategy, success, 1.0)
+
+
+def test_default_order_without_enough_samples(tmp_path):
+    stats = _stats(tmp_path)
+    _record(stats, "k", "pypdf2", 2, 0)
+    assert stats.order("pdf", "k", CHAIN) == CHAIN
+
+
+def test_reliable_strategy_moves_first(tmp_path):
+    stats = _stats(tmp_path)
+    _record(stats, "k", "pymupdf", 0, 5)
+    _record(stats, "k", "pdfplumber", 5, 0)
+    # pypdf2 has no samples and keeps its position
+    assert stats.order("pdf", "k", CHAIN) == ["pdfplumber", "pymupdf", "pypdf2"]
+
+
+def test_chain_wide_stats_apply_to_unseen_features(tmp_path):
+    stats = _stats(tmp_path)
+    _record(stats, "k1", "pymupdf", 0, 5)
+    _record(stats, "k2", "pypdf2", 5, 0)
+    assert stats.order("pdf", "unseen", CHAIN) == ["pypdf2", "pdfplumber", "pymupdf"]
+
+
+def test_stats_persist(tmp_path):
+    stats = _stats(tmp_path)
+    _record(stats, "k", "pymupdf", 0, 5)
+    _record(stats, "k", "pdfplumber", 5, 0)
+    stats.save()
+
+    reloaded = _stats(tmp_path)
+    assert reloaded.order("pdf", "k", CHAIN) == ["pdfplumber", "pymupdf", "pypdf2"]
+
+
+def test_feature_key_parts():
+    assert producer_family("Microsoft® Word 2019") == "microsoft"
+    assert producer_family(None) == "unknown"
+    assert page_bucket(1) == "1" and page_bucket(12) == "11+"
+    assert feature_key("a", "b") == "a|b"
+
+
+def test_processes_sharing_the_file_keep_each_others_records(tmp_path):
+    first, second = _stats(tmp_path), _stats(tmp_path)
+    _record(first, "k", "pymupdf", 0, 5)
+    _record(second, "k", "pdfplumber", 5, 0)
+    first.save()
+    second.save()
+    # Saving twice does not count the same attempts again
+    first.save()
+
+    reloaded = _stats(tmp_path)
+    records = reloaded._records["pdf"]["k"]
+    assert (records["pymupdf"].attempts, records["pdfplumber"].attempts) == (5, 5)
+    # The second process now orders by both processes' records
+    assert second.order("pdf", "k", CHAIN) == ["pdfplumber", "pymupdf", "pypdf2"]
+
+
+def test_record_reports_when_a_save_is_due(tmp_path):
+    stats = StrategyStats(str(tmp_path / "stats.json"), min_samples=1, save_interval=60)
+    assert not stats.record("pdf", "k", "pymupdf", True, 1.0)
+    assert not (tmp_path / "stats.json").exists()
+    assert _stats(tmp_path).record("pdf", "k", "pymupdf", True, 1.0)
@@ -0,0 +1,32 @@
+import asyncio
+import signal
+import time
+
+import supervisor
+from config import ServiceConfig
+from supervisor import Supervisor
+
+
+async def test_child_started_during_stop_is_terminated(tmp_path, monkeypatch):
+    script = tmp_path / "child.py"
+    script.write_text("import time\ntime.sleep(30)\n")
+    monkeypatch.setattr(supervisor, "MAIN_SCRIPT", str(script))
+    monkeypatch.setattr(ServiceConfig, "HEALTH_PORT", 0)
+    monkeypatch.setattr(ServiceConfig, "SUPERVISOR_SHUTDOWN_TIMEOUT", 10.0)
+
+    sup = Supervisor(1)
+    create_subprocess_exec = asyncio.create_subprocess_exec
+
+    async def stop_while_starting(*args, **kwargs):
+        process = await create_subprocess_exec(*args, **kwargs)
+        # The stop arrives before the new child is registered
+        sup.stop(signal.SIGTERM)
+        return process
+
+    monkeypatch.setattr(supervisor.asyncio, "create_subprocess_exec", stop_while_starting)
+
+    started = time.monotonic()
+    await asyncio.wait_for(sup.run(), 20)
+
+    assert time.monotonic() - started < ServiceConfig.SUPERVISOR_SHUTDOWN_TIMEOUT
+    assert sup.children[0].returncode == -signal.SIGTERM
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from config import ServiceConfig
+from task_queue import (
+    LARGE,
+    MEDIUM,
+    SIZE_CLASS_PRIORITY,
+    SMALL,
+    UNKNOWN,
+    PriorityTaskQueue,
+    current_queue_wait,
+    size_class,
+)
+
+
+def _handler(message):
+    return message
+
+
+async def _put(queue: PriorityTaskQueue, message: str, klass: str):
+    await queue.put(_handler, message, SIZE_CLASS_PRIORITY[klass], klass)
+
+
+def test_size_class_boundaries():
+    assert size_class(None) == UNKNOWN
+    assert size_class(ServiceConfig.EXPRESS_MAX_FILES) == SMALL
+    assert size_class(ServiceConfig.EXPRESS_MAX_FILES + 1) == MEDIUM
+    assert size_class(ServiceConfig.LARGE_TASK_MIN_FILES) == LARGE
+
+
+async def test_highest_priority_first_ties_in_arrival_order():
+    queue = PriorityTaskQueue()
+    await _put(queue, "large", LARGE)
+    await _put(queue, "medium-1", MEDIUM)
+    await _put(queue, "small", SMALL)
+    await _put(queue, "medium-2", MEDIUM)
+
+    received = [(await queue.get()).message for _ in range(4)]
+    assert received == ["small", "medium-1", "medium-2", "large"]
+
+
+async def test_express_lane_takes_only_small_tasks():
+    queue = PriorityTaskQueue()
+    await _put(queue, "large", LARGE)
+    await _put(queue, "small", SMALL)
+
+    assert (await queue.get(express=True)).message == "small"
+
+    # No small task left: an express worker waits even though a large one is queued
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(queue.get(express=True), 0.05)
+    assert queue.qsize() == 1
+
+    express = asyncio.create_task(queue.get(express=True))
+    await _put(queue, "small-2", SMALL)
+    assert (await asyncio.wait_for(express, 1)).message == "small-2"
+    assert (await queue.get()).message == "large"
+
+
+async def test_drain_returns_waiting_tasks_and_releases_join():
+    queue = PriorityTaskQueue()
+    await _put(queue, "medium", MEDIUM)
+    await _put(queue, "small", SMALL)
+
+    drained = queue.drain_nowait()
+    assert [item.message for item in drained] == ["small", "medium"]
+    assert queue.qsize() == 0
+    await asyncio.wait_for(queue.join(), 1)
+
+
+async def test_put_blocks_when_full():
+    queue = PriorityTaskQueue(maxsize=1)
+    await _put(queue, "first", MEDIUM)
+    blocked = asyncio.create_task(_put(queue, "second", MEDIUM))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    await queue.get()
+    await asyncio.wait_for(blocked, 1)
+    assert queue.qsize() == 1
+
+
+async def test_job_context_carries_queue_wait():
+    queue = PriorityTaskQueue()
+    await _put(queue, "small", SMALL)
+    await asyncio.sleep(0.02)
+    item = await queue.get()
+
+    assert item.wait_seconds >= 0.02
+    assert item.job_context().run(current_queue_wait.get) == item.wait_seconds
+    assert current_queue_wait.get() == 0.0
+    assert queue.wait_stats.summary()[SMALL]["count"] == 1
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import pytest
+
+import fair_share
+import workers
+from config import ServiceConfig
+from fair_share import FairScheduler
+from workers import file_deadline, run_blocking
+
+
+def _work(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture
+def scheduler(monkeypatch) -> FairScheduler:
+    # Thread mode with a single conversion slot
+    monkeypatch.setattr(ServiceConfig, "CONVERTER_WORKERS", 0)
+    monkeypatch.setattr(workers, "_pool", None)
+    scheduler = FairScheduler("conversion", capacity=1)
+    monkeypatch.setitem(fair_share._schedulers, "conversion", scheduler)
+    return scheduler
+
+
+async def _hold(scheduler: FairScheduler, seconds: float):
+    async with scheduler.slot():
+        await asyncio.sleep(seconds)
+
+
+async def test_waiting_for_a_slot_does_not_use_the_deadline(scheduler):
+    with file_deadline(0.2) as deadline:
+        await run_blocking(_work, 0.01)
+
+        # Another file holds the only slot longer than this file's whole deadline
+        holder = asyncio.create_task(_hold(scheduler, 0.3))
+        await asyncio.sleep(0)
+        assert await run_blocking(_work, 0.01) == 0.01
+        await holder
+
+    assert not deadline.timed_out
+    assert deadline.elapsed() < 0.15
+
+
+async def test_time_holding_a_slot_counts(scheduler):
+    with file_deadline(0.05) as deadline:
+        with pytest.raises(workers.ConversionTimeout):
+            await run_blocking(_work, 0.2)
+
+    assert deadline.timed_out
+    assert deadline.elapsed() >= 0.05
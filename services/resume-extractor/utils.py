@@ -4,6 +4,8 @@ Consolidates utilities from all original microservices.
 """
 
 import asyncio
+import hashlib
+import io
 import json
 import logging
 import mimetypes
@@ -12,18 +14,18 @@ import shutil
 import zipfile
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple, Union
 
 import aiofiles
 import aiohttp
-import orjson
 import pandas as pd
 import patoolib
 from cuid2 import cuid_wrapper
 from minio import Minio
 from minio.error import S3Error
 
-from config import MinioConfig, MinioBuckets, ServiceConfig, SupportedExtensions
+from config import MinioBuckets, MinioConfig, ServiceConfig, SupportedExtensions
+from metrics import timed_io
 
 logger = logging.getLogger("resume-extractor.utils")
 
@@ -68,9 +70,11 @@ class ParseableFile:
     size: int
     status: FileStatus
     parsing_task_id: str
+    # Generated by the database when not given
+    id: Optional[str] = None
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        data = {
             "bucketName": self.bucket_name,
             "fileName": self.file_name,
             "filePath": self.file_path,
@@ -80,6 +84,17 @@ class ParseableFile:
             "status": self.status.value,
             "parsingTaskId": self.parsing_task_id,
         }
+        if self.id is not None:
+            data["id"] = self.id
+        return data
+
+
+def parseable_file_id(task_id: str, file_path: str) -> str:
+    """
+    Deterministic parseable file id, so inserting a task's files again (a
+    requeued or rerun task) leaves the existing records as they are.
+    """
+    return hashlib.blake2b(f"{task_id}:{file_path}".encode("utf-8"), digest_size=12).hexdigest()
 
 
 @dataclass
@@ -122,6 +137,8 @@ class ExtractedFile:
     original_name: str
     extension: str
     size: int
+    # Content digest for byte-identical duplicate detection (None if hashing failed)
+    content_hash: Optional[str] = None
 
 
 # ============================================================================
@@ -144,11 +161,58 @@ def get_minio_client() -> Minio:
     return _minio_client
 
 
+@timed_io("minio", "ensure_bucket")
+def ensure_bucket(bucket: str):
+    """Create a bucket if it does not exist (blocking)."""
+    client = get_minio_client()
+    if not client.bucket_exists(bucket):
+        client.make_bucket(bucket)
+
+
+@timed_io("minio", "put_object")
+def put_object_bytes(bucket: str, key: str, data: bytes, content_type: str = "application/json"):
+    """Upload an in-memory object (blocking)."""
+    get_minio_client().put_object(
+        bucket, key, io.BytesIO(data), len(data), content_type=content_type
+    )
+
+
+@timed_io("minio", "get_object")
+def get_object_bytes(bucket: str, key: str) -> bytes:
+    """Download an object into memory (blocking)."""
+    response = get_minio_client().get_object(bucket, key)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
+@timed_io("minio", "list_objects")
+def list_object_names(bucket: str, prefix: str) -> List[str]:
+    """Names of the objects under a prefix (blocking)."""
+    return [
+        obj.object_name
+        for obj in get_minio_client().list_objects(bucket, prefix=prefix, recursive=True)
+        if obj.object_name
+    ]
+
+
+@timed_io("minio", "delete_prefix")
+def delete_prefix(bucket: str, prefix: str, keep: Collection[str] = ()):
+    """Remove every object under a prefix except those in keep (blocking)."""
+    client = get_minio_client()
+    for object_name in list_object_names(bucket, prefix):
+        if object_name not in keep:
+            client.remove_object(bucket, object_name)
+
+
 # ============================================================================
 # Archive Operations
 # ============================================================================
 
 
+@timed_io("minio", "download_archives")
 async def download_archive_files(user_id: str, task_id: str) -> Tuple[List[str], List[str]]:
     """
     Download all archive files for a task from MinIO.
@@ -192,6 +256,7 @@ async def download_archive_files(user_id: str, task_id: str) -> Tuple[List[str],
     return local_paths, object_names
 
 
+@timed_io("api", "fetch_parseable_files")
 async def fetch_parseable_files_from_api(task_id: str) -> List[Dict[str, Any]]:
     """Fetch parseable files list from API with retries."""
     url = f"{ServiceConfig.NEXT_API_URL}/parseable-files"
@@ -225,8 +290,9 @@ async def fetch_parseable_files_from_api(task_id: str) -> List[Dict[str, Any]]:
     return []
 
 
+@timed_io("minio", "download_parseable_files")
 async def download_parseable_files(
-    task_id: str, parseable_files: List[Dict[str, Any]]
+    task_id: str, parseable_files: List[Dict[str, Any]], download_dir: Optional[str] = None
 ) -> List[ExtractedFile]:
     """
     Download individual parseable files from MinIO.
@@ -234,12 +300,13 @@ async def download_parseable_files(
     Args:
         task_id: Task ID
         parseable_files: List of file records from API
+        download_dir: Target directory (defaults to the task's extraction directory)
 
     Returns:
         List of ExtractedFile objects
     """
     client = get_minio_client()
-    download_dir = os.path.join(ServiceConfig.EXTRACTION_DIR, f"task-{task_id}")
+    download_dir = download_dir or os.path.join(ServiceConfig.EXTRACTION_DIR, f"task-{task_id}")
     os.makedirs(download_dir, exist_ok=True)
 
     loop = asyncio.get_event_loop()
@@ -266,6 +333,7 @@ async def download_parseable_files(
 
             extension = os.path.splitext(original_name)[1].lower()
             size = os.path.getsize(local_path) if os.path.exists(local_path) else 0
+            content_hash = await loop.run_in_executor(None, hash_file, local_path)
 
             extracted_files.append(
                 ExtractedFile(
@@ -274,6 +342,7 @@ async def download_parseable_files(
                     original_name=original_name,
                     extension=extension,
                     size=size,
+                    content_hash=content_hash,
                 )
             )
 
@@ -286,6 +355,7 @@ async def download_parseable_files(
     return extracted_files
 
 
+@timed_io("minio", "delete_parseable_files")
 async def delete_parseable_files_from_minio(parseable_files: List[Dict[str, Any]]):
     """Delete parseable files from MinIO after processing."""
     client = get_minio_client()
@@ -338,7 +408,14 @@ async def extract_archives(
         except Exception as e:
             logger.error(f"Failed to extract {archive_path}: {e}")
 
-    # Collect all extracted files
+    # Collect (and hash) all extracted files
+    extracted_files = await loop.run_in_executor(None, _collect_extracted_files, extraction_dir)
+
+    return extraction_dir, extracted_files
+
+
+def _collect_extracted_files(extraction_dir: str) -> List[ExtractedFile]:
+    """Walk an extraction directory, hashing each supported file."""
     extracted_files = []
     for root, _, filenames in os.walk(extraction_dir):
         for filename in filenames:
@@ -352,12 +429,18 @@ async def extract_archives(
                     original_name=filename,
                     extension=extension,
                     size=os.path.getsize(file_path),
+                    content_hash=(
+                        hash_file(file_path)
+                        if SupportedExtensions.is_supported(extension)
+                        else None
+                    ),
                 )
             )
 
-    return extraction_dir, extracted_files
+    return extracted_files
 
 
+@timed_io("minio", "delete_archives")
 async def delete_archive_files_from_minio(object_names: List[str]):
     """Delete archive files from MinIO after processing."""
     client = get_minio_client()
@@ -384,6 +467,46 @@ def get_content_type(filename: str) -> str:
     return content_type or "application/octet-stream"
 
 
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> Optional[str]:
+    """BLAKE2b digest of a file's contents, or None if it cannot be read."""
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError as e:
+        logger.warning(f"Failed to hash {file_path}: {e}")
+        return None
+
+
+def dedupe_files(
+    files: List[ExtractedFile],
+) -> Tuple[List[ExtractedFile], Dict[str, List[ExtractedFile]]]:
+    """
+    Collapse byte-identical files to one representative per content hash.
+
+    Returns:
+        Tuple of (unique_files, duplicates) where duplicates maps a
+        representative's local_path to the other files with the same content.
+        Files without a hash are always kept.
+    """
+    unique = []
+    duplicates: Dict[str, List[ExtractedFile]] = {}
+    first_by_hash: Dict[str, ExtractedFile] = {}
+
+    for f in files:
+        representative = first_by_hash.get(f.content_hash) if f.content_hash else None
+        if representative is None:
+            unique.append(f)
+            if f.content_hash:
+                first_by_hash[f.content_hash] = f
+        else:
+            duplicates.setdefault(representative.local_path, []).append(f)
+
+    return unique, duplicates
+
+
 def categorize_files(
     files: List[ExtractedFile],
 ) -> Tuple[List[ExtractedFile], List[ExtractedFile]]:
@@ -436,6 +559,7 @@ async def cleanup_files(file_paths: List[str]):
 # ============================================================================
 
 
+@timed_io("minio", "upload_json")
 async def upload_aggregated_json(
     user_id: str, task_id: str, task_name: str, results: List[Dict[str, Any]]
 ) -> str:
@@ -479,6 +603,26 @@ async def upload_aggregated_json(
     return minio_path
 
 
+def write_results_excel(target: Union[str, io.BytesIO], results: List[Dict[str, Any]]):
+    """Write results to an Excel file or buffer, one row per result with title-cased headers."""
+    valid_results = []
+    for i, item in enumerate(results):
+        if isinstance(item, dict):
+            valid_results.append(item)
+        else:
+            logger.warning(f"Skipping non-dict result at index {i}: {type(item).__name__}")
+
+    if not valid_results:
+        logger.warning("No valid results to convert to Excel, creating empty DataFrame")
+        df = pd.DataFrame()
+    else:
+        df = pd.DataFrame(valid_results)
+        df.columns = [col.replace("_", " ").title() for col in df.columns]
+
+    df.to_excel(target, index=False)
+
+
+@timed_io("minio", "upload_excel")
 async def convert_and_upload_excel(
     user_id: str, task_id: str, task_name: str, results: List[Dict[str, Any]]
 ) -> str:
@@ -502,24 +646,7 @@ async def convert_and_upload_excel(
 
     loop = asyncio.get_event_loop()
 
-    def create_excel():
-        valid_results = []
-        for i, item in enumerate(results):
-            if isinstance(item, dict):
-                valid_results.append(item)
-            else:
-                logger.warning(f"Skipping non-dict result at index {i}: {type(item).__name__}")
-
-        if not valid_results:
-            logger.warning("No valid results to convert to Excel, creating empty DataFrame")
-            df = pd.DataFrame()
-        else:
-            df = pd.DataFrame(valid_results)
-            df.columns = [col.replace("_", " ").title() for col in df.columns]
-
-        df.to_excel(local_path, index=False)
-
-    await loop.run_in_executor(None, create_excel)
+    await loop.run_in_executor(None, write_results_excel, local_path, results)
 
     # Upload to MinIO
     minio_path = f"{user_id}/{task_id}/{excel_filename}"
@@ -544,6 +671,7 @@ async def convert_and_upload_excel(
 # ============================================================================
 
 
+@timed_io("api", "fetch_parsing_task")
 async def fetch_parsing_task(task_id: str) -> ParsingTask:
     """Fetch parsing task details from the API."""
     url = f"{ServiceConfig.NEXT_API_URL}/parsing-task"
@@ -574,6 +702,7 @@ async def fetch_parsing_task(task_id: str) -> ParsingTask:
             )
 
 
+@timed_io("api", "fetch_extraction_config")
 async def fetch_extraction_config(task_id: str) -> Tuple[str, List[str]]:
     """Fetch the extraction prompt and field keys for a task."""
     url = f"{ServiceConfig.NEXT_API_URL}/parsing-task/extraction-prompt"
@@ -591,6 +720,7 @@ async def fetch_extraction_config(task_id: str) -> Tuple[str, List[str]]:
             return data["data"]["prompt"], data["data"]["fieldKeys"]
 
 
+@timed_io("api", "update_parsing_task")
 async def update_parsing_task(task_id: str, updates: Dict[str, Any]) -> bool:
     """Update parsing task status via API."""
     url = f"{ServiceConfig.NEXT_API_URL}/parsing-task"
@@ -635,6 +765,9 @@ async def mark_task_completed(task_id: str, json_path: str, sheet_path: str) ->
             "taskStatus": TaskStatus.COMPLETED.value,
             "jsonFilePath": json_path,
             "sheetFilePath": sheet_path,
+            # The final results supersede any partial snapshot
+            "partialJsonFilePath": None,
+            "partialSheetFilePath": None,
         },
     )
 
@@ -650,6 +783,7 @@ async def mark_task_failed(task_id: str, error_message: str) -> bool:
     )
 
 
+@timed_io("api", "insert_parseable_files")
 async def insert_parseable_files(files: List[ParseableFile]) -> bool:
     """Insert parseable file records to DB via API."""
     url = f"{ServiceConfig.NEXT_API_URL}/parseable-files"
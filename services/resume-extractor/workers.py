@@ -0,0 +1,428 @@
+"""
+Supervised conversion worker processes.
+
+Blocking converter calls (pymupdf, pdfplumber, OCR, python-docx, ...) run in a
+pool of spawned worker processes instead of threads, so a file that hangs or
+runs away can be stopped: each file gets a deadline, and a worker still busy
+when the deadline passes is killed and replaced with a fresh process. A thread
+stuck in native code can never be reclaimed; a process always can.
+
+Each worker talks to the parent over its own pipe. The parent waits on the
+pipe with the event loop (no helper threads), one job per worker at a time.
+CONVERTER_WORKERS=0 falls back to a thread pool with soft deadlines (the file
+is reported as timed out, but the thread runs to completion).
+"""
+
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import resource
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from config import ServiceConfig
+from fair_share import get_fair_scheduler
+from strategy_stats import StrategyTimeout
+
+logger = logging.getLogger("resume-extractor.workers")
+
+# Spawned (not forked) workers: no inherited event loop, locks or open MinIO sockets
+_mp_context = multiprocessing.get_context("spawn")
+
+
+class ConversionTimeout(Exception):
+    """A file's conversion ran past its deadline."""
+
+
+class WorkerCrashed(Exception):
+    """A worker process died mid-job (e.g. segfault or OOM kill)."""
+
+
+class WorkerError(Exception):
+    """A job raised inside a worker; carries the remote exception's text."""
+
+
+# ============================================================================
+# Per-file Deadlines
+# ============================================================================
+
+
+class FileDeadline:
+    """
+    Wall-clock budget for converting one file.
+
+    The clock only runs while at least one of the file's jobs holds a
+    conversion slot, so time spent queueing for a slot (behind other files, or
+    behind the file's own OCR pages and fallback strategies) does not count
+    against it. Parallel jobs of the same file (e.g. OCR pages) share the deadline.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.started: Optional[float] = None
+        self.timed_out = False
+        # Fallback chain strategy that produced the text, if the converter has a chain
+        self.method: Optional[str] = None
+        self.ocr_pages = 0
+        self._holders = 0
+        self._held = 0.0
+        self._resumed: Optional[float] = None
+
+    def resume(self):
+        """A job of the file got a slot: run the clock."""
+        if self._holders == 0:
+            self._resumed = time.monotonic()
+            if self.started is None:
+                self.started = self._resumed
+        self._holders += 1
+
+    def pause(self):
+        """A job of the file gave its slot back: stop the clock if it was the last."""
+        self._holders -= 1
+        if self._holders == 0:
+            self._held += time.monotonic() - self._resumed
+            self._resumed = None
+
+    def elapsed(self) -> Optional[float]:
+        """Seconds the file's jobs have held a slot, or None if none ever got one."""
+        if self.started is None:
+            return None
+        if self._resumed is None:
+            return self._held
+        return self._held + time.monotonic() - self._resumed
+
+    def remaining(self) -> float:
+        return self.timeout - (self.elapsed() or 0.0)
+
+
+_file_deadline: contextvars.ContextVar[Optional[FileDeadline]] = contextvars.ContextVar(
+    "file_deadline", default=None
+)
+
+
+@contextmanager
+def file_deadline(timeout: float) -> Iterator[FileDeadline]:
+    """Apply a deadline to every run_blocking call made while converting one file."""
+    deadline = FileDeadline(timeout)
+    token = _file_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _file_deadline.reset(token)
+
+
+def note_strategy(strategy: str):
+    """Record the winning fallback strategy on the current file's deadline."""
+    deadline = _file_deadline.get()
+    if deadline is not None:
+        deadline.method = strategy
+
+
+def note_ocr_pages(pages: int):
+    """Count pages sent to OCR against the current file's deadline."""
+    deadline = _file_deadline.get()
+    if deadline is not None:
+        deadline.ocr_pages += pages
+
+
+# ============================================================================
+# Worker Process
+# ============================================================================
+
+
+def _rss_mb() -> float:
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def _limit_memory(limit_mb: int):
+    """Cap the worker's address space so an oversized file fails with MemoryError instead of an OOM kill."""
+    if limit_mb <= 0:
+        return
+    limit = limit_mb * 1024 * 1024
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError) as e:
+        logging.getLogger("resume-extractor.workers").warning(f"Could not set memory limit: {e}")
+
+
+def _worker_main(conn: Connection, memory_limit_mb: int):
+    """Worker loop: receive (fn, args), reply (status, payload, RSS MB)."""
+    # Shutdown is driven by the parent; a terminal Ctrl-C must not kill jobs mid-file
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    _limit_memory(memory_limit_mb)
+
+    while True:
+        try:
+            fn, args = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        try:
+            reply = ("ok", fn(*args))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+
+        conn.send((*reply, _rss_mb()))
+
+
+class _Worker:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self):
+        self.conn, child_conn = _mp_context.Pipe(duplex=True)
+        self.process = _mp_context.Process(
+            target=_worker_main,
+            args=(child_conn, ServiceConfig.CONVERTER_MEMORY_LIMIT_MB),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.rss_mb = 0.0
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    async def call(self, fn: Callable, args: tuple, timeout: Optional[float]) -> Any:
+        """Send one job and wait for its reply without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        fd = self.conn.fileno()
+
+        self.conn.send((fn, args))
+        loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+        try:
+            await asyncio.wait_for(readable, timeout)
+        finally:
+            loop.remove_reader(fd)
+
+        try:
+            status, payload, self.rss_mb = self.conn.recv()
+        except (EOFError, OSError) as e:
+            self.process.join(timeout=1)
+            raise WorkerCrashed(f"worker {self.pid} exited (code {self.process.exitcode})") from e
+
+        if status == "error":
+            raise WorkerError(payload)
+        return payload
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        except Exception as e:
+            logger.warning(f"Failed to kill worker {self.pid}: {e}")
+        finally:
+            self.conn.close()
+
+    def stop(self):
+        """Ask the worker to exit by closing its pipe, killing it if it does not."""
+        self.conn.close()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=5)
+
+
+# ============================================================================
+# Pool
+# ============================================================================
+
+
+class WorkerPool:
+    """Fixed-size pool of conversion worker processes that replaces killed or crashed workers."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: asyncio.Queue[_Worker] = asyncio.Queue()
+        self._workers: set[_Worker] = set()
+        self.replaced = 0
+        for _ in range(size):
+            self._add_worker()
+        logger.info(f"Started {size} conversion worker processes")
+
+    def _add_worker(self):
+        worker = _Worker()
+        self._workers.add(worker)
+        self._idle.put_nowait(worker)
+
+    def _replace(self, worker: _Worker, reason: str):
+        """Kill a worker and start its replacement so pool capacity recovers immediately."""
+        logger.warning(f"Replacing conversion worker {worker.pid}: {reason}")
+        self._workers.discard(worker)
+        worker.kill()
+        self.replaced += 1
+        self._add_worker()
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        deadline: Optional[FileDeadline] = None,
+        budget: Optional[float] = None,
+    ) -> Any:
+        """
+        Run fn(*args) on an idle worker, enforcing the file deadline if one is
+        given and the job's own budget (seconds) if that ends first.
+        """
+        worker = await self._idle.get()
+
+        timeout = None
+        if deadline is not None:
+            timeout = deadline.remaining()
+            if timeout <= 0:
+                self._idle.put_nowait(worker)
+                deadline.timed_out = True
+                raise ConversionTimeout(
+                    f"{getattr(fn, '__qualname__', fn)}: deadline already passed"
+                )
+        over_budget = budget is not None and (timeout is None or budget < timeout)
+        if over_budget:
+            timeout = budget
+
+        try:
+            result = await worker.call(fn, args, timeout)
+        except asyncio.TimeoutError:
+            if over_budget:
+                self._replace(worker, f"{getattr(fn, '__qualname__', fn)} exceeded its budget")
+                raise StrategyTimeout(
+                    f"{getattr(fn, '__qualname__', fn)} exceeded {budget:.0f}s"
+                ) from None
+            deadline.timed_out = True
+            self._replace(worker, f"{getattr(fn, '__qualname__', fn)} exceeded the file deadline")
+            raise ConversionTimeout(
+                f"{getattr(fn, '__qualname__', fn)} exceeded {deadline.timeout:.0f}s"
+            ) from None
+        except WorkerError:
+            # The job failed but the worker is healthy
+            self._release(worker)
+            raise
+        except BaseException as e:
+            # Crashed, or cancelled mid-job: the worker's state is unknown
+            self._replace(worker, type(e).__name__)
+            raise
+
+        self._release(worker)
+        return result
+
+    def _release(self, worker: _Worker):
+        """Return a worker to the idle queue, recycling it if its heap has grown too large."""
+        limit = ServiceConfig.CONVERTER_RECYCLE_RSS_MB
+        if limit > 0 and worker.rss_mb > limit:
+            self._replace(worker, f"RSS {worker.rss_mb:.0f}MB exceeds {limit}MB")
+        else:
+            self._idle.put_nowait(worker)
+
+    def shutdown(self):
+        for worker in list(self._workers):
+            worker.stop()
+        self._workers.clear()
+        logger.info(f"Conversion workers stopped ({self.replaced} replaced during run)")
+
+
+_pool: Optional[WorkerPool] = None
+_thread_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_worker_pool() -> Optional[WorkerPool]:
+    """Get or create the process pool; None when CONVERTER_WORKERS=0."""
+    global _pool
+    if _pool is None and ServiceConfig.CONVERTER_WORKERS > 0:
+        _pool = WorkerPool(ServiceConfig.CONVERTER_WORKERS)
+    return _pool
+
+
+def worker_pool_stats() -> Optional[Dict[str, int]]:
+    """Size and busy workers of the process pool, or None if it is not running."""
+    if _pool is None:
+        return None
+    return {
+        "size": _pool.size,
+        "busy": max(0, _pool.size - _pool._idle.qsize()),
+        "replaced": _pool.replaced,
+    }
+
+
+def shutdown_worker_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+async def run_blocking(fn: Callable, *args, budget: Optional[float] = None) -> Any:
+    """
+    Run a blocking converter call under the current file's deadline.
+
+    With a budget (seconds) the call is also stopped once it has run that long
+    and StrategyTimeout is raised; the file's deadline keeps running. The
+    deadline's clock is paused while the call waits for a slot.
+
+    fn must be importable by name (a module-level function or a staticmethod),
+    since it is pickled to the worker process.
+    """
+    pool = get_worker_pool()
+    capacity = pool.size if pool is not None else ServiceConfig.FILE_PROCESSING_CONCURRENCY
+    deadline = _file_deadline.get()
+    # Slots are shared fairly between the tasks running at once
+    async with get_fair_scheduler("conversion", capacity).slot():
+        if deadline is not None:
+            deadline.resume()
+        try:
+            if pool is not None:
+                return await pool.run(fn, *args, deadline=deadline, budget=budget)
+            return await _run_in_thread(fn, *args, budget=budget)
+        finally:
+            if deadline is not None:
+                deadline.pause()
+
+
+async def _run_in_thread(fn: Callable, *args, budget: Optional[float] = None) -> Any:
+    """Thread-pool fallback: deadlines and budgets are reported but cannot stop the thread."""
+    deadline = _file_deadline.get()
+
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=ServiceConfig.FILE_PROCESSING_CONCURRENCY)
+
+    loop = asyncio.get_running_loop()
+    # The thread sees the same file deadline as the calling task
+    future = loop.run_in_executor(_thread_pool, contextvars.copy_context().run, fn, *args)
+
+    timeout = None
+    if deadline is not None:
+        timeout = max(0.0, deadline.remaining())
+    over_budget = budget is not None and (timeout is None or budget < timeout)
+    if over_budget:
+        timeout = budget
+    if timeout is None:
+        return await future
+
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        if over_budget:
+            raise StrategyTimeout(
+                f"{getattr(fn, '__qualname__', fn)} exceeded {budget:.0f}s"
+            ) from None
+        deadline.timed_out = True
+        raise ConversionTimeout(
+            f"{getattr(fn, '__qualname__', fn)} exceeded {deadline.timeout:.0f}s"
+        ) from None
@@ -7,7 +7,7 @@ import { parseableFileTable } from "@/server/db/schema";
 import { ParseableFilesInputSchema } from "@/lib/schema";
 // TYPES
 import type { NextRequest } from "next/server";
-import { eq } from "drizzle-orm";
+import { eq, sql } from "drizzle-orm";
 
 export const GET = async (req: NextRequest) => {
   try {
@@ -63,13 +63,12 @@ export const POST = async (req: NextRequest) => {
       );
     }
 
-    const parseableFilesInsertQuery = await db
+    // The extractor sends deterministic ids, so a requeued or rerun task
+    // inserting its files again leaves the existing rows untouched
+    await db
       .insert(parseableFileTable)
-      .values(parseableFiles);
-
-    if (parseableFilesInsertQuery[0].affectedRows !== parseableFiles.length) {
-      throw new Error("Some or all parseable files not updated in db");
-    }
+      .values(parseableFiles)
+      .onDuplicateKeyUpdate({ set: { id: sql`id` } });
 
     return NextResponse.json(
       {
@@ -147,6 +147,18 @@ export const QUEUES = {
   RESUME_EXTRACTOR: "resume_extractor_queue",
 } as const;
 
+// Priorities of resume extraction tasks by file count; keep in sync with the
+// resume-extractor service's task_queue.py and QUEUE_MAX_PRIORITY
+export const RESUME_EXTRACTOR_MAX_PRIORITY = 10;
+export const EXPRESS_MAX_FILES = 50;
+export const LARGE_TASK_MIN_FILES = 1000;
+export const TASK_PRIORITY = {
+  SMALL: 8,
+  MEDIUM: 5,
+  UNKNOWN: 5,
+  LARGE: 2,
+} as const;
+
 // 2GB
 export const TASK_FILE_UPLOAD_SIZE = 2 * 1024 * 1024 * 1024;
 
@@ -1,6 +1,6 @@
-import { eq } from "drizzle-orm";
+import { count, eq } from "drizzle-orm";
 // UTILS
-import { publishToQueue } from "@/server/utils";
+import { getTaskPriority, publishToQueue } from "@/server/utils";
 import { parseableFileTable, parsingTaskTable } from "@/server/db/schema";
 import { createTRPCRouter, protectedProcedure } from "@/server/api/trpc";
 // SCHEMAS
@@ -10,7 +10,7 @@ import {
   DeleteParsingTaskInput,
 } from "@/lib/schema";
 // CONSTANTS
-import { QUEUES } from "@/constants";
+import { QUEUES, RESUME_EXTRACTOR_MAX_PRIORITY } from "@/constants";
 
 export const parsingTaskRouter = createTRPCRouter({
   create: protectedProcedure
@@ -64,13 +64,26 @@ export const parsingTaskRouter = createTRPCRouter({
   startParsing: protectedProcedure
     .input(StartParsingInput)
     .mutation(async ({ ctx, input }) => {
+      // Archive contents are only counted once the service extracts them
+      let fileCount: number | undefined;
+      if (!input.extractFromArchive) {
+        const [row] = await ctx.db
+          .select({ fileCount: count() })
+          .from(parseableFileTable)
+          .where(eq(parseableFileTable.parsingTaskId, input.taskId));
+        fileCount = row?.fileCount;
+      }
+
       const isSuccess = await publishToQueue({
         queueName: QUEUES.RESUME_EXTRACTOR,
         message: JSON.stringify({
           userId: ctx.session.user.id,
           taskId: input.taskId,
           extractFromArchive: input.extractFromArchive,
+          fileCount,
         }),
+        maxPriority: RESUME_EXTRACTOR_MAX_PRIORITY,
+        priority: getTaskPriority(fileCount),
       });
 
       if (isSuccess) {
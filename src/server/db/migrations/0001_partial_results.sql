@@ -0,0 +1,2 @@
+ALTER TABLE `parsing_task` ADD `partial_json_file_path` varchar(255);--> statement-breakpoint
+ALTER TABLE `parsing_task` ADD `partial_sheet_file_path` varchar(255);
\ No newline at end of file
@@ -50,6 +50,8 @@ export const parsingTaskTable = mysqlTable("parsing_task", {
   invalidFiles: int("invalid_files").notNull().default(0),
   jsonFilePath: varchar("json_file_path", { length: 255 }),
   sheetFilePath: varchar("sheet_file_path", { length: 255 }),
+  partialJsonFilePath: varchar("partial_json_file_path", { length: 255 }),
+  partialSheetFilePath: varchar("partial_sheet_file_path", { length: 255 }),
   errorMessage: text("error_message"),
   createdAt: timestamp("created_at").notNull().defaultNow(),
   updatedAt: timestamp("updated_at").notNull().defaultNow().onUpdateNow(),
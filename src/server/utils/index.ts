@@ -2,29 +2,60 @@ import "server-only";
 import amqp from "amqplib";
 // UTILS
 import { env } from "@/env.js";
+// CONSTANTS
+import {
+  EXPRESS_MAX_FILES,
+  LARGE_TASK_MIN_FILES,
+  TASK_PRIORITY,
+} from "@/constants";
 // TYPES
 
+/**
+ * Message priority for a resume extraction task, from its file count when known.
+ */
+export const getTaskPriority = (fileCount?: number): number => {
+  if (fileCount === undefined) return TASK_PRIORITY.UNKNOWN;
+  if (fileCount <= EXPRESS_MAX_FILES) return TASK_PRIORITY.SMALL;
+  if (fileCount >= LARGE_TASK_MIN_FILES) return TASK_PRIORITY.LARGE;
+  return TASK_PRIORITY.MEDIUM;
+};
+
 /**
  * Publishes a message to a RabbitMQ queue.
  */
 export const publishToQueue = async ({
   queueName,
   message,
+  maxPriority,
+  priority,
 }: {
   queueName: string;
   message: string;
+  maxPriority?: number;
+  priority?: number;
 }): Promise<boolean> => {
   try {
     // Connect to RabbitMQ
     const connection = await amqp.connect(env.RABBITMQ_URL, { tls: { rejectUnauthorized: false, }, });
-    const channel = await connection.createChannel();
+    let channel = await connection.createChannel();
+    channel.on("error", (error: Error) => {
+      console.warn(`RabbitMQ channel error: ${error.message}`);
+    });
 
     // Assert the queue
-    await channel.assertQueue(queueName, { durable: true });
+    try {
+      await channel.assertQueue(queueName, { durable: true, maxPriority });
+    } catch {
+      // The queue exists with other arguments (e.g. declared before priorities
+      // were added); the failed assert closed the channel, so publish on a new one
+      channel = await connection.createChannel();
+      await channel.checkQueue(queueName);
+    }
 
     // Publish the message
     const isSent = channel.sendToQueue(queueName, Buffer.from(message), {
       persistent: true,
+      priority,
     });
 
     console.log(